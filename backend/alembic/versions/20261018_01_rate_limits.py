@@ -0,0 +1,27 @@
+"""rate limits table
+
+Revision ID: 20261018_01
+Revises: 20260212_01
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+
+
+revision = "20261018_01"
+down_revision = "20260212_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # UNLOGGED: limiter state is disposable, so skip WAL on this hot, write-only table.
+    op.execute(
+        "CREATE UNLOGGED TABLE rate_limits ("
+        "key TEXT PRIMARY KEY, "
+        "tat DOUBLE PRECISION NOT NULL"
+        ")"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limits")
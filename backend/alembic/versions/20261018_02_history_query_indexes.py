@@ -0,0 +1,50 @@
+"""history query indexes
+
+Revision ID: 20261018_02
+Revises: 20261018_01
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_02"
+down_revision = "20261018_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Matches get_sessions (user_id + date range, ordered by started_at) and per-day lookups;
+    # its user_id prefix also serves the ON DELETE CASCADE from users.
+    op.create_index(
+        "ix_break_sessions_user_id_date_started_at",
+        "break_sessions",
+        ["user_id", "date", "started_at"],
+        unique=False,
+    )
+    op.drop_index("ix_break_sessions_date", table_name="break_sessions")
+    op.drop_index("ix_break_sessions_user_id", table_name="break_sessions")
+
+    op.create_index(
+        "ix_refresh_tokens_active_token_hash",
+        "refresh_tokens",
+        ["token_hash"],
+        unique=False,
+        postgresql_where=sa.text("revoked_at IS NULL"),
+    )
+    op.create_index(
+        "ix_password_reset_tokens_unused_token_hash",
+        "password_reset_tokens",
+        ["token_hash"],
+        unique=False,
+        postgresql_where=sa.text("used_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_password_reset_tokens_unused_token_hash", table_name="password_reset_tokens")
+    op.drop_index("ix_refresh_tokens_active_token_hash", table_name="refresh_tokens")
+    op.create_index("ix_break_sessions_user_id", "break_sessions", ["user_id"], unique=False)
+    op.create_index("ix_break_sessions_date", "break_sessions", ["date"], unique=False)
+    op.drop_index("ix_break_sessions_user_id_date_started_at", table_name="break_sessions")
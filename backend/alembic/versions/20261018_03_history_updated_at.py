@@ -0,0 +1,31 @@
+"""history updated_at
+
+Revision ID: 20261018_03
+Revises: 20261018_02
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_03"
+down_revision = "20261018_02"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Row versions for ETags; the server default also covers rows written with COPY.
+    op.add_column(
+        "break_sessions",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.add_column(
+        "daily_records",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("daily_records", "updated_at")
+    op.drop_column("break_sessions", "updated_at")
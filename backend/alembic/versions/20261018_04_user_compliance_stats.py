@@ -0,0 +1,115 @@
+"""user compliance stats
+
+Revision ID: 20261018_04
+Revises: 20261018_03
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_04"
+down_revision = "20261018_03"
+branch_labels = None
+depends_on = None
+
+
+# Streaks count consecutive daily_records (days without a record are skipped) whose compliance is
+# >= 75, the threshold in app.services.compliance_stats. The common changes (a new latest day, or
+# the latest day moving up or down) are applied in O(1); anything that can reshuffle older runs only
+# marks the row stale and the API recomputes it with window functions on the next read.
+TRIGGER_FUNCTION = """
+CREATE FUNCTION daily_records_compliance_stats() RETURNS trigger AS $$
+DECLARE
+    s user_compliance_stats%ROWTYPE;
+    ok_new boolean;
+    ok_old boolean;
+BEGIN
+    IF TG_OP <> 'INSERT' AND (TG_OP = 'DELETE' OR (OLD.user_id, OLD.date) IS DISTINCT FROM (NEW.user_id, NEW.date)) THEN
+        UPDATE user_compliance_stats SET stale = true, updated_at = now() WHERE user_id = OLD.user_id;
+        IF TG_OP = 'UPDATE' THEN
+            INSERT INTO user_compliance_stats (user_id, stale) VALUES (NEW.user_id, true)
+            ON CONFLICT (user_id) DO UPDATE SET stale = true, updated_at = now();
+        END IF;
+        RETURN NULL;
+    ELSIF TG_OP = 'UPDATE' AND OLD.compliance_percent = NEW.compliance_percent THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO user_compliance_stats (user_id) VALUES (NEW.user_id) ON CONFLICT (user_id) DO NOTHING;
+    SELECT * INTO s FROM user_compliance_stats WHERE user_id = NEW.user_id FOR UPDATE;
+    IF s.stale THEN
+        RETURN NULL;
+    END IF;
+
+    ok_new := NEW.compliance_percent >= 75;
+    IF TG_OP = 'INSERT' THEN
+        s.total_days := s.total_days + 1;
+        s.compliance_sum := s.compliance_sum + NEW.compliance_percent;
+    ELSE
+        ok_old := OLD.compliance_percent >= 75;
+        s.compliance_sum := s.compliance_sum + NEW.compliance_percent - OLD.compliance_percent;
+    END IF;
+
+    IF s.last_record_date IS NULL OR NEW.date > s.last_record_date THEN
+        s.previous_streak := s.current_streak;
+        s.current_streak := CASE WHEN ok_new THEN s.current_streak + 1 ELSE 0 END;
+        s.last_record_date := NEW.date;
+    ELSIF TG_OP = 'UPDATE' AND NEW.date = s.last_record_date AND ok_new <> ok_old THEN
+        IF ok_new THEN
+            s.current_streak := s.previous_streak + 1;
+        ELSIF s.current_streak = s.best_streak THEN
+            s.stale := true;
+        ELSE
+            s.current_streak := 0;
+        END IF;
+    ELSIF NEW.date < s.last_record_date AND (TG_OP = 'INSERT' OR ok_new <> ok_old) THEN
+        s.stale := true;
+    END IF;
+
+    UPDATE user_compliance_stats SET
+        total_days = s.total_days,
+        compliance_sum = s.compliance_sum,
+        current_streak = s.current_streak,
+        previous_streak = s.previous_streak,
+        best_streak = GREATEST(s.best_streak, s.current_streak),
+        last_record_date = s.last_record_date,
+        stale = s.stale,
+        updated_at = now()
+    WHERE user_id = NEW.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_compliance_stats",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("total_days", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("compliance_sum", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column("current_streak", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("previous_streak", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("best_streak", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("last_record_date", sa.Date(), nullable=True),
+        sa.Column("stale", sa.Boolean(), server_default=sa.text("false"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.execute(TRIGGER_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER daily_records_compliance_stats "
+        "AFTER INSERT OR UPDATE OR DELETE ON daily_records "
+        "FOR EACH ROW EXECUTE FUNCTION daily_records_compliance_stats()"
+    )
+    # Existing history is computed lazily on the first read.
+    op.execute("INSERT INTO user_compliance_stats (user_id, stale) SELECT DISTINCT user_id, true FROM daily_records")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER daily_records_compliance_stats ON daily_records")
+    op.execute("DROP FUNCTION daily_records_compliance_stats()")
+    op.drop_table("user_compliance_stats")
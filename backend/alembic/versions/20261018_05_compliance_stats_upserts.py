@@ -0,0 +1,160 @@
+"""compliance stats trigger without planned lookups
+
+Revision ID: 20261018_05
+Revises: 20261018_04
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+
+
+revision = "20261018_05"
+down_revision = "20261018_04"
+branch_labels = None
+depends_on = None
+
+
+# Same logic as 20261018_04, but on the hot path the stats row is locked, read and written through
+# INSERT ... ON CONFLICT, which always goes through the primary key. The previous SELECT/UPDATE
+# pair could keep a generic plan cached while user_compliance_stats was tiny and seq-scan it for
+# the rest of a bulk statement (e.g. the rollup backfill or a recompute), which made it quadratic.
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION daily_records_compliance_stats() RETURNS trigger AS $$
+DECLARE
+    s user_compliance_stats%ROWTYPE;
+    ok_new boolean;
+    ok_old boolean;
+BEGIN
+    IF TG_OP <> 'INSERT' AND (TG_OP = 'DELETE' OR (OLD.user_id, OLD.date) IS DISTINCT FROM (NEW.user_id, NEW.date)) THEN
+        -- UPDATE, not an upsert: on a cascading user delete the user row is already gone. EXECUTE is
+        -- planned on every call, so it cannot get stuck on a generic plan either.
+        EXECUTE 'UPDATE user_compliance_stats SET stale = true, updated_at = now() WHERE user_id = $1'
+            USING OLD.user_id;
+        IF TG_OP = 'UPDATE' THEN
+            INSERT INTO user_compliance_stats AS t (user_id, stale) VALUES (NEW.user_id, true)
+            ON CONFLICT (user_id) DO UPDATE SET stale = true, updated_at = now();
+        END IF;
+        RETURN NULL;
+    ELSIF TG_OP = 'UPDATE' AND OLD.compliance_percent = NEW.compliance_percent THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO user_compliance_stats AS t (user_id) VALUES (NEW.user_id)
+    ON CONFLICT (user_id) DO UPDATE SET user_id = t.user_id
+    RETURNING * INTO s;
+    IF s.stale THEN
+        RETURN NULL;
+    END IF;
+
+    ok_new := NEW.compliance_percent >= 75;
+    IF TG_OP = 'INSERT' THEN
+        s.total_days := s.total_days + 1;
+        s.compliance_sum := s.compliance_sum + NEW.compliance_percent;
+    ELSE
+        ok_old := OLD.compliance_percent >= 75;
+        s.compliance_sum := s.compliance_sum + NEW.compliance_percent - OLD.compliance_percent;
+    END IF;
+
+    IF s.last_record_date IS NULL OR NEW.date > s.last_record_date THEN
+        s.previous_streak := s.current_streak;
+        s.current_streak := CASE WHEN ok_new THEN s.current_streak + 1 ELSE 0 END;
+        s.last_record_date := NEW.date;
+    ELSIF TG_OP = 'UPDATE' AND NEW.date = s.last_record_date AND ok_new <> ok_old THEN
+        IF ok_new THEN
+            s.current_streak := s.previous_streak + 1;
+        ELSIF s.current_streak = s.best_streak THEN
+            s.stale := true;
+        ELSE
+            s.current_streak := 0;
+        END IF;
+    ELSIF NEW.date < s.last_record_date AND (TG_OP = 'INSERT' OR ok_new <> ok_old) THEN
+        s.stale := true;
+    END IF;
+
+    INSERT INTO user_compliance_stats AS t (user_id) VALUES (NEW.user_id)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_days = s.total_days,
+        compliance_sum = s.compliance_sum,
+        current_streak = s.current_streak,
+        previous_streak = s.previous_streak,
+        best_streak = GREATEST(s.best_streak, s.current_streak),
+        last_record_date = s.last_record_date,
+        stale = s.stale,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+# The 20261018_04 definition, restored on downgrade.
+PREVIOUS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION daily_records_compliance_stats() RETURNS trigger AS $$
+DECLARE
+    s user_compliance_stats%ROWTYPE;
+    ok_new boolean;
+    ok_old boolean;
+BEGIN
+    IF TG_OP <> 'INSERT' AND (TG_OP = 'DELETE' OR (OLD.user_id, OLD.date) IS DISTINCT FROM (NEW.user_id, NEW.date)) THEN
+        UPDATE user_compliance_stats SET stale = true, updated_at = now() WHERE user_id = OLD.user_id;
+        IF TG_OP = 'UPDATE' THEN
+            INSERT INTO user_compliance_stats (user_id, stale) VALUES (NEW.user_id, true)
+            ON CONFLICT (user_id) DO UPDATE SET stale = true, updated_at = now();
+        END IF;
+        RETURN NULL;
+    ELSIF TG_OP = 'UPDATE' AND OLD.compliance_percent = NEW.compliance_percent THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO user_compliance_stats (user_id) VALUES (NEW.user_id) ON CONFLICT (user_id) DO NOTHING;
+    SELECT * INTO s FROM user_compliance_stats WHERE user_id = NEW.user_id FOR UPDATE;
+    IF s.stale THEN
+        RETURN NULL;
+    END IF;
+
+    ok_new := NEW.compliance_percent >= 75;
+    IF TG_OP = 'INSERT' THEN
+        s.total_days := s.total_days + 1;
+        s.compliance_sum := s.compliance_sum + NEW.compliance_percent;
+    ELSE
+        ok_old := OLD.compliance_percent >= 75;
+        s.compliance_sum := s.compliance_sum + NEW.compliance_percent - OLD.compliance_percent;
+    END IF;
+
+    IF s.last_record_date IS NULL OR NEW.date > s.last_record_date THEN
+        s.previous_streak := s.current_streak;
+        s.current_streak := CASE WHEN ok_new THEN s.current_streak + 1 ELSE 0 END;
+        s.last_record_date := NEW.date;
+    ELSIF TG_OP = 'UPDATE' AND NEW.date = s.last_record_date AND ok_new <> ok_old THEN
+        IF ok_new THEN
+            s.current_streak := s.previous_streak + 1;
+        ELSIF s.current_streak = s.best_streak THEN
+            s.stale := true;
+        ELSE
+            s.current_streak := 0;
+        END IF;
+    ELSIF NEW.date < s.last_record_date AND (TG_OP = 'INSERT' OR ok_new <> ok_old) THEN
+        s.stale := true;
+    END IF;
+
+    UPDATE user_compliance_stats SET
+        total_days = s.total_days,
+        compliance_sum = s.compliance_sum,
+        current_streak = s.current_streak,
+        previous_streak = s.previous_streak,
+        best_streak = GREATEST(s.best_streak, s.current_streak),
+        last_record_date = s.last_record_date,
+        stale = s.stale,
+        updated_at = now()
+    WHERE user_id = NEW.user_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.execute(TRIGGER_FUNCTION)
+
+
+def downgrade() -> None:
+    op.execute(PREVIOUS_TRIGGER_FUNCTION)
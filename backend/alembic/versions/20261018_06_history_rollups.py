@@ -0,0 +1,134 @@
+"""history rollups
+
+Revision ID: 20261018_06
+Revises: 20261018_05
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_06"
+down_revision = "20261018_05"
+branch_labels = None
+depends_on = None
+
+
+ROLLUP_TABLES = {"weekly_records": "week", "monthly_records": "month", "yearly_records": "year"}
+
+# Every change to daily_records is applied as a delta to the week/month/year containing it. Sums are
+# additive, so this stays exact without rescans. Growing a period goes through INSERT ... ON CONFLICT,
+# which always uses the primary key; shrinking one (deletes, rare) uses EXECUTE so it is planned on
+# each call, and never inserts, since on a cascading user delete the user row is already gone.
+APPLY_FUNCTION = """
+CREATE FUNCTION history_rollups_apply(
+    p_user_id uuid, p_day date, p_days integer, p_expected integer, p_started integer, p_completed integer
+) RETURNS void AS $$
+BEGIN
+""" + "".join(
+    f"""
+    IF p_days >= 0 THEN
+        INSERT INTO {table} AS r (user_id, period_start, days_recorded, sessions_expected, sessions_started,
+                                 sessions_completed, compliance_percent, updated_at)
+        VALUES (p_user_id, date_trunc('{unit}', p_day)::date, p_days, p_expected, p_started, p_completed,
+                CASE WHEN p_expected > 0 THEN round(p_completed * 100.0 / p_expected)::integer ELSE 0 END, now())
+        ON CONFLICT (user_id, period_start) DO UPDATE SET
+            days_recorded = r.days_recorded + EXCLUDED.days_recorded,
+            sessions_expected = r.sessions_expected + EXCLUDED.sessions_expected,
+            sessions_started = r.sessions_started + EXCLUDED.sessions_started,
+            sessions_completed = r.sessions_completed + EXCLUDED.sessions_completed,
+            compliance_percent = CASE WHEN r.sessions_expected + EXCLUDED.sessions_expected > 0
+                THEN round((r.sessions_completed + EXCLUDED.sessions_completed) * 100.0
+                           / (r.sessions_expected + EXCLUDED.sessions_expected))::integer
+                ELSE 0 END,
+            updated_at = now();
+    ELSE
+        EXECUTE 'UPDATE {table} SET
+                days_recorded = days_recorded + $3,
+                sessions_expected = sessions_expected + $4,
+                sessions_started = sessions_started + $5,
+                sessions_completed = sessions_completed + $6,
+                compliance_percent = CASE WHEN sessions_expected + $4 > 0
+                    THEN round((sessions_completed + $6) * 100.0 / (sessions_expected + $4))::integer ELSE 0 END,
+                updated_at = now()
+            WHERE user_id = $1 AND period_start = date_trunc(''{unit}'', $2)::date'
+            USING p_user_id, p_day, p_days, p_expected, p_started, p_completed;
+        EXECUTE 'DELETE FROM {table} WHERE user_id = $1 AND period_start = date_trunc(''{unit}'', $2)::date
+            AND days_recorded <= 0'
+            USING p_user_id, p_day;
+    END IF;
+"""
+    for table, unit in ROLLUP_TABLES.items()
+) + """
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# An UPDATE that keeps (user_id, date) is a single delta with days unchanged, so it never empties a period.
+TRIGGER_FUNCTION = """
+CREATE FUNCTION daily_records_rollups() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND (OLD.user_id, OLD.date) = (NEW.user_id, NEW.date) THEN
+        IF (OLD.sessions_expected, OLD.sessions_started, OLD.sessions_completed)
+                IS DISTINCT FROM (NEW.sessions_expected, NEW.sessions_started, NEW.sessions_completed) THEN
+            PERFORM history_rollups_apply(NEW.user_id, NEW.date, 0, NEW.sessions_expected - OLD.sessions_expected,
+                                          NEW.sessions_started - OLD.sessions_started,
+                                          NEW.sessions_completed - OLD.sessions_completed);
+        END IF;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM history_rollups_apply(OLD.user_id, OLD.date, -1, -OLD.sessions_expected, -OLD.sessions_started,
+                                      -OLD.sessions_completed);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM history_rollups_apply(NEW.user_id, NEW.date, 1, NEW.sessions_expected, NEW.sessions_started,
+                                      NEW.sessions_completed);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    for table in ROLLUP_TABLES:
+        op.create_table(
+            table,
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("period_start", sa.Date(), nullable=False),
+            sa.Column("days_recorded", sa.Integer(), nullable=False),
+            sa.Column("sessions_expected", sa.Integer(), nullable=False),
+            sa.Column("sessions_started", sa.Integer(), nullable=False),
+            sa.Column("sessions_completed", sa.Integer(), nullable=False),
+            sa.Column("compliance_percent", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("user_id", "period_start"),
+        )
+    op.execute(APPLY_FUNCTION)
+    op.execute(TRIGGER_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER daily_records_rollups "
+        "AFTER INSERT OR UPDATE OR DELETE ON daily_records "
+        "FOR EACH ROW EXECUTE FUNCTION daily_records_rollups()"
+    )
+    for table, unit in ROLLUP_TABLES.items():
+        op.execute(
+            f"INSERT INTO {table} (user_id, period_start, days_recorded, sessions_expected, sessions_started, "
+            "sessions_completed, compliance_percent) "
+            f"SELECT user_id, date_trunc('{unit}', date)::date, count(*), sum(sessions_expected), "
+            "sum(sessions_started), sum(sessions_completed), "
+            "CASE WHEN sum(sessions_expected) > 0 "
+            "THEN round(sum(sessions_completed) * 100.0 / sum(sessions_expected))::integer ELSE 0 END "
+            "FROM daily_records GROUP BY 1, 2"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER daily_records_rollups ON daily_records")
+    op.execute("DROP FUNCTION daily_records_rollups()")
+    op.execute("DROP FUNCTION history_rollups_apply(uuid, date, integer, integer, integer, integer)")
+    for table in reversed(list(ROLLUP_TABLES)):
+        op.drop_table(table)
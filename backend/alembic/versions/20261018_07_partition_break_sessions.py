@@ -0,0 +1,103 @@
+"""partition break_sessions by month
+
+Revision ID: 20261018_07
+Revises: 20261018_06
+Create Date: 2026-10-18 00:00:00
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_07"
+down_revision = "20261018_06"
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = (
+    "id, user_id, date, started_at, completed_at, completed, exercise_ids, "
+    "duration_planned_seconds, duration_actual_seconds, updated_at"
+)
+# Months before this many months ago stay in the DEFAULT partition instead of one table each.
+BACKFILL_MONTHS = 24
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed", sa.Boolean(), nullable=False),
+        sa.Column("exercise_ids", postgresql.ARRAY(sa.String()), nullable=False),
+        sa.Column("duration_planned_seconds", sa.Integer(), nullable=False),
+        sa.Column("duration_actual_seconds", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    ]
+
+
+def upgrade() -> None:
+    # Copy-based conversion: fine at this table's current size, but it holds an exclusive lock on
+    # break_sessions for the whole copy, so run it in a maintenance window.
+    op.execute("ALTER TABLE break_sessions RENAME TO break_sessions_unpartitioned")
+    op.execute("ALTER TABLE break_sessions_unpartitioned RENAME CONSTRAINT break_sessions_pkey TO break_sessions_unpartitioned_pkey")
+    op.execute(
+        "ALTER TABLE break_sessions_unpartitioned RENAME CONSTRAINT break_sessions_user_id_fkey "
+        "TO break_sessions_unpartitioned_user_id_fkey"
+    )
+    op.execute("ALTER INDEX ix_break_sessions_user_id_date_started_at RENAME TO ix_break_sessions_unpartitioned_user_id_date_started_at")
+
+    # The partition key has to be part of the primary key.
+    op.create_table(
+        "break_sessions",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", "date"),
+        postgresql_partition_by="RANGE (date)",
+    )
+    op.create_index(
+        "ix_break_sessions_user_id_date_started_at", "break_sessions", ["user_id", "date", "started_at"], unique=False
+    )
+    # Safety net for dates outside the pre-created months (old offline replays, bad client clocks).
+    op.execute("CREATE TABLE break_sessions_default PARTITION OF break_sessions DEFAULT")
+
+    current = date.today().replace(day=1)
+    oldest = op.get_bind().scalar(sa.text("SELECT min(date) FROM break_sessions_unpartitioned"))
+    month = max(oldest.replace(day=1), _add_months(current, -BACKFILL_MONTHS)) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE break_sessions_y{month.year}m{month.month:02d} PARTITION OF break_sessions "
+            f"FOR VALUES FROM ('{month}') TO ('{end}')"
+        )
+        month = end
+
+    op.execute(f"INSERT INTO break_sessions ({COLUMNS}) SELECT {COLUMNS} FROM break_sessions_unpartitioned")
+    op.drop_table("break_sessions_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE break_sessions RENAME TO break_sessions_partitioned")
+    op.execute("ALTER TABLE break_sessions_partitioned RENAME CONSTRAINT break_sessions_pkey TO break_sessions_partitioned_pkey")
+    op.execute(
+        "ALTER TABLE break_sessions_partitioned RENAME CONSTRAINT break_sessions_user_id_fkey "
+        "TO break_sessions_partitioned_user_id_fkey"
+    )
+    op.execute("ALTER INDEX ix_break_sessions_user_id_date_started_at RENAME TO ix_break_sessions_partitioned_user_id_date_started_at")
+    op.create_table("break_sessions", *_columns(), sa.PrimaryKeyConstraint("id"))
+    op.create_index(
+        "ix_break_sessions_user_id_date_started_at", "break_sessions", ["user_id", "date", "started_at"], unique=False
+    )
+    op.execute(f"INSERT INTO break_sessions ({COLUMNS}) SELECT {COLUMNS} FROM break_sessions_partitioned")
+    # Dropping the parent drops every attached partition; detached ones are left alone.
+    op.drop_table("break_sessions_partitioned")
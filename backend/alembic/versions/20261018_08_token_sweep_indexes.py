@@ -0,0 +1,41 @@
+"""token sweep indexes
+
+Revision ID: 20261018_08
+Revises: 20261018_07
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_08"
+down_revision = "20261018_07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Let the token sweeper find dead rows without scanning the whole table on every batch.
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], unique=False)
+    op.create_index(
+        "ix_refresh_tokens_revoked_at",
+        "refresh_tokens",
+        ["revoked_at"],
+        unique=False,
+        postgresql_where=sa.text("revoked_at IS NOT NULL"),
+    )
+    op.create_index("ix_password_reset_tokens_expires_at", "password_reset_tokens", ["expires_at"], unique=False)
+    op.create_index(
+        "ix_password_reset_tokens_used_at",
+        "password_reset_tokens",
+        ["used_at"],
+        unique=False,
+        postgresql_where=sa.text("used_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_password_reset_tokens_used_at", table_name="password_reset_tokens")
+    op.drop_index("ix_password_reset_tokens_expires_at", table_name="password_reset_tokens")
+    op.drop_index("ix_refresh_tokens_revoked_at", table_name="refresh_tokens")
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
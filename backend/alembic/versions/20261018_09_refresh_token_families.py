@@ -0,0 +1,28 @@
+"""refresh token families
+
+Revision ID: 20261018_09
+Revises: 20261018_08
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261018_09"
+down_revision = "20261018_08"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing tokens start a family of their own.
+    op.add_column("refresh_tokens", sa.Column("family_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.execute("UPDATE refresh_tokens SET family_id = id")
+    op.alter_column("refresh_tokens", "family_id", nullable=False)
+    op.create_index("ix_refresh_tokens_family_id", "refresh_tokens", ["family_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_family_id", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "family_id")
@@ -0,0 +1,33 @@
+"""break session client ids
+
+Revision ID: 20261018_11
+Revises: 20261018_10
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_11"
+down_revision = "20261018_10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("break_sessions", sa.Column("client_id", sa.String(length=64), nullable=True))
+    # Makes offline batch replays idempotent (INSERT ... ON CONFLICT DO NOTHING). A unique index on
+    # a partitioned table has to include the partition key; a replayed item keeps its date, so
+    # (user_id, date, client_id) is as strict as (user_id, client_id). Sessions created one by one
+    # have no client_id and never conflict (NULLs are distinct).
+    op.create_index(
+        "uq_break_sessions_user_id_date_client_id",
+        "break_sessions",
+        ["user_id", "date", "client_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_break_sessions_user_id_date_client_id", table_name="break_sessions")
+    op.drop_column("break_sessions", "client_id")
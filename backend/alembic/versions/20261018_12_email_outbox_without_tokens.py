@@ -0,0 +1,33 @@
+"""email outbox without reset tokens
+
+Revision ID: 20261018_12
+Revises: 20261018_11
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_12"
+down_revision = "20261018_11"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Reset emails used to be queued with the full link, i.e. a usable token in plaintext. Drop
+    # them (sent or not, nothing about them is worth keeping); affected users can ask again.
+    op.execute("DELETE FROM email_outbox WHERE template = 'password_reset' AND payload ? 'reset_link'")
+    # For the token sweeper's purge of failed emails.
+    op.create_index(
+        "ix_email_outbox_failed_at",
+        "email_outbox",
+        ["failed_at"],
+        unique=False,
+        postgresql_where=sa.text("failed_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    # The deleted rows cannot come back; only the index is undone.
+    op.drop_index("ix_email_outbox_failed_at", table_name="email_outbox")
@@ -0,0 +1,92 @@
+"""compliance rounded half to even
+
+Revision ID: 20261018_13
+Revises: 20261018_12
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+
+
+revision = "20261018_13"
+down_revision = "20261018_12"
+branch_labels = None
+depends_on = None
+
+
+ROLLUP_TABLES = {"weekly_records": "week", "monthly_records": "month", "yearly_records": "year"}
+TABLES = ("daily_records", *ROLLUP_TABLES)
+
+
+# Before the SQL upserts, compliance was Python's round((completed / expected) * 100): float division
+# and round half to even (1 of 8 -> 12). round(numeric) rounds half away from zero (1 of 8 -> 13);
+# float8 arithmetic and round(float8) give back exactly the Python values.
+def half_even(completed: str, expected: str) -> str:
+    return f"CASE WHEN {expected} > 0 THEN round(({completed})::float8 / ({expected})::float8 * 100)::integer ELSE 0 END"
+
+
+def half_up(completed: str, expected: str) -> str:
+    return f"CASE WHEN {expected} > 0 THEN round(({completed}) * 100.0 / ({expected}))::integer ELSE 0 END"
+
+
+# history_rollups_apply() of 20261018_06 with the rounding as a parameter.
+def apply_function(percent) -> str:
+    return """
+CREATE OR REPLACE FUNCTION history_rollups_apply(
+    p_user_id uuid, p_day date, p_days integer, p_expected integer, p_started integer, p_completed integer
+) RETURNS void AS $$
+BEGIN
+""" + "".join(
+        f"""
+    IF p_days >= 0 THEN
+        INSERT INTO {table} AS r (user_id, period_start, days_recorded, sessions_expected, sessions_started,
+                                 sessions_completed, compliance_percent, updated_at)
+        VALUES (p_user_id, date_trunc('{unit}', p_day)::date, p_days, p_expected, p_started, p_completed,
+                {percent("p_completed", "p_expected")}, now())
+        ON CONFLICT (user_id, period_start) DO UPDATE SET
+            days_recorded = r.days_recorded + EXCLUDED.days_recorded,
+            sessions_expected = r.sessions_expected + EXCLUDED.sessions_expected,
+            sessions_started = r.sessions_started + EXCLUDED.sessions_started,
+            sessions_completed = r.sessions_completed + EXCLUDED.sessions_completed,
+            compliance_percent = {percent(
+                "r.sessions_completed + EXCLUDED.sessions_completed",
+                "r.sessions_expected + EXCLUDED.sessions_expected",
+            )},
+            updated_at = now();
+    ELSE
+        EXECUTE 'UPDATE {table} SET
+                days_recorded = days_recorded + $3,
+                sessions_expected = sessions_expected + $4,
+                sessions_started = sessions_started + $5,
+                sessions_completed = sessions_completed + $6,
+                compliance_percent = {percent("sessions_completed + $6", "sessions_expected + $4")},
+                updated_at = now()
+            WHERE user_id = $1 AND period_start = date_trunc(''{unit}'', $2)::date'
+            USING p_user_id, p_day, p_days, p_expected, p_started, p_completed;
+        EXECUTE 'DELETE FROM {table} WHERE user_id = $1 AND period_start = date_trunc(''{unit}'', $2)::date
+            AND days_recorded <= 0'
+            USING p_user_id, p_day;
+    END IF;
+"""
+        for table, unit in ROLLUP_TABLES.items()
+    ) + """
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _recompute(percent) -> None:
+    # Only the rows whose value changes (the exact halves); on daily_records the stats trigger
+    # moves compliance_sum and the streaks along with them.
+    for table in TABLES:
+        value = percent("sessions_completed", "sessions_expected")
+        op.execute(f"UPDATE {table} SET compliance_percent = {value} WHERE compliance_percent <> {value}")
+
+
+def upgrade() -> None:
+    op.execute(apply_function(half_even))
+    _recompute(half_even)
+
+
+def downgrade() -> None:
+    op.execute(apply_function(half_up))
+    _recompute(half_up)
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+from uuid import UUID
+
+import psycopg
+from sqlalchemy import func, make_url, select
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "auth_cache_invalidate"
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any | None:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Any, value: Any, expires_in: float | None = None) -> None:
+        ttl = self.ttl_seconds if expires_in is None else min(self.ttl_seconds, expires_in)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Any], bool]) -> None:
+        with self._lock:
+            for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_cache_entries = settings.auth_cache_max_entries if settings.auth_cache_enabled else 0
+# Verified access token -> decoded payload. Entries never outlive the token's own exp.
+token_cache = TTLCache(_cache_entries, settings.auth_cache_ttl_seconds)
+# user_id -> (is_active, email_verified)
+user_cache = TTLCache(_cache_entries, settings.auth_cache_ttl_seconds)
+
+
+def get_token_payload(token: str) -> dict | None:
+    payload = token_cache.get(token)
+    if payload is not None and payload.get("exp", 0) <= time.time():
+        token_cache.pop(token)
+        return None
+    return payload
+
+
+def set_token_payload(token: str, payload: dict) -> None:
+    token_cache.set(token, payload, expires_in=payload.get("exp", 0) - time.time())
+
+
+def invalidate_user(user_id: UUID) -> None:
+    user_cache.pop(user_id)
+    # Payloads are keyed by token, so the user's are found by subject. Invalidations are rare
+    # (password reset, deactivation); a scan of the bounded cache is cheap next to them.
+    subject = str(user_id)
+    token_cache.pop_where(lambda payload: payload.get("sub") == subject)
+
+
+def clear() -> None:
+    token_cache.clear()
+    user_cache.clear()
+
+
+def invalidation_statement(user_id: UUID):
+    # Executed inside the writing transaction; Postgres only delivers it on commit.
+    return select(func.pg_notify(NOTIFY_CHANNEL, str(user_id)))
+
+
+def stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
+class InvalidationListener:
+    """LISTENs for user invalidations published by any worker and evicts local entries."""
+
+    def __init__(self, database_url: str):
+        self._conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="auth-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self._conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    # Anything published while we were disconnected is lost.
+                    clear()
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            try:
+                                invalidate_user(UUID(notify.payload))
+                            except ValueError:
+                                logger.warning("Payload invalido en %s: %r", NOTIFY_CHANNEL, notify.payload)
+            except Exception:
+                logger.exception("Listener de auth cache desconectado, reintentando")
+                clear()
+                self._stop.wait(5)
+
+
+# LISTEN needs a session connection; a transaction-pooling PgBouncer would drop it.
+invalidation_listener = InvalidationListener(settings.database_direct_url or settings.database_url)
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     refresh_secret: str
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 14
+    refresh_reuse_grace_seconds: int = 10
     frontend_origin: str
     frontend_reset_url: str
     refresh_cookie_name: str = "pausas_refresh_token"
@@ -18,6 +19,82 @@ class Settings(BaseSettings):
     smtp_user: str | None = None
     smtp_password: str | None = None
     smtp_from: str = "no-reply@pausasactivas.local"
+    smtp_starttls: bool = True
+    smtp_timeout_seconds: float = 10.0
+    smtp_idle_seconds: int = 60
+    email_outbox_worker_enabled: bool = True
+    email_outbox_poll_seconds: float = 2.0
+    email_outbox_batch_size: int = 50
+    email_outbox_lease_seconds: int = 300
+    email_outbox_max_attempts: int = 8
+    email_outbox_retry_base_seconds: int = 30
+    email_outbox_retry_max_seconds: int = 3600
+    email_outbox_failed_retention_hours: int = 72
+    db_async_mode: bool = False
+    # Per engine (sync and async). Waiting longer than db_pool_timeout_seconds for a connection
+    # answers 503 + Retry-After instead of queueing the request.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 5.0
+    db_pool_retry_after_seconds: int = 2
+    db_pool_recycle_seconds: int = -1
+    db_pool_pre_ping: bool = True
+    # psycopg prepares a statement server-side after this many runs on a connection; -1 disables.
+    db_prepare_threshold: int = 5
+    # Transaction-pooling PgBouncer in DATABASE_URL: no prepared statements, and session-scoped
+    # work (LISTEN, advisory locks, migrations) goes to DATABASE_DIRECT_URL.
+    db_pgbouncer: bool = False
+    database_direct_url: str | None = None
+    # Read replica for the history/settings GETs. A user who wrote in the last
+    # db_replica_read_your_writes_seconds keeps reading from the primary.
+    database_replica_url: str | None = None
+    db_replica_read_your_writes_seconds: float = 5.0
+    db_replica_tracked_users: int = 10000
+    password_pool_workers: int = 2
+    password_pool_max_pending: int = 32
+    password_pool_retry_after_seconds: int = 2
+    # passlib's argon2 defaults; scripts/calibrate_argon2.py tunes them to a latency target.
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    auth_cache_enabled: bool = True
+    auth_cache_max_entries: int = 10000
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_listen: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_database_url: str | None = None
+    rate_limit_sweep_interval_seconds: int = 60
+    rate_limit_routes: dict[str, str] = {"/auth/": "30/60"}
+    history_batch_max_items: int = 1000
+    history_batch_copy_threshold: int = 200
+    history_page_size: int = 500
+    history_page_max_size: int = 1000
+    history_stream_batch_size: int = 500
+    history_sql_json: bool = True
+    history_stats_max_days: int = 3660
+    token_sweeper_enabled: bool = True
+    token_sweeper_interval_seconds: int = 3600
+    token_sweeper_batch_size: int = 1000
+    token_sweeper_pause_seconds: float = 0.1
+    token_sweeper_revoked_grace_hours: int = 24
+    metrics_enabled: bool = True
+    metrics_multiproc_dir: str | None = None
+    metrics_flush_seconds: float = 1.0
+    metrics_secret: str | None = None
+    profiling_enabled: bool = False
+    profiling_secret: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 5.0
+    profiling_dir: str = "/tmp/pausas-profiles"
+    profiling_max_files: int = 50
+    memory_diagnostics_enabled: bool = False
+    memory_tracemalloc_frames: int = 10
+    memory_sample_interval_seconds: float = 60.0
+    memory_samples_max: int = 1440
+    memory_snapshots_max: int = 4
+    sql_instrumentation_enabled: bool = True
+    sql_slow_query_ms: float = 200.0
+    sql_n_plus_one_threshold: int = 5
 
 
 settings = Settings()
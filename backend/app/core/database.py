@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+from app.core import metrics, sql_stats
 from app.core.config import settings
 
 
@@ -8,9 +13,122 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+class _TimedCheckout:
+    # Pool events only fire once a connection is handed out, so the wait is timed around _do_get.
+    engine_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.registry.inc(metrics.DB_POOL_TIMEOUTS, (self.engine_label,))
+            raise
+        finally:
+            metrics.registry.observe(metrics.DB_POOL_WAIT, (self.engine_label,), time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+class TimedReplicaQueuePool(TimedQueuePool):
+    engine_label = "replica"
+
+
+class TimedAsyncReplicaQueuePool(TimedAsyncQueuePool):
+    engine_label = "async-replica"
+
+
+def connect_args() -> dict:
+    # Only statements that ran prepare_threshold times on a connection get prepared, i.e. the hot
+    # ones. A transaction-pooling PgBouncer may send the next execute to a server connection that
+    # never saw the PREPARE.
+    if settings.db_pgbouncer or settings.db_prepare_threshold < 0:
+        return {"prepare_threshold": None}
+    return {"prepare_threshold": settings.db_prepare_threshold}
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        # A checkout that waits this long raises sqlalchemy.exc.TimeoutError, answered with 503.
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args(),
+    }
+
+
+engine = create_engine(
+    settings.database_url,
+    poolclass=TimedQueuePool if settings.metrics_enabled else QueuePool,
+    **pool_options(),
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async mode (DB_ASYNC_MODE=true): psycopg 3 speaks asyncio with the same URL.
+# expire_on_commit=False because lazy refreshes after commit are not allowed in async.
+async_engine = create_async_engine(
+    settings.database_url,
+    poolclass=TimedAsyncQueuePool if settings.metrics_enabled else AsyncAdaptedQueuePool,
+    **pool_options(),
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read replica (DATABASE_REPLICA_URL) for the read-only GET dependencies in app.deps.
+replica_engine = None
+async_replica_engine = None
+ReplicaSessionLocal = None
+AsyncReplicaSessionLocal = None
+if settings.database_replica_url:
+    replica_engine = create_engine(
+        settings.database_replica_url,
+        poolclass=TimedReplicaQueuePool if settings.metrics_enabled else QueuePool,
+        **pool_options(),
+    )
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+    async_replica_engine = create_async_engine(
+        settings.database_replica_url,
+        poolclass=TimedAsyncReplicaQueuePool if settings.metrics_enabled else AsyncAdaptedQueuePool,
+        **pool_options(),
+    )
+    AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+
+# Session-scoped work (the token sweeper's advisory lock) needs a server session of its own, which a
+# transaction-pooling PgBouncer does not keep between transactions.
+direct_engine = (
+    create_engine(settings.database_direct_url, pool_size=1, max_overflow=1, pool_pre_ping=True)
+    if settings.database_direct_url
+    else engine
+)
+
+if settings.sql_instrumentation_enabled:
+    sql_stats.instrument(engine)
+    sql_stats.instrument(async_engine.sync_engine)
+    if replica_engine is not None:
+        sql_stats.instrument(replica_engine)
+        sql_stats.instrument(async_replica_engine.sync_engine)
+
+
+def _pool_samples():
+    pools = [("sync", engine.pool), ("async", async_engine.pool)]
+    if replica_engine is not None:
+        pools += [("replica", replica_engine.pool), ("async-replica", async_replica_engine.pool)]
+    for label, pool in pools:
+        yield metrics.DB_POOL_CHECKED_OUT, (label,), pool.checkedout()
+        # overflow() counts up from -pool_size until the pool is full.
+        yield metrics.DB_POOL_OVERFLOW, (label,), max(0, pool.overflow())
+        yield metrics.DB_POOL_SIZE, (label,), pool.size()
+
+
+metrics.registry.add_collector(_pool_samples)
+
 
 def get_db():
     db = SessionLocal()
@@ -18,3 +136,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
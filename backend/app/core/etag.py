@@ -0,0 +1,40 @@
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import func, literal_column
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def range_version():
+    """Columns of a range validator for ETags, for a select over one table: the row count catches
+    deletes, the sum of xmin (the transaction that wrote each row's current version) changes with
+    every committed insert or update, whatever order concurrent transactions commit in; a timestamp
+    from now() is the transaction's start and can go backwards across commits. A physical replica
+    has the same xmin values, so primary and replica agree on the ETag."""
+    return func.count(), func.sum(literal_column("xmin::text::bigint"))
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag in candidates
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,150 @@
+import gc
+import logging
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from itertools import count
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by tracemalloc itself or by the import machinery are noise in every report.
+_NOISE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _sample() -> dict:
+    stats = gc.get_stats()
+    traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+    return {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "rssBytes": rss_bytes(),
+        "tracedBytes": traced,
+        "tracedPeakBytes": traced_peak,
+        "gcCounts": list(gc.get_count()),
+        "gcCollections": [gen["collections"] for gen in stats],
+        "gcCollected": [gen["collected"] for gen in stats],
+        "gcUncollectable": [gen["uncollectable"] for gen in stats],
+    }
+
+
+def _site(trace_stat, key_type: str) -> str:
+    frames = trace_stat.traceback if key_type == "traceback" else trace_stat.traceback[:1]
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(frames))
+
+
+class MemoryMonitor:
+    """Ring buffer of RSS/GC samples plus tracemalloc snapshots on demand.
+
+    Nothing runs until start() (lifespan with MEMORY_DIAGNOSTICS_ENABLED=true). Even then
+    tracemalloc, which slows every allocation down while it traces, only starts with the first
+    snapshot and stops again with stop_tracing(); the first snapshot is the baseline to diff
+    against.
+    """
+
+    def __init__(self, interval_seconds: float, max_samples: int, max_snapshots: int, frames: int):
+        self.interval_seconds = interval_seconds
+        self.frames = frames
+        self.max_snapshots = max_snapshots
+        self.samples: deque[dict] = deque(maxlen=max_samples)
+        self._snapshots: OrderedDict[int, tuple[str, tracemalloc.Snapshot]] = OrderedDict()
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.stop_tracing()
+
+    def stop_tracing(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+        tracemalloc.stop()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.samples.append(_sample())
+            except Exception:
+                logger.exception("Fallo la muestra de memoria")
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def take_snapshot(self) -> tuple[int, str, tracemalloc.Snapshot]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE)
+        created_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            snapshot_id = next(self._ids)
+            self._snapshots[snapshot_id] = (created_at, snapshot)
+            # Snapshots hold every traced block; keep only the newest few.
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot_id, created_at, snapshot
+
+    def get_snapshot(self, snapshot_id: int) -> tuple[str, tracemalloc.Snapshot] | None:
+        with self._lock:
+            return self._snapshots.get(snapshot_id)
+
+    def snapshot_ids(self) -> list[tuple[int, str]]:
+        with self._lock:
+            return [(snapshot_id, created_at) for snapshot_id, (created_at, _) in self._snapshots.items()]
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, key_type: str, limit: int) -> list[dict]:
+    return [
+        {"site": _site(stat, key_type), "sizeBytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics(key_type)[:limit]
+    ]
+
+
+def allocation_diff(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, key_type: str, limit: int) -> list[dict]:
+    """Sites ordered by absolute growth between the two snapshots."""
+    return [
+        {
+            "site": _site(stat, key_type),
+            "sizeBytes": stat.size,
+            "sizeDiffBytes": stat.size_diff,
+            "count": stat.count,
+            "countDiff": stat.count_diff,
+        }
+        for stat in new.compare_to(old, key_type)[:limit]
+    ]
+
+
+memory_monitor = MemoryMonitor(
+    interval_seconds=settings.memory_sample_interval_seconds,
+    max_samples=settings.memory_samples_max,
+    max_snapshots=settings.memory_snapshots_max,
+    frames=settings.memory_tracemalloc_frames,
+)
@@ -0,0 +1,381 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Fixed buckets: one bisect and two list updates per observation, no per-sample allocation.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARGON2_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5, 5.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+@dataclass(frozen=True, slots=True)
+class Metric:
+    name: str
+    kind: str  # counter | gauge | histogram
+    help: str
+    labels: tuple[str, ...] = ()
+    buckets: tuple[float, ...] = ()
+
+
+METRICS: dict[str, Metric] = {}
+
+
+def _metric(*args, **kwargs) -> Metric:
+    metric = Metric(*args, **kwargs)
+    METRICS[metric.name] = metric
+    return metric
+
+
+HTTP_REQUESTS = _metric(
+    "pausas_http_requests_total", "counter", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_DURATION = _metric(
+    "pausas_http_request_duration_seconds",
+    "histogram",
+    "Time from request start until the app returns, by route template.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = _metric("pausas_http_requests_in_flight", "gauge", "HTTP requests being handled.")
+THREADPOOL_BUSY = _metric("pausas_threadpool_busy_threads", "gauge", "Threadpool tokens in use (sync endpoints and dependencies).")
+THREADPOOL_LIMIT = _metric("pausas_threadpool_max_threads", "gauge", "Threadpool size.")
+DB_POOL_CHECKED_OUT = _metric("pausas_db_pool_checked_out", "gauge", "Connections checked out of the pool.", ("engine",))
+DB_POOL_OVERFLOW = _metric("pausas_db_pool_overflow", "gauge", "Connections open beyond pool_size.", ("engine",))
+DB_POOL_SIZE = _metric("pausas_db_pool_size", "gauge", "Configured pool_size.", ("engine",))
+DB_POOL_WAIT = _metric(
+    "pausas_db_pool_wait_seconds",
+    "histogram",
+    "Time to get a connection from the pool, including connect when the pool grows.",
+    ("engine",),
+    POOL_WAIT_BUCKETS,
+)
+DB_POOL_TIMEOUTS = _metric(
+    "pausas_db_pool_timeouts_total",
+    "counter",
+    "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS (answered 503).",
+    ("engine",),
+)
+ARGON2_DURATION = _metric(
+    "pausas_argon2_seconds", "histogram", "Argon2 run time inside the password pool.", ("op",), ARGON2_BUCKETS
+)
+ARGON2_QUEUE_WAIT = _metric(
+    "pausas_argon2_queue_wait_seconds",
+    "histogram",
+    "Time an argon2 job waited for a password pool worker.",
+    ("op",),
+    ARGON2_BUCKETS,
+)
+PASSWORD_POOL_PENDING = _metric("pausas_password_pool_pending", "gauge", "Argon2 jobs admitted and not finished.")
+PASSWORD_POOL_REJECTIONS = _metric(
+    "pausas_password_pool_rejections_total", "counter", "Requests answered 503 because the password pool was full."
+)
+RATE_LIMIT_REJECTIONS = _metric("pausas_rate_limit_rejections_total", "counter", "Requests answered 429 by the rate limiter.")
+SQL_SLOW_QUERIES = _metric(
+    "pausas_sql_slow_queries_total", "counter", "Statements slower than SQL_SLOW_QUERY_MS.", ("route",)
+)
+SQL_N_PLUS_ONE = _metric(
+    "pausas_sql_n_plus_one_total",
+    "counter",
+    "Requests that repeated one statement shape SQL_N_PLUS_ONE_THRESHOLD times or more.",
+    ("route",),
+)
+
+Sample = tuple[Metric, tuple, float]
+
+
+class MetricsRegistry:
+    """Per-process counters and histograms, plus collectors read at scrape time for gauges and
+    counters that already live elsewhere (pool sizes, rejection counts)."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self._counters: dict[tuple[str, tuple], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._histograms: dict[tuple[str, tuple], list] = {}
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, metric: Metric, labels: tuple = (), amount: float = 1.0) -> None:
+        key = (metric.name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def observe(self, metric: Metric, labels: tuple, value: float) -> None:
+        key = (metric.name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(metric.buckets) + 1) + [0.0]
+            series[bisect_left(metric.buckets, value)] += 1
+            series[-1] += value
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        counters, gauges = [], []
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception:
+                logger.exception("Fallo un colector de metricas")
+                continue
+            for metric, labels, value in samples:
+                (gauges if metric.kind == "gauge" else counters).append([metric.name, list(labels), value])
+        with self._lock:
+            counters += [[name, list(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [[name, list(labels), list(series)] for (name, labels), series in self._histograms.items()]
+        return {"pid": os.getpid(), "counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+registry = MetricsRegistry()
+
+_threadpool_limiter = None
+
+
+def watch_threadpool(limiter) -> None:
+    """Call from the event loop (lifespan) with anyio's default thread limiter."""
+    global _threadpool_limiter
+    _threadpool_limiter = limiter
+
+
+def _process_samples() -> Iterable[Sample]:
+    yield HTTP_IN_FLIGHT, (), registry.in_flight
+    if _threadpool_limiter is not None:
+        yield THREADPOOL_BUSY, (), _threadpool_limiter.borrowed_tokens
+        yield THREADPOOL_LIMIT, (), _threadpool_limiter.total_tokens
+
+
+registry.add_collector(_process_samples)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware task/stream overhead) for request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # Only touched on the event loop thread, no lock needed.
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            # The route template, not the raw path, keeps label cardinality bounded.
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            registry.inc(HTTP_REQUESTS, (scope["method"], path, str(status)))
+            registry.observe(HTTP_DURATION, (scope["method"], path), elapsed)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsExporter:
+    """With METRICS_MULTIPROC_DIR set, every worker writes its snapshot to <dir>/<pid>.json and
+    /metrics sums all of them, so whichever worker answers the scrape reports the whole server.
+
+    The counters and histograms of exited workers are folded into <dir>/retired.json and their
+    files deleted, so totals do not go backwards and the directory does not grow with every
+    restart; their gauges are dropped.
+    """
+
+    def __init__(self, directory: str | None, interval_seconds: float):
+        self.directory = Path(directory) if directory else None
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Scrapes do file I/O and may wait on the directory lock: off the event loop, and outside
+        # anyio's threadpool so they still get through while the endpoints saturate it.
+        self._scraper = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metrics-scrape")
+
+    def start(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # A file with our pid was left by an earlier process that got the same pid.
+        with self._locked():
+            self._retire(stale_pid=os.getpid())
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self.write()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.write()
+            except Exception:
+                logger.exception("No se pudieron exportar las metricas del worker")
+
+    def write(self) -> dict:
+        snapshot = registry.snapshot()
+        if self.directory is not None:
+            _write_json(self.directory / f"{snapshot['pid']}.json", snapshot)
+        return snapshot
+
+    async def scrape(self) -> str:
+        """The /metrics body, built on the scrape thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._scraper, lambda: render(self.collect()))
+
+    def collect(self) -> list[dict]:
+        own = self.write()
+        if self.directory is None:
+            return [own]
+        # Reading under the lock too: otherwise a scrape could see both a dead worker's file and
+        # the retired.json that already includes it.
+        with self._locked():
+            self._retire()
+            snapshots = [own]
+            for path in self.directory.glob("*.json"):
+                if path.stem == str(own["pid"]):
+                    continue
+                snapshot = _read_json(path)
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return snapshots
+
+    @contextmanager
+    def _locked(self):
+        # Workers scrape concurrently: the lock keeps two of them from folding the same file twice
+        # or overwriting each other's retired.json.
+        with open(self.directory / ".retire.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _retire(self, stale_pid: int | None = None) -> None:
+        """Call with the directory locked."""
+        dead = [
+            path
+            for path in self.directory.glob("*.json")
+            if path.stem.isdigit() and (int(path.stem) == stale_pid or not _alive(int(path.stem)))
+        ]
+        snapshots = [_read_json(path) for path in dead]
+        if all(snapshot is None for snapshot in snapshots):
+            return
+        retired_path = self.directory / "retired.json"
+        snapshots.append(_read_json(retired_path))
+        # Gauges of an exited worker describe nothing anymore; only its totals are kept.
+        scalars, histograms = _sum({**snapshot, "gauges": []} for snapshot in snapshots if snapshot is not None)
+        retired = {
+            "pid": None,
+            "counters": [[name, list(labels), value] for (name, labels), value in scalars.items()],
+            "gauges": [],
+            "histograms": [[name, list(labels), series] for (name, labels), series in histograms.items()],
+        }
+        _write_json(retired_path, retired)
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+exporter = MetricsExporter(settings.metrics_multiproc_dir, settings.metrics_flush_seconds)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sum(snapshots: Iterable[dict]) -> tuple[dict[tuple[str, tuple], float], dict[tuple[str, tuple], list]]:
+    scalars: dict[tuple[str, tuple], float] = {}
+    histograms: dict[tuple[str, tuple], list] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"] + snapshot["gauges"]:
+            key = (name, tuple(labels))
+            scalars[key] = scalars.get(key, 0.0) + value
+        for name, labels, series in snapshot["histograms"]:
+            key = (name, tuple(labels))
+            current = histograms.get(key)
+            histograms[key] = list(series) if current is None else [a + b for a, b in zip(current, series)]
+    return scalars, histograms
+
+
+def render(snapshots: list[dict]) -> str:
+    """Text exposition format 0.0.4 of the summed snapshots."""
+    scalars, histograms = _sum(snapshots)
+
+    lines = []
+    for metric in METRICS.values():
+        source = histograms if metric.kind == "histogram" else scalars
+        keys = sorted(key for key in source if key[0] == metric.name)
+        if not keys:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if metric.kind != "histogram":
+            for key in keys:
+                lines.append(f"{metric.name}{_labels(metric.labels, key[1])} {_number(scalars[key])}")
+            continue
+        for key in keys:
+            series = histograms[key]
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{metric.name}_bucket{_labels(metric.labels + ('le',), key[1] + (le,))} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labels, key[1])} {_number(series[-1])}")
+            lines.append(f"{metric.name}_count{_labels(metric.labels, key[1])} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,154 @@
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import jwt
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import decode_profile_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_NAME = re.compile(r"^[0-9]{8}T[0-9]{6}_[0-9]{6}_[A-Z]+_[A-Za-z0-9_.-]+_[0-9]+ms\.collapsed$")
+
+# Frames of threads that are parked, not working: idle threadpool workers, background loops
+# waiting on an Event, the event loop waiting in epoll and the auth cache LISTEN connection.
+IDLE_FRAMES = {
+    "threading.Condition.wait",
+    "threading.Event.wait",
+    "queue.Queue.get",
+    "selectors.EpollSelector.select",
+    "selectors.PollSelector.select",
+    "selectors.SelectSelector.select",
+    "psycopg.connection.Connection.notifies",
+}
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+def _is_idle(frame) -> bool:
+    # The leaf or its caller: notifies() parks inside Connection.wait(), like any query does.
+    return _frame_name(frame) in IDLE_FRAMES or (frame.f_back is not None and _frame_name(frame.f_back) in IDLE_FRAMES)
+
+
+class StackSampler:
+    """Wall-clock sampling profiler built on sys._current_frames().
+
+    Samples every busy thread of the worker process while it runs, so sync endpoints running in
+    the threadpool are covered as well as the event loop; requests that overlap the profiled one
+    show up in it too. Output is collapsed stacks ("thread;outer;...;inner count"), readable by
+    speedscope and flamegraph.pl.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Signals the sampling thread and returns at once; join() waits for it to finish."""
+        self._stop.set()
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_dir() -> Path:
+    return Path(settings.profiling_dir)
+
+
+def list_profiles() -> list[Path]:
+    """Newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return sorted((path for path in directory.iterdir() if PROFILE_NAME.match(path.name)), reverse=True)
+
+
+def _write_profile(method: str, path: str, elapsed: float, sampler: StackSampler) -> None:
+    sampler.join()
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    slug = re.sub(r"[^A-Za-z0-9.-]+", "_", path.strip("/")) or "root"
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"_{int(now % 1 * 1_000_000):06d}"
+    (directory / f"{stamp}_{method}_{slug[:80]}_{round(elapsed * 1000)}ms.collapsed").write_text(sampler.collapsed())
+    # Ring directory: keep only the newest PROFILING_MAX_FILES.
+    for old in list_profiles()[settings.profiling_max_files:]:
+        old.unlink(missing_ok=True)
+
+
+def _requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name.decode("latin-1") == PROFILE_HEADER:
+            try:
+                decode_profile_token(value.decode("latin-1"))
+                return True
+            except jwt.PyJWTError:
+                logger.warning("Token de perfilado invalido en %s", scope["path"])
+                return False
+    return False
+
+
+class ProfilingMiddleware:
+    """Profiles a request when it carries a valid X-Profile-Token or falls in
+    PROFILING_SAMPLE_RATE. Only installed with PROFILING_ENABLED=true."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+        sampled = settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+        if not (sampled or (settings.profiling_secret and _requested(scope))):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(settings.profiling_interval_ms / 1000)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Stopped here even if the request was cancelled; joining the thread (up to one
+            # interval) and the file I/O run in the threadpool, not on the event loop.
+            sampler.stop()
+            try:
+                await run_in_threadpool(_write_profile, scope["method"], scope["path"], elapsed, sampler)
+            except OSError:
+                logger.exception("No se pudo guardar el perfil de %s", scope["path"])
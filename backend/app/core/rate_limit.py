@@ -0,0 +1,130 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import connect_args
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitRule:
+    limit: int
+    period_seconds: float
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period_seconds / self.limit
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimitRule":
+        limit, period = value.split("/", 1)
+        return cls(limit=int(limit), period_seconds=float(period))
+
+
+def parse_rules(raw: dict[str, str]) -> list[tuple[str, RateLimitRule]]:
+    # Longest prefix first so "/auth/login" wins over "/auth/".
+    rules = [(prefix, RateLimitRule.parse(value)) for prefix, value in raw.items()]
+    return sorted(rules, key=lambda item: len(item[0]), reverse=True)
+
+
+def match_rule(rules: list[tuple[str, RateLimitRule]], path: str) -> RateLimitRule | None:
+    for prefix, rule in rules:
+        if path.startswith(prefix):
+            return rule
+    return None
+
+
+class MemoryRateLimiter:
+    """GCRA per key: one float (theoretical arrival time) per client instead of a deque."""
+
+    blocking = False
+
+    def __init__(self, sweep_interval_seconds: float):
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.rejected = 0
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def hit(self, key: str, rule: RateLimitRule) -> float | None:
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            new_tat = max(self._tats.get(key, now), now) + rule.emission_interval
+            if new_tat - now > rule.period_seconds:
+                self.rejected += 1
+                return new_tat - rule.period_seconds - now
+            self._tats[key] = new_tat
+            return None
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        self._last_sweep = now
+        # A key whose TAT is in the past behaves exactly like an unseen key.
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+def _hit_statement(max_fn: str):
+    # Allowed requests advance the key's TAT; rejected ones leave the row untouched and return nothing.
+    return text(
+        "INSERT INTO rate_limits AS r (key, tat) VALUES (:key, :now + :interval) "
+        f"ON CONFLICT (key) DO UPDATE SET tat = {max_fn}(r.tat, :now) + :interval "
+        f"WHERE {max_fn}(r.tat, :now) + :interval - :now <= :period "
+        "RETURNING tat"
+    )
+
+
+class DatabaseRateLimiter:
+    """GCRA shared by every worker through one table row per key.
+
+    On Postgres the table is UNLOGGED (see the rate_limits migration); a SQLite file URL
+    works as a single-host stand-in and the table is created on first use.
+    """
+
+    blocking = True
+
+    def __init__(self, engine: Engine, sweep_interval_seconds: float):
+        self.engine = engine
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.rejected = 0
+        self._last_sweep = time.time()
+        # GREATEST() on Postgres, scalar MAX() on SQLite.
+        self._hit = _hit_statement("MAX" if engine.dialect.name == "sqlite" else "GREATEST")
+        if engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                conn.execute(text("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)"))
+
+    def hit(self, key: str, rule: RateLimitRule) -> float | None:
+        now = time.time()
+        params = {"key": key, "now": now, "interval": rule.emission_interval, "period": rule.period_seconds}
+        with self.engine.begin() as conn:
+            if now - self._last_sweep >= self.sweep_interval_seconds:
+                self._last_sweep = now
+                conn.execute(text("DELETE FROM rate_limits WHERE tat < :now"), {"now": now})
+            if conn.execute(self._hit, params).first() is not None:
+                return None
+            tat = conn.execute(text("SELECT tat FROM rate_limits WHERE key = :key"), {"key": key}).scalar_one()
+        self.rejected += 1
+        return max(0.0, tat + rule.emission_interval - rule.period_seconds - now)
+
+
+def build_rate_limiter() -> MemoryRateLimiter | DatabaseRateLimiter:
+    if settings.rate_limit_backend == "database":
+        engine = create_engine(
+            settings.rate_limit_database_url or settings.database_url, pool_pre_ping=True, connect_args=connect_args()
+        )
+        return DatabaseRateLimiter(engine, settings.rate_limit_sweep_interval_seconds)
+    return MemoryRateLimiter(settings.rate_limit_sweep_interval_seconds)
+
+
+rate_limit_rules = parse_rules(settings.rate_limit_routes)
+rate_limiter = build_rate_limiter()
+metrics.registry.add_collector(lambda: [(metrics.RATE_LIMIT_REJECTIONS, (), rate_limiter.rejected)])
@@ -0,0 +1,60 @@
+from http.cookies import SimpleCookie
+from uuid import UUID
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+from app.core.auth_cache import TTLCache
+from app.core.config import settings
+
+RECENT_WRITE_COOKIE = "pausas_recent_write"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# user_id -> True while the user's last write is younger than DB_REPLICA_READ_YOUR_WRITES_SECONDS.
+recent_writes = TTLCache(settings.db_replica_tracked_users, settings.db_replica_read_your_writes_seconds)
+
+
+def _recent_write_cookie() -> str:
+    cookie = SimpleCookie()
+    cookie[RECENT_WRITE_COOKIE] = "1"
+    morsel = cookie[RECENT_WRITE_COOKIE]
+    morsel["max-age"] = str(max(1, round(settings.db_replica_read_your_writes_seconds)))
+    morsel["path"] = "/"
+    morsel["httponly"] = True
+    morsel["samesite"] = "lax"
+    morsel["secure"] = settings.cookie_secure
+    return morsel.OutputString()
+
+
+def use_replica(user_id: UUID, request: Request) -> bool:
+    # The tracker covers writes served by this worker, the cookie writes served by any other.
+    return (
+        bool(settings.database_replica_url)
+        and recent_writes.get(user_id) is None
+        and RECENT_WRITE_COOKIE not in request.cookies
+    )
+
+
+class ReadYourWritesMiddleware:
+    """Marks the signed-in user of every non-GET request as a recent writer once the response
+    starts, i.e. after the endpoint committed. get_current_user leaves the id in scope["state"].
+    Only installed with DATABASE_REPLICA_URL."""
+
+    def __init__(self, app):
+        self.app = app
+        self.cookie = _recent_write_cookie()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking(message):
+            if message["type"] == "http.response.start":
+                user_id = scope.get("state", {}).get("user_id")
+                if user_id is not None:
+                    recent_writes.set(user_id, True)
+                    MutableHeaders(scope=message).append("set-cookie", self.cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_marking)
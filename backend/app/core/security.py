@@ -1,4 +1,5 @@
 import hashlib
+import secrets
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
@@ -7,13 +8,25 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Hashes made with other parameters count as deprecated: verify_and_update_password rehashes them.
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Also returns a new hash when the stored one uses other argon2 parameters (None otherwise)."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -29,15 +42,39 @@ def create_access_token(subject: str) -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm="HS256")
 
 
-def create_refresh_token(subject: str) -> str:
-    expires_at = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
+def create_refresh_token(subject: str) -> tuple[str, datetime]:
+    """Returns the token and its expiry, so callers do not decode it back just to read exp."""
+    # JWT exp has second resolution; storing the same value keeps the DB row and the token in step.
+    expires_at = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=settings.refresh_token_expire_days)
     payload = {
         "sub": subject,
         "type": "refresh",
         "exp": expires_at,
         "jti": str(uuid4()),
     }
-    return jwt.encode(payload, settings.refresh_secret, algorithm="HS256")
+    return jwt.encode(payload, settings.refresh_secret, algorithm="HS256"), expires_at
+
+
+def create_profile_token(minutes: int) -> str:
+    """Short-lived token for X-Profile-Token (profile one request, read /admin/profiles)."""
+    if not settings.profiling_secret:
+        raise ValueError("PROFILING_SECRET no configurado")
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+    payload = {"type": "profile", "exp": expires_at, "jti": str(uuid4())}
+    return jwt.encode(payload, settings.profiling_secret, algorithm="HS256")
+
+
+def decode_profile_token(token: str) -> dict:
+    payload = jwt.decode(token, settings.profiling_secret, algorithms=["HS256"])
+    if payload.get("type") != "profile":
+        raise jwt.InvalidTokenError("not a profile token")
+    return payload
+
+
+def is_metrics_token(authorization: str | None) -> bool:
+    if not settings.metrics_secret or not authorization:
+        return False
+    return secrets.compare_digest(authorization.encode(), f"Bearer {settings.metrics_secret}".encode())
 
 
 def decode_access_token(token: str) -> dict:
@@ -0,0 +1,138 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[0-9.]+;desc="([0-9]+) queries"')
+
+
+@dataclass(slots=True)
+class SQLStats:
+    statements: int = 0
+    seconds: float = 0.0
+    # Statement text -> executions; SQLAlchemy renders bound parameters as placeholders, so the
+    # same text is the same statement shape.
+    shapes: Counter = field(default_factory=Counter)
+    scope: dict | None = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements += 1
+        self.seconds += elapsed
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    @property
+    def route(self) -> str:
+        # The route template once routing has run, the raw path before that.
+        if self.scope is None:
+            return "-"
+        return getattr(self.scope.get("route"), "path", self.scope["path"])
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.statements} queries"'
+
+
+_current: ContextVar[SQLStats | None] = ContextVar("sql_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context rather than conn.info: a statement that raises never reaches
+    # after_cursor_execute, and its context is dropped with it.
+    context._sql_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._sql_stats_started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.sql_slow_query_ms:
+        route = stats.route if stats is not None else "-"
+        metrics.registry.inc(metrics.SQL_SLOW_QUERIES, (route,))
+        # Parameters are left out on purpose: they carry emails and token hashes.
+        slow_query_logger.warning(
+            json.dumps(
+                {"event": "slow_query", "route": route, "duration_ms": round(elapsed * 1000, 1), "statement": statement}
+            )
+        )
+
+
+def instrument(engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """Collect the statements run inside the block (this context only), e.g. in a test:
+
+        with count_queries() as stats:
+            recompute(...)
+        assert stats.statements <= 3
+    """
+    stats = SQLStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_count(response) -> int:
+    """Statements behind an HTTP response, read from its Server-Timing header."""
+    match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+    if match is None:
+        raise AssertionError("La respuesta no trae Server-Timing (SQL_INSTRUMENTATION_ENABLED=false?)")
+    return int(match.group(1))
+
+
+def assert_max_queries(response, limit: int) -> None:
+    count = query_count(response)
+    if count > limit:
+        raise AssertionError(f"{count} consultas, maximo {limit}")
+
+
+class SQLStatsMiddleware:
+    """Per-request statement count and DB time in Server-Timing; logs repeated statement shapes
+    (likely N+1) once the request finishes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = SQLStats(scope=scope)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            repeated = stats.repeated(settings.sql_n_plus_one_threshold)
+            if repeated:
+                metrics.registry.inc(metrics.SQL_N_PLUS_ONE, (stats.route,))
+                for shape, count in repeated:
+                    logger.warning("Posible N+1 en %s %s: %sx %s", scope["method"], stats.route, count, shape[:300])
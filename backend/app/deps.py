@@ -1,31 +1,117 @@
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core import auth_cache, read_routing
+from app.core.database import AsyncReplicaSessionLocal, ReplicaSessionLocal, get_async_db, get_db
 from app.core.security import decode_access_token
 from app.models import User
 
 auth_scheme = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(auth_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    id: UUID
+    is_active: bool
+    email_verified: bool
+
+
+def _user_id_from_credentials(request: Request, credentials: HTTPAuthorizationCredentials | None) -> UUID:
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sesion requerida")
     token = credentials.credentials
-    try:
-        payload = decode_access_token(token)
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido") from exc
+    payload = auth_cache.get_token_payload(token)
+    if payload is None:
+        try:
+            payload = decode_access_token(token)
+        except Exception as exc:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido") from exc
+        auth_cache.set_token_payload(token, payload)
 
     if payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido")
+    try:
+        user_id = UUID(payload.get("sub"))
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido") from exc
+    # For ReadYourWritesMiddleware, which only sees the ASGI scope.
+    request.state.user_id = user_id
+    return user_id
+
 
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.is_active:
+def _user_state_statement(user_id: UUID):
+    return select(User.is_active, User.email_verified).where(User.id == user_id)
+
+
+def _to_current_user(user_id: UUID, state: tuple[bool, bool] | None) -> CurrentUser:
+    if state is None or not state[0]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario invalido")
-    return user
+    return CurrentUser(id=user_id, is_active=state[0], email_verified=state[1])
+
+
+def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(auth_scheme),
+    db: Session = Depends(get_db),
+) -> CurrentUser:
+    user_id = _user_id_from_credentials(request, credentials)
+    state = auth_cache.user_cache.get(user_id)
+    if state is None:
+        row = db.execute(_user_state_statement(user_id)).first()
+        state = tuple(row) if row else None
+        if state is not None:
+            auth_cache.user_cache.set(user_id, state)
+    return _to_current_user(user_id, state)
+
+
+async def get_current_user_async(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(auth_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    user_id = _user_id_from_credentials(request, credentials)
+    state = auth_cache.user_cache.get(user_id)
+    if state is None:
+        row = (await db.execute(_user_state_statement(user_id))).first()
+        state = tuple(row) if row else None
+        if state is not None:
+            auth_cache.user_cache.set(user_id, state)
+    return _to_current_user(user_id, state)
+
+
+def get_read_db(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Session for read-only endpoints: the replica, unless there is none or the user wrote recently.
+
+    Otherwise it is the request's primary session (the one get_current_user already holds), so
+    routing never costs a second connection.
+    """
+    if not read_routing.use_replica(current_user.id, request):
+        yield db
+        return
+    replica = ReplicaSessionLocal()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def get_async_read_db(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not read_routing.use_replica(current_user.id, request):
+        yield db
+        return
+    async with AsyncReplicaSessionLocal() as replica:
+        yield replica
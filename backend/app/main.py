@@ -1,21 +1,56 @@
 import logging
-import time
-from collections import defaultdict, deque
+import math
+from contextlib import asynccontextmanager
 
+import anyio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.concurrency import run_in_threadpool
 
+from app.core import auth_cache, metrics
 from app.core.config import settings
-from app.routers import auth, health, history, settings as settings_router
+from app.core.memory import memory_monitor
+from app.core.profiling import ProfilingMiddleware
+from app.core.rate_limit import match_rule, rate_limit_rules, rate_limiter
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.sql_stats import SQLStatsMiddleware
+from app.routers import admin, aio, auth, health, history, settings as settings_router
+from app.services.email import warm_templates
+from app.services.email_outbox import email_worker
+from app.services.password_pool import PasswordPoolBusy, password_pool
+from app.services.token_sweeper import token_sweeper
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(name)s %(message)s",
 )
 
-app = FastAPI(title="Pausas Activas API", version="1.0.0")
-rate_buckets: dict[str, deque[float]] = defaultdict(deque)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    metrics.watch_threadpool(anyio.to_thread.current_default_thread_limiter())
+    metrics.exporter.start()
+    if settings.memory_diagnostics_enabled:
+        memory_monitor.start()
+    if settings.auth_cache_enabled and settings.auth_cache_listen:
+        auth_cache.invalidation_listener.start()
+    if settings.token_sweeper_enabled:
+        token_sweeper.start()
+    warm_templates()
+    if settings.email_outbox_worker_enabled:
+        email_worker.start()
+    yield
+    email_worker.stop()
+    token_sweeper.stop()
+    auth_cache.invalidation_listener.stop()
+    password_pool.shutdown()
+    metrics.exporter.stop()
+    memory_monitor.stop()
+
+
+app = FastAPI(title="Pausas Activas API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,26 +58,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(_: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio ocupado, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(PoolTimeoutError)
+async def db_pool_timeout_handler(_: Request, exc: PoolTimeoutError):
+    # Every connection stayed busy for DB_POOL_TIMEOUT_SECONDS: shed load instead of queueing more.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio ocupado, intenta de nuevo en unos segundos"},
+        headers={"Retry-After": str(settings.db_pool_retry_after_seconds)},
+    )
+
+
 @app.middleware("http")
 async def auth_rate_limit_middleware(request: Request, call_next):
-  if request.url.path.startswith("/auth/"):
+  rule = match_rule(rate_limit_rules, request.url.path)
+  if rule is not None:
     client_ip = request.client.host if request.client else "unknown"
     key = f"{client_ip}:{request.url.path}"
-    now = time.time()
-    window_seconds = 60
-    limit = 30
-    bucket = rate_buckets[key]
-    while bucket and now - bucket[0] > window_seconds:
-      bucket.popleft()
-    if len(bucket) >= limit:
-      return JSONResponse(status_code=429, content={"detail": "Demasiados intentos, intenta de nuevo en 1 minuto"})
-    bucket.append(now)
+    if rate_limiter.blocking:
+      retry_after = await run_in_threadpool(rate_limiter.hit, key, rule)
+    else:
+      retry_after = rate_limiter.hit(key, rule)
+    if retry_after is not None:
+      return JSONResponse(
+        status_code=429,
+        content={"detail": "Demasiados intentos, intenta de nuevo en 1 minuto"},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+      )
   return await call_next(request)
 
+# Remembers who just wrote, so their next reads skip the (possibly lagging) replica.
+if settings.database_replica_url:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.sql_instrumentation_enabled:
+    app.add_middleware(SQLStatsMiddleware)
+
+# Not installed at all unless enabled, so it costs nothing when off.
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Added last so it wraps everything, including rate-limited and CORS preflight responses.
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(health.router)
-app.include_router(auth.router)
-app.include_router(settings_router.router)
-app.include_router(history.router)
+if settings.metrics_secret:
+    app.include_router(health.internal_router)
+if settings.profiling_secret and (settings.profiling_enabled or settings.memory_diagnostics_enabled):
+    app.include_router(admin.router)
+if settings.db_async_mode:
+    app.include_router(aio.auth.router)
+    app.include_router(aio.settings.router)
+    app.include_router(aio.history.router)
+else:
+    app.include_router(auth.router)
+    app.include_router(settings_router.router)
+    app.include_router(history.router)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import date, datetime, timezone
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -48,16 +48,29 @@ class UserSettings(Base):
 
 class BreakSession(Base):
     __tablename__ = "break_sessions"
+    # Range-partitioned by month on date (see the partition_break_sessions migration and
+    # scripts/manage_partitions.py), so date is part of the primary key.
+    __table_args__ = (
+        Index("ix_break_sessions_user_id_date_started_at", "user_id", "date", "started_at"),
+        # Batch replays insert with ON CONFLICT DO NOTHING on this index (see app.services.session_batch).
+        Index("uq_break_sessions_user_id_date_client_id", "user_id", "date", "client_id", unique=True),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
-    date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     exercise_ids: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
     duration_planned_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
     duration_actual_seconds: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Set by POST /history/sessions:batch; unique per user and date.
+    client_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow, server_default=func.now(), nullable=False
+    )
 
 
 class DailyRecord(Base):
@@ -69,13 +82,69 @@ class DailyRecord(Base):
     sessions_started: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     sessions_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     compliance_percent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow, server_default=func.now(), nullable=False
+    )
+
+
+class _RollupRecord:
+    """Sums of daily_records per period, maintained by the daily_records_rollups trigger."""
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    period_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    days_recorded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sessions_expected: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sessions_started: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sessions_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    compliance_percent: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow, server_default=func.now(), nullable=False
+    )
+
+
+class WeeklyRecord(_RollupRecord, Base):
+    __tablename__ = "weekly_records"
+
+
+class MonthlyRecord(_RollupRecord, Base):
+    __tablename__ = "monthly_records"
+
+
+class YearlyRecord(_RollupRecord, Base):
+    __tablename__ = "yearly_records"
+
+
+class UserComplianceStats(Base):
+    """Streak state maintained by the daily_records trigger (see the user_compliance_stats migration)."""
+
+    __tablename__ = "user_compliance_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_days: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    compliance_sum: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
+    current_streak: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    previous_streak: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    best_streak: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_record_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    stale: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, onupdate=utcnow, server_default=func.now(), nullable=False
+    )
 
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_active_token_hash", "token_hash", postgresql_where=text("revoked_at IS NULL")),
+        # Used by the token sweeper.
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        Index("ix_refresh_tokens_revoked_at", "revoked_at", postgresql_where=text("revoked_at IS NOT NULL")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Shared by every token rotated from the same login; reusing a rotated token revokes them all.
+    family_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), default=uuid.uuid4, nullable=False, index=True)
     token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -84,6 +153,11 @@ class RefreshToken(Base):
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
+    __table_args__ = (
+        Index("ix_password_reset_tokens_unused_token_hash", "token_hash", postgresql_where=text("used_at IS NULL")),
+        Index("ix_password_reset_tokens_expires_at", "expires_at"),
+        Index("ix_password_reset_tokens_used_at", "used_at", postgresql_where=text("used_at IS NOT NULL")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -91,3 +165,29 @@ class PasswordResetToken(Base):
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     used_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+
+class EmailOutbox(Base):
+    """Emails queued in the request transaction and sent by the delivery worker.
+
+    Rows are deleted once sent or once what they link to expired; failed_at marks the ones that ran
+    out of attempts, which the token sweeper purges. payload never holds secrets.
+    """
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_pending_next_attempt_at", "next_attempt_at", postgresql_where=text("failed_at IS NULL")),
+        Index("ix_email_outbox_failed_at", "failed_at", postgresql_where=text("failed_at IS NOT NULL")),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    template: Mapped[str] = mapped_column(String(64), nullable=False)
+    to_email: Mapped[str] = mapped_column(String(320), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    failed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
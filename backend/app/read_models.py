@@ -0,0 +1,65 @@
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from uuid import UUID
+
+# Read paths select only the columns a response needs and map each row into one of these frozen
+# slots dataclasses: no identity map, no attribute instrumentation or history, nothing for the unit
+# of work to track. Writes keep using the entities in app.models. Field names match the mapped
+# attribute names, so the same *_to_out helpers accept either.
+
+
+@dataclass(frozen=True, slots=True)
+class SessionRow:
+    id: UUID
+    date: date
+    started_at: datetime
+    completed_at: datetime | None
+    completed: bool
+    exercise_ids: list[str]
+    duration_planned_seconds: int
+    duration_actual_seconds: int
+
+
+@dataclass(frozen=True, slots=True)
+class DailyRecordRow:
+    date: date
+    sessions_expected: int
+    sessions_started: int
+    sessions_completed: int
+    compliance_percent: int
+
+
+@dataclass(frozen=True, slots=True)
+class RollupRow:
+    period_start: date
+    days_recorded: int
+    sessions_expected: int
+    sessions_started: int
+    sessions_completed: int
+    compliance_percent: int
+
+
+@dataclass(frozen=True, slots=True)
+class SettingsRow:
+    user_id: UUID
+    work_interval_minutes: int
+    break_duration_minutes: int
+    alarm_volume: int
+    alarm_type: str
+    theme: str
+    disclaimer_accepted: bool
+    disclaimer_accepted_at: datetime | None
+    notifications_enabled: bool
+    auto_start_next_cycle: bool
+    work_start_hour: int
+    work_end_hour: int
+    updated_at: datetime
+
+
+def columns(read_model: type, entity) -> tuple:
+    """The entity's mapped columns for each field of read_model, in field order."""
+    return tuple(getattr(entity, field.name) for field in fields(read_model))
+
+
+def to_rows(read_model: type, rows) -> list:
+    return [read_model(*row) for row in rows]
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+import jwt
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.core.memory import allocation_diff, memory_monitor, top_allocations
+from app.core.profiling import PROFILE_NAME, list_profiles, profile_dir
+from app.core.security import decode_profile_token
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def require_profile_token(x_profile_token: str | None = Header(default=None)) -> None:
+    if not x_profile_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de perfilado requerido")
+    try:
+        decode_profile_token(x_profile_token)
+    except jwt.PyJWTError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalido") from exc
+
+
+@router.get("/profiles", dependencies=[Depends(require_profile_token)])
+def get_profiles() -> list[dict]:
+    results = []
+    for path in list_profiles():
+        stat = path.stat()
+        results.append(
+            {
+                "name": path.name,
+                "sizeBytes": stat.st_size,
+                "createdAt": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            }
+        )
+    return results
+
+
+@router.get("/profiles/{name}", dependencies=[Depends(require_profile_token)])
+def download_profile(name: str) -> FileResponse:
+    # The pattern also rules out path separators and "..".
+    path = profile_dir() / name
+    if not PROFILE_NAME.match(name) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+
+def require_memory_monitor() -> None:
+    if not memory_monitor.running:
+        raise HTTPException(status_code=404, detail="Diagnostico de memoria desactivado")
+
+
+def _snapshot_or_404(snapshot_id: int):
+    found = memory_monitor.get_snapshot(snapshot_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Snapshot no encontrado")
+    return found
+
+
+memory_dependencies = [Depends(require_profile_token), Depends(require_memory_monitor)]
+
+
+@router.get("/memory/samples", dependencies=memory_dependencies)
+def get_memory_samples() -> list[dict]:
+    return list(memory_monitor.samples)
+
+
+@router.post("/memory/snapshots", dependencies=memory_dependencies)
+def create_memory_snapshot(
+    group_by: GroupBy = Query(default="lineno"),
+    limit: int = Query(default=25, ge=1, le=500),
+) -> dict:
+    snapshot_id, created_at, snapshot = memory_monitor.take_snapshot()
+    return {"id": snapshot_id, "createdAt": created_at, "top": top_allocations(snapshot, group_by, limit)}
+
+
+@router.get("/memory/snapshots", dependencies=memory_dependencies)
+def get_memory_snapshots() -> list[dict]:
+    return [{"id": snapshot_id, "createdAt": created_at} for snapshot_id, created_at in memory_monitor.snapshot_ids()]
+
+
+@router.delete("/memory/snapshots", dependencies=memory_dependencies, status_code=204)
+def stop_memory_tracing() -> None:
+    memory_monitor.stop_tracing()
+
+
+@router.get("/memory/snapshots/{snapshot_id}", dependencies=memory_dependencies)
+def get_memory_snapshot(
+    snapshot_id: int,
+    group_by: GroupBy = Query(default="lineno"),
+    limit: int = Query(default=25, ge=1, le=500),
+) -> dict:
+    created_at, snapshot = _snapshot_or_404(snapshot_id)
+    return {"id": snapshot_id, "createdAt": created_at, "top": top_allocations(snapshot, group_by, limit)}
+
+
+@router.get("/memory/diff", dependencies=memory_dependencies)
+def get_memory_diff(
+    from_: int = Query(alias="from"),
+    to: int = Query(),
+    group_by: GroupBy = Query(default="lineno"),
+    limit: int = Query(default=25, ge=1, le=500),
+) -> list[dict]:
+    _, old = _snapshot_or_404(from_)
+    _, new = _snapshot_or_404(to)
+    return allocation_diff(old, new, group_by, limit)
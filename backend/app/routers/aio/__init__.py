@@ -0,0 +1,3 @@
+from app.routers.aio import auth, history, settings
+
+__all__ = ["auth", "history", "settings"]
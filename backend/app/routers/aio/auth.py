@@ -0,0 +1,191 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import auth_cache
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    decode_refresh_token,
+    hash_token,
+)
+from app.deps import CurrentUser, get_current_user_async
+from app.models import PasswordResetToken, RefreshToken, User, UserSettings
+from app.routers.auth import _clear_refresh_cookie, _set_refresh_cookie
+from app.schemas import (
+    AuthResponse,
+    AuthUserOut,
+    ForgotPasswordIn,
+    LoginIn,
+    RegisterIn,
+    ResetPasswordIn,
+)
+from app.services.email_outbox import password_reset_email, unissued_token_hash
+from app.services.password_pool import password_pool
+from app.services.refresh_tokens import (
+    failed_rotation_statement,
+    is_token_reuse,
+    revoke_family,
+    rotate_refresh_token,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+async def _create_auth_response(user: User, response: Response, db: AsyncSession) -> AuthResponse:
+    access_token = create_access_token(str(user.id))
+    refresh_token, expires_at = create_refresh_token(str(user.id))
+
+    db.add(
+        RefreshToken(
+            user_id=user.id,
+            token_hash=hash_token(refresh_token),
+            expires_at=expires_at,
+        )
+    )
+    # Serialized before the commit, which would expire the user and cost a reload.
+    user_out = AuthUserOut.model_validate(user)
+    await db.commit()
+    _set_refresh_cookie(response, refresh_token)
+    return AuthResponse(access_token=access_token, user=user_out)
+
+
+@router.post("/register", response_model=AuthResponse)
+async def register(payload: RegisterIn, response: Response, db: AsyncSession = Depends(get_async_db)) -> AuthResponse:
+    existing = await db.scalar(select(User).where(User.email == payload.email.lower()))
+    if existing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El correo ya existe")
+
+    user = User(
+        email=payload.email.lower(),
+        password_hash=await password_pool.ahash(payload.password),
+    )
+    db.add(user)
+    await db.flush()
+    # User, settings and the first refresh token go in the same commit.
+    db.add(UserSettings(user_id=user.id))
+    return await _create_auth_response(user, response, db)
+
+
+@router.post("/login", response_model=AuthResponse)
+async def login(payload: LoginIn, response: Response, db: AsyncSession = Depends(get_async_db)) -> AuthResponse:
+    user = await db.scalar(select(User).where(User.email == payload.email.lower()))
+    verified, new_hash = await password_pool.averify_and_update(payload.password, user.password_hash) if user else (False, None)
+    if not verified:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales invalidas")
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario inactivo")
+    if new_hash:
+        # Hashed with older ARGON2_* parameters: store the rehash in the same commit as the token.
+        user.password_hash = new_hash
+    return await _create_auth_response(user, response, db)
+
+
+@router.post("/refresh", response_model=AuthResponse)
+async def refresh_token(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> AuthResponse:
+    token = request.cookies.get(settings.refresh_cookie_name)
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sesion expirada")
+
+    try:
+        payload = decode_refresh_token(token)
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token invalido") from exc
+
+    token_hash = hash_token(token)
+    new_token, expires_at = create_refresh_token(payload["sub"])
+    user = await db.scalar(rotate_refresh_token(token_hash, payload["sub"], hash_token(new_token), expires_at))
+    if user is None:
+        # The CTE may have revoked the token for an inactive user; look at the state before it.
+        await db.rollback()
+        failed = (await db.execute(failed_rotation_statement(token_hash))).first()
+        if failed is not None and is_token_reuse(failed, settings.refresh_reuse_grace_seconds):
+            logger.warning("Refresh token reutilizado, se revoca la familia %s", failed.family_id)
+            await db.execute(revoke_family(failed.family_id))
+            await db.commit()
+        if failed is not None and failed.revoked_at is None and not failed.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario invalido")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token invalido")
+    user_out = AuthUserOut.model_validate(user)
+    await db.commit()
+
+    _set_refresh_cookie(response, new_token)
+    return AuthResponse(access_token=create_access_token(str(user_out.id)), user=user_out)
+
+
+@router.post("/logout")
+async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> dict:
+    token = request.cookies.get(settings.refresh_cookie_name)
+    if token:
+        token_hash = hash_token(token)
+        db_token = await db.scalar(select(RefreshToken).where(RefreshToken.token_hash == token_hash))
+        if db_token and db_token.revoked_at is None:
+            db_token.revoked_at = datetime.now(timezone.utc)
+            await db.commit()
+    _clear_refresh_cookie(response)
+    return {"ok": True}
+
+
+@router.get("/me", response_model=AuthUserOut)
+async def me(
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> AuthUserOut:
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario invalido")
+    return AuthUserOut.model_validate(user)
+
+
+@router.post("/forgot-password")
+async def forgot_password(payload: ForgotPasswordIn, db: AsyncSession = Depends(get_async_db)) -> dict:
+    user = await db.scalar(select(User).where(User.email == payload.email.lower()))
+    if user:
+        # The delivery worker issues the usable token when it sends the email.
+        reset_token = PasswordResetToken(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            token_hash=unissued_token_hash(),
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=30),
+        )
+        db.add(reset_token)
+        db.add(password_reset_email(user.email, reset_token.id))
+        await db.commit()
+    return {"ok": True}
+
+
+@router.post("/reset-password")
+async def reset_password(payload: ResetPasswordIn, db: AsyncSession = Depends(get_async_db)) -> dict:
+    token_hash = hash_token(payload.token)
+    reset_token = await db.scalar(
+        select(PasswordResetToken).where(
+            PasswordResetToken.token_hash == token_hash,
+            PasswordResetToken.used_at.is_(None),
+        )
+    )
+    if not reset_token or reset_token.expires_at <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token invalido o expirado")
+
+    user = await db.get(User, reset_token.user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
+
+    user.password_hash = await password_pool.ahash(payload.new_password)
+    reset_token.used_at = datetime.now(timezone.utc)
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    await db.execute(auth_cache.invalidation_statement(user.id))
+    await db.commit()
+    auth_cache.invalidate_user(user.id)
+    return {"ok": True}
@@ -0,0 +1,262 @@
+from datetime import date, datetime, timedelta
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.etag import etag_matches, make_etag, not_modified, set_etag
+from app.deps import CurrentUser, get_async_read_db, get_current_user_async
+from app.models import BreakSession, UserComplianceStats
+from app.read_models import DailyRecordRow, RollupRow, SessionRow, to_rows
+from app.routers.history import (
+    NDJSON_MEDIA_TYPE,
+    NEXT_CURSOR_HEADER,
+    _daily_to_out,
+    _parse_iso,
+    _rollup_to_out,
+    _session_to_out,
+    daily_records_between,
+    daily_records_version,
+    decode_cursor,
+    encode_cursor,
+    json_body_response,
+    session_for_update,
+    sessions_between,
+    sessions_version,
+    wants_ndjson,
+)
+from app.schemas import (
+    BreakSessionBatchItemIn,
+    BreakSessionBatchResultOut,
+    BreakSessionCompleteIn,
+    BreakSessionCreateIn,
+    BreakSessionOut,
+    ComplianceStatsOut,
+    DailyRecordOut,
+    ExpectedSessionsIn,
+    RollupOut,
+)
+from app.services.compliance_stats import apply_recomputed, compliance_stats_statement, stats_to_out
+from app.services.daily_records import increment_daily_record, set_expected_sessions
+from app.services.history_json import daily_records_json, sessions_json
+from app.services.rollups import Granularity, rollups_between, rollups_version
+from app.services.session_batch import (
+    SessionBatch,
+    copy_sessions_async,
+    insert_statement,
+    replayed_sessions_statement,
+)
+
+router = APIRouter(prefix="/history", tags=["history"])
+
+
+async def _stream_sessions(
+    bind: AsyncEngine, user_id: UUID, start: date, end: date, after: tuple[datetime, UUID] | None
+):
+    async with AsyncSession(bind=bind) as db:
+        stmt = sessions_between(user_id, start, end, after).execution_options(
+            yield_per=settings.history_stream_batch_size
+        )
+        async for row in await db.stream(stmt):
+            yield _session_to_out(SessionRow(*row)).model_dump_json() + "\n"
+
+
+@router.get("/sessions", response_model=list[BreakSessionOut])
+async def get_sessions(
+    request: Request,
+    response: Response,
+    from_: str = Query(alias="from"),
+    to: str = Query(),
+    limit: int = Query(default=settings.history_page_size, ge=1, le=settings.history_page_max_size),
+    cursor: str | None = Query(default=None),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> list[BreakSessionOut]:
+    start = date.fromisoformat(from_)
+    end = date.fromisoformat(to)
+    after = decode_cursor(cursor) if cursor else None
+    if wants_ndjson(request):
+        return StreamingResponse(
+            _stream_sessions(db.bind, current_user.id, start, end, after), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    version = (await db.execute(sessions_version(current_user.id, start, end))).one()
+    etag = make_etag("sessions", current_user.id, start, end, cursor, limit, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = sessions_between(current_user.id, start, end, after).limit(limit + 1)
+    if settings.history_sql_json:
+        rendered = (await db.execute(sessions_json(page, limit))).one()
+        raw = json_body_response(rendered.body, etag)
+        if rendered.rows > limit:
+            raw.headers[NEXT_CURSOR_HEADER] = encode_cursor(rendered)
+        return raw
+
+    set_etag(response, etag)
+    sessions = to_rows(SessionRow, await db.execute(page))
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sessions[-1])
+    return [_session_to_out(item) for item in sessions]
+
+
+@router.post("/sessions", response_model=BreakSessionOut)
+async def create_break_session(
+    payload: BreakSessionCreateIn,
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> BreakSessionOut:
+    session = BreakSession(
+        user_id=current_user.id,
+        date=date.fromisoformat(payload.date),
+        started_at=_parse_iso(payload.startedAt),
+        completed=False,
+        completed_at=None,
+        exercise_ids=payload.exerciseIds,
+        duration_planned_seconds=payload.durationPlannedSeconds,
+        duration_actual_seconds=0,
+    )
+    db.add(session)
+    await db.flush()
+    await db.execute(increment_daily_record(current_user.id, session.date, started=1))
+    result = _session_to_out(session)
+    await db.commit()
+    return result
+
+
+@router.post("/sessions:batch", response_model=list[BreakSessionBatchResultOut])
+async def create_break_sessions_batch(
+    payload: list[BreakSessionBatchItemIn],
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> list[BreakSessionBatchResultOut]:
+    if len(payload) > settings.history_batch_max_items:
+        raise HTTPException(status_code=413, detail="Demasiadas sesiones en el lote")
+
+    batch = SessionBatch.build(current_user.id, payload, _parse_iso)
+    if len(batch.rows) >= settings.history_batch_copy_threshold:
+        raw = await (await db.connection()).get_raw_connection()
+        async with raw.driver_connection.cursor() as cursor:
+            await copy_sessions_async(cursor, batch)
+    elif batch.rows:
+        batch.record(await db.execute(insert_statement(), batch.rows))
+    for day, (started, completed) in batch.daily_deltas().items():
+        await db.execute(increment_daily_record(current_user.id, day, started=started, completed=completed))
+    replayed = batch.replayed_keys()
+    if replayed:
+        replayed = (await db.execute(replayed_sessions_statement(current_user.id, replayed))).all()
+    results = batch.finish(_session_to_out, replayed)
+    await db.commit()
+    return results
+
+
+@router.patch("/sessions/{session_id}/complete", response_model=BreakSessionOut)
+async def complete_break_session(
+    session_id: str,
+    payload: BreakSessionCompleteIn,
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> BreakSessionOut:
+    # Row lock so two concurrent completes of the same session count it only once.
+    session = await db.scalar(session_for_update(current_user.id, UUID(session_id)))
+    if not session:
+        raise HTTPException(status_code=404, detail="Sesion no encontrada")
+
+    newly_completed = not session.completed
+    session.completed = True
+    session.completed_at = _parse_iso(payload.completedAt)
+    session.duration_actual_seconds = payload.durationActualSeconds
+    await db.flush()
+    if newly_completed:
+        await db.execute(increment_daily_record(current_user.id, session.date, completed=1))
+    result = _session_to_out(session)
+    await db.commit()
+    return result
+
+
+@router.get("/daily-records", response_model=list[DailyRecordOut])
+async def get_daily_records(
+    request: Request,
+    response: Response,
+    from_: str = Query(alias="from"),
+    to: str = Query(),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> list[DailyRecordOut]:
+    start = date.fromisoformat(from_)
+    end = date.fromisoformat(to)
+    version = (await db.execute(daily_records_version(current_user.id, start, end))).one()
+    etag = make_etag("daily-records", current_user.id, start, end, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if settings.history_sql_json:
+        body = await db.scalar(daily_records_json(current_user.id, start, end))
+        return json_body_response(body, etag)
+
+    set_etag(response, etag)
+    records = to_rows(DailyRecordRow, await db.execute(daily_records_between(current_user.id, start, end)))
+    return [_daily_to_out(item) for item in records]
+
+
+@router.put("/daily-records/{record_date}/expected", response_model=DailyRecordOut)
+async def update_expected_sessions(
+    record_date: str,
+    payload: ExpectedSessionsIn,
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> DailyRecordOut:
+    day = date.fromisoformat(record_date)
+    record = (await db.execute(set_expected_sessions(current_user.id, day, payload.sessionsExpected))).one()
+    result = _daily_to_out(record)
+    await db.commit()
+    return result
+
+
+@router.get("/stats", response_model=ComplianceStatsOut)
+async def get_compliance_stats(
+    days: int | None = Query(default=None, ge=1, le=settings.history_stats_max_days),
+    today: str | None = Query(default=None),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> ComplianceStatsOut:
+    if days is not None:
+        end = date.fromisoformat(today) if today else date.today()
+        stmt = compliance_stats_statement(current_user.id, end - timedelta(days=days - 1), end)
+        return stats_to_out((await db.execute(stmt)).one())
+
+    state = await db.get(UserComplianceStats, current_user.id)
+    if state is None:
+        return ComplianceStatsOut(totalDays=0, averageCompliance=0, currentStreak=0, bestStreak=0)
+    if state.stale:
+        state = await db.get(UserComplianceStats, current_user.id, with_for_update=True, populate_existing=True)
+        if state.stale:
+            apply_recomputed(state, (await db.execute(compliance_stats_statement(current_user.id))).one())
+        result = stats_to_out(state)
+        await db.commit()
+        return result
+    return stats_to_out(state)
+
+
+@router.get("/rollups", response_model=list[RollupOut])
+async def get_rollups(
+    request: Request,
+    response: Response,
+    granularity: Granularity = Query(default="month"),
+    from_: str = Query(alias="from"),
+    to: str = Query(),
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> list[RollupOut]:
+    start = date.fromisoformat(from_)
+    end = date.fromisoformat(to)
+    version = (await db.execute(rollups_version(granularity, current_user.id, start, end))).one()
+    etag = make_etag("rollups", granularity, current_user.id, start, end, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    records = to_rows(RollupRow, await db.execute(rollups_between(granularity, current_user.id, start, end)))
+    return [_rollup_to_out(item) for item in records]
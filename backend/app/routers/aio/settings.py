@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.etag import etag_matches, not_modified, set_etag
+from app.deps import CurrentUser, get_async_read_db, get_current_user_async
+from app.models import UserSettings
+from app.read_models import SettingsRow
+from app.routers.settings import _parse_iso, _to_schema, settings_etag, settings_row
+from app.schemas import SettingsIn, SettingsOut
+
+router = APIRouter(prefix="/settings", tags=["settings"])
+
+
+@router.get("/me", response_model=SettingsOut)
+async def get_my_settings(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+    primary: AsyncSession = Depends(get_async_db),
+) -> SettingsOut:
+    row = (await db.execute(settings_row(current_user.id))).first()
+    if row is None and db is not primary:
+        row = (await primary.execute(settings_row(current_user.id))).first()
+    if row:
+        user_settings = SettingsRow(*row)
+    else:
+        user_settings = UserSettings(user_id=current_user.id)
+        primary.add(user_settings)
+        await primary.commit()
+        await primary.refresh(user_settings)
+    etag = settings_etag(user_settings)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return _to_schema(user_settings)
+
+
+@router.put("/me", response_model=SettingsOut)
+async def update_my_settings(
+    payload: SettingsIn,
+    current_user: CurrentUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> SettingsOut:
+    user_settings = await db.get(UserSettings, current_user.id)
+    if not user_settings:
+        user_settings = UserSettings(user_id=current_user.id)
+        db.add(user_settings)
+
+    user_settings.work_interval_minutes = payload.workIntervalMinutes
+    user_settings.break_duration_minutes = payload.breakDurationMinutes
+    user_settings.alarm_volume = int(max(0, min(1, payload.alarmVolume)) * 100)
+    user_settings.alarm_type = payload.alarmType
+    user_settings.theme = payload.theme
+    user_settings.disclaimer_accepted = payload.disclaimerAccepted
+    user_settings.disclaimer_accepted_at = _parse_iso(payload.disclaimerAcceptedAt) if payload.disclaimerAcceptedAt else None
+    user_settings.notifications_enabled = payload.notificationsEnabled
+    user_settings.auto_start_next_cycle = payload.autoStartNextCycle
+    user_settings.work_start_hour = payload.workStartHour
+    user_settings.work_end_hour = payload.workEndHour
+    await db.commit()
+    await db.refresh(user_settings)
+    return _to_schema(user_settings)
@@ -1,21 +1,21 @@
-import secrets
+import logging
+import uuid
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from app.core import auth_cache
 from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_refresh_token,
-    get_password_hash,
     hash_token,
-    verify_password,
 )
-from app.deps import get_current_user
+from app.deps import CurrentUser, get_current_user
 from app.models import PasswordResetToken, RefreshToken, User, UserSettings
 from app.schemas import (
     AuthResponse,
@@ -25,7 +25,16 @@ from app.schemas import (
     RegisterIn,
     ResetPasswordIn,
 )
-from app.services.email import send_reset_email
+from app.services.email_outbox import password_reset_email, unissued_token_hash
+from app.services.password_pool import password_pool
+from app.services.refresh_tokens import (
+    failed_rotation_statement,
+    is_token_reuse,
+    revoke_family,
+    rotate_refresh_token,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -51,9 +60,7 @@ def _clear_refresh_cookie(response: Response) -> None:
 
 def _create_auth_response(user: User, response: Response, db: Session) -> AuthResponse:
     access_token = create_access_token(str(user.id))
-    refresh_token = create_refresh_token(str(user.id))
-    refresh_payload = decode_refresh_token(refresh_token)
-    expires_at = datetime.fromtimestamp(refresh_payload["exp"], tz=timezone.utc)
+    refresh_token, expires_at = create_refresh_token(str(user.id))
 
     db.add(
         RefreshToken(
@@ -62,12 +69,11 @@ def _create_auth_response(user: User, response: Response, db: Session) -> AuthRe
             expires_at=expires_at,
         )
     )
+    # Serialized before the commit, which would expire the user and cost a reload.
+    user_out = AuthUserOut.model_validate(user)
     db.commit()
     _set_refresh_cookie(response, refresh_token)
-    return AuthResponse(
-        access_token=access_token,
-        user=AuthUserOut.model_validate(user),
-    )
+    return AuthResponse(access_token=access_token, user=user_out)
 
 
 @router.post("/register", response_model=AuthResponse)
@@ -78,23 +84,26 @@ def register(payload: RegisterIn, response: Response, db: Session = Depends(get_
 
     user = User(
         email=payload.email.lower(),
-        password_hash=get_password_hash(payload.password),
+        password_hash=password_pool.hash(payload.password),
     )
     db.add(user)
     db.flush()
+    # User, settings and the first refresh token go in the same commit.
     db.add(UserSettings(user_id=user.id))
-    db.commit()
-    db.refresh(user)
     return _create_auth_response(user, response, db)
 
 
 @router.post("/login", response_model=AuthResponse)
 def login(payload: LoginIn, response: Response, db: Session = Depends(get_db)) -> AuthResponse:
     user = db.scalar(select(User).where(User.email == payload.email.lower()))
-    if not user or not verify_password(payload.password, user.password_hash):
+    verified, new_hash = password_pool.verify_and_update(payload.password, user.password_hash) if user else (False, None)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales invalidas")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario inactivo")
+    if new_hash:
+        # Hashed with older ARGON2_* parameters: store the rehash in the same commit as the token.
+        user.password_hash = new_hash
     return _create_auth_response(user, response, db)
 
 
@@ -110,22 +119,25 @@ def refresh_token(request: Request, response: Response, db: Session = Depends(ge
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token invalido") from exc
 
     token_hash = hash_token(token)
-    db_token = db.scalar(
-        select(RefreshToken).where(
-            RefreshToken.token_hash == token_hash,
-            RefreshToken.revoked_at.is_(None),
-        )
-    )
-    if not db_token or db_token.expires_at <= datetime.now(timezone.utc):
+    new_token, expires_at = create_refresh_token(payload["sub"])
+    user = db.scalar(rotate_refresh_token(token_hash, payload["sub"], hash_token(new_token), expires_at))
+    if user is None:
+        # The CTE may have revoked the token for an inactive user; look at the state before it.
+        db.rollback()
+        failed = db.execute(failed_rotation_statement(token_hash)).first()
+        if failed is not None and is_token_reuse(failed, settings.refresh_reuse_grace_seconds):
+            logger.warning("Refresh token reutilizado, se revoca la familia %s", failed.family_id)
+            db.execute(revoke_family(failed.family_id))
+            db.commit()
+        if failed is not None and failed.revoked_at is None and not failed.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario invalido")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token invalido")
-
-    user = db.get(User, payload.get("sub"))
-    if not user or not user.is_active:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario invalido")
-
-    db_token.revoked_at = datetime.now(timezone.utc)
+    # Serialized before the commit, which would otherwise expire the user and reload it.
+    user_out = AuthUserOut.model_validate(user)
     db.commit()
-    return _create_auth_response(user, response, db)
+
+    _set_refresh_cookie(response, new_token)
+    return AuthResponse(access_token=create_access_token(str(user_out.id)), user=user_out)
 
 
 @router.post("/logout")
@@ -142,25 +154,27 @@ def logout(request: Request, response: Response, db: Session = Depends(get_db))
 
 
 @router.get("/me", response_model=AuthUserOut)
-def me(current_user: User = Depends(get_current_user)) -> AuthUserOut:
-    return AuthUserOut.model_validate(current_user)
+def me(current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)) -> AuthUserOut:
+    user = db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario invalido")
+    return AuthUserOut.model_validate(user)
 
 
 @router.post("/forgot-password")
 def forgot_password(payload: ForgotPasswordIn, db: Session = Depends(get_db)) -> dict:
     user = db.scalar(select(User).where(User.email == payload.email.lower()))
     if user:
-        raw_token = secrets.token_urlsafe(32)
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=30)
-        db.add(
-            PasswordResetToken(
-                user_id=user.id,
-                token_hash=hash_token(raw_token),
-                expires_at=expires_at,
-            )
+        # The delivery worker issues the usable token when it sends the email.
+        reset_token = PasswordResetToken(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            token_hash=unissued_token_hash(),
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=30),
         )
+        db.add(reset_token)
+        db.add(password_reset_email(user.email, reset_token.id))
         db.commit()
-        send_reset_email(user.email, raw_token)
     return {"ok": True}
 
 
@@ -180,12 +194,14 @@ def reset_password(payload: ResetPasswordIn, db: Session = Depends(get_db)) -> d
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
 
-    user.password_hash = get_password_hash(payload.new_password)
+    user.password_hash = password_pool.hash(payload.new_password)
     reset_token.used_at = datetime.now(timezone.utc)
     db.execute(
         update(RefreshToken)
         .where(RefreshToken.user_id == user.id, RefreshToken.revoked_at.is_(None))
         .values(revoked_at=datetime.now(timezone.utc))
     )
+    db.execute(auth_cache.invalidation_statement(user.id))
     db.commit()
+    auth_cache.invalidate_user(user.id)
     return {"ok": True}
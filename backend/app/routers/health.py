@@ -1,8 +1,54 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from app.core import auth_cache, metrics
+from app.core.security import is_metrics_token
+from app.services.email_outbox import email_worker
+from app.services.password_pool import password_pool
+from app.services.token_sweeper import token_sweeper
 
 router = APIRouter(tags=["health"])
 
 
+async def require_metrics_token(authorization: str | None = Header(default=None)) -> None:
+    if not is_metrics_token(authorization):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de metricas requerido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# Internal state of the worker: only mounted with METRICS_SECRET and only answered with it.
+# The check is async so /metrics does not need a threadpool token either.
+internal_router = APIRouter(tags=["health"], dependencies=[Depends(require_metrics_token)])
+
+
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@internal_router.get("/health/password-pool")
+def password_pool_stats():
+    return password_pool.snapshot()
+
+
+@internal_router.get("/health/auth-cache")
+def auth_cache_stats():
+    return auth_cache.stats()
+
+
+@internal_router.get("/health/token-sweeper")
+def token_sweeper_stats():
+    return token_sweeper.snapshot()
+
+
+@internal_router.get("/health/email-outbox")
+def email_outbox_stats():
+    return email_worker.snapshot()
+
+
+@internal_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    # async so a scrape still gets through while the threadpool is saturated.
+    return Response(content=await metrics.exporter.scrape(), media_type=metrics.CONTENT_TYPE)
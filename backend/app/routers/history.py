@@ -1,29 +1,50 @@
-from datetime import date, datetime
+import base64
+from datetime import date, datetime, timedelta
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.deps import get_current_user
-from app.models import BreakSession, DailyRecord, User
+from app.core.etag import etag_matches, make_etag, not_modified, range_version, set_etag
+from app.deps import CurrentUser, get_current_user, get_read_db
+from app.models import BreakSession, DailyRecord, UserComplianceStats
+from app.read_models import DailyRecordRow, RollupRow, SessionRow, columns, to_rows
 from app.schemas import (
+    BreakSessionBatchItemIn,
+    BreakSessionBatchResultOut,
     BreakSessionCompleteIn,
     BreakSessionCreateIn,
     BreakSessionOut,
+    ComplianceStatsOut,
     DailyRecordOut,
     ExpectedSessionsIn,
+    RollupOut,
 )
+from app.services.compliance_stats import apply_recomputed, compliance_stats_statement, stats_to_out
+from app.services.daily_records import increment_daily_record, set_expected_sessions
+from app.services.history_json import daily_records_json, sessions_json
+from app.services.rollups import Granularity, rollups_between, rollups_version
+from app.services.session_batch import SessionBatch, copy_sessions, insert_statement, replayed_sessions_statement
 
 router = APIRouter(prefix="/history", tags=["history"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+SESSION_COLUMNS = columns(SessionRow, BreakSession)
+DAILY_RECORD_COLUMNS = columns(DailyRecordRow, DailyRecord)
+
 
 def _parse_iso(value: str) -> datetime:
     return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
-def _session_to_out(session: BreakSession) -> BreakSessionOut:
+def _session_to_out(session: BreakSession | SessionRow) -> BreakSessionOut:
     return BreakSessionOut(
         id=str(session.id),
         date=session.date.isoformat(),
@@ -36,7 +57,7 @@ def _session_to_out(session: BreakSession) -> BreakSessionOut:
     )
 
 
-def _daily_to_out(record: DailyRecord) -> DailyRecordOut:
+def _daily_to_out(record: DailyRecord | DailyRecordRow) -> DailyRecordOut:
     return DailyRecordOut(
         date=record.date.isoformat(),
         sessionsExpected=record.sessions_expected,
@@ -46,49 +67,134 @@ def _daily_to_out(record: DailyRecord) -> DailyRecordOut:
     )
 
 
-def recompute_daily_record(db: Session, user_id: UUID, day: date) -> None:
-    sessions = db.scalars(
-        select(BreakSession).where(BreakSession.user_id == user_id, BreakSession.date == day)
-    ).all()
-    started = len(sessions)
-    completed = len([s for s in sessions if s.completed])
+def _rollup_to_out(record: RollupRow) -> RollupOut:
+    return RollupOut(
+        periodStart=record.period_start.isoformat(),
+        daysRecorded=record.days_recorded,
+        sessionsExpected=record.sessions_expected,
+        sessionsStarted=record.sessions_started,
+        sessionsCompleted=record.sessions_completed,
+        compliancePercent=record.compliance_percent,
+    )
+
+
+def json_body_response(body: str, etag: str) -> Response:
+    # Body already rendered by Postgres (app.services.history_json); skips response_model entirely.
+    response = Response(content=body, media_type="application/json")
+    set_etag(response, etag)
+    return response
+
+
+def encode_cursor(session: SessionRow) -> str:
+    raw = f"{session.started_at.isoformat()}|{session.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        started_at, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(started_at), UUID(session_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Cursor invalido") from exc
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def sessions_between(user_id: UUID, start: date, end: date, after: tuple[datetime, UUID] | None = None):
+    stmt = select(*SESSION_COLUMNS).where(
+        BreakSession.user_id == user_id, BreakSession.date >= start, BreakSession.date <= end
+    )
+    if after is not None:
+        # Keyset: resume strictly after the last (started_at, id) already delivered.
+        stmt = stmt.where(tuple_(BreakSession.started_at, BreakSession.id) > tuple_(*after))
+    return stmt.order_by(BreakSession.started_at.asc(), BreakSession.id.asc())
+
+
+def session_for_update(user_id: UUID, session_id: UUID):
+    # The id alone cannot prune partitions, so this probes each partition's (id, date) key once.
+    return (
+        select(BreakSession)
+        .where(BreakSession.id == session_id, BreakSession.user_id == user_id)
+        .with_for_update()
+    )
+
 
-    record = db.get(DailyRecord, {"user_id": user_id, "date": day})
-    if not record:
-        record = DailyRecord(
-            user_id=user_id,
-            date=day,
-            sessions_expected=4,
+def _stream_sessions(bind: Engine, user_id: UUID, start: date, end: date, after: tuple[datetime, UUID] | None):
+    # The request-scoped session is closed before the body streams, so the stream owns its own on
+    # the same engine (primary or replica).
+    with Session(bind=bind) as db:
+        stmt = sessions_between(user_id, start, end, after).execution_options(
+            yield_per=settings.history_stream_batch_size
         )
-        db.add(record)
-    expected = max(0, record.sessions_expected)
-    record.sessions_started = started
-    record.sessions_completed = completed
-    record.compliance_percent = round((completed / expected) * 100) if expected > 0 else 0
-    db.commit()
+        for row in db.execute(stmt):
+            yield _session_to_out(SessionRow(*row)).model_dump_json() + "\n"
+
+
+def daily_records_between(user_id: UUID, start: date, end: date):
+    return (
+        select(*DAILY_RECORD_COLUMNS)
+        .where(DailyRecord.user_id == user_id, DailyRecord.date >= start, DailyRecord.date <= end)
+        .order_by(DailyRecord.date.asc())
+    )
+
+
+def sessions_version(user_id: UUID, start: date, end: date):
+    return select(*range_version()).where(
+        BreakSession.user_id == user_id, BreakSession.date >= start, BreakSession.date <= end
+    )
+
+
+def daily_records_version(user_id: UUID, start: date, end: date):
+    return select(*range_version()).where(
+        DailyRecord.user_id == user_id, DailyRecord.date >= start, DailyRecord.date <= end
+    )
 
 
 @router.get("/sessions", response_model=list[BreakSessionOut])
 def get_sessions(
+    request: Request,
+    response: Response,
     from_: str = Query(alias="from"),
     to: str = Query(),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=settings.history_page_size, ge=1, le=settings.history_page_max_size),
+    cursor: str | None = Query(default=None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
 ) -> list[BreakSessionOut]:
     start = date.fromisoformat(from_)
     end = date.fromisoformat(to)
-    sessions = db.scalars(
-        select(BreakSession)
-        .where(BreakSession.user_id == current_user.id, BreakSession.date >= start, BreakSession.date <= end)
-        .order_by(BreakSession.started_at.asc())
-    ).all()
+    after = decode_cursor(cursor) if cursor else None
+    if wants_ndjson(request):
+        return StreamingResponse(
+            _stream_sessions(db.get_bind(), current_user.id, start, end, after), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    version = db.execute(sessions_version(current_user.id, start, end)).one()
+    etag = make_etag("sessions", current_user.id, start, end, cursor, limit, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    page = sessions_between(current_user.id, start, end, after).limit(limit + 1)
+    if settings.history_sql_json:
+        rendered = db.execute(sessions_json(page, limit)).one()
+        raw = json_body_response(rendered.body, etag)
+        if rendered.rows > limit:
+            raw.headers[NEXT_CURSOR_HEADER] = encode_cursor(rendered)
+        return raw
+
+    set_etag(response, etag)
+    sessions = to_rows(SessionRow, db.execute(page))
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sessions[-1])
     return [_session_to_out(item) for item in sessions]
 
 
 @router.post("/sessions", response_model=BreakSessionOut)
 def create_break_session(
     payload: BreakSessionCreateIn,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> BreakSessionOut:
     session = BreakSession(
@@ -102,46 +208,83 @@ def create_break_session(
         duration_actual_seconds=0,
     )
     db.add(session)
+    db.flush()
+    db.execute(increment_daily_record(current_user.id, session.date, started=1))
+    result = _session_to_out(session)
     db.commit()
-    db.refresh(session)
-    recompute_daily_record(db, current_user.id, session.date)
-    return _session_to_out(session)
+    return result
+
+
+@router.post("/sessions:batch", response_model=list[BreakSessionBatchResultOut])
+def create_break_sessions_batch(
+    payload: list[BreakSessionBatchItemIn],
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> list[BreakSessionBatchResultOut]:
+    if len(payload) > settings.history_batch_max_items:
+        raise HTTPException(status_code=413, detail="Demasiadas sesiones en el lote")
+
+    batch = SessionBatch.build(current_user.id, payload, _parse_iso)
+    if len(batch.rows) >= settings.history_batch_copy_threshold:
+        with db.connection().connection.driver_connection.cursor() as cursor:
+            copy_sessions(cursor, batch)
+    elif batch.rows:
+        batch.record(db.execute(insert_statement(), batch.rows))
+    for day, (started, completed) in batch.daily_deltas().items():
+        db.execute(increment_daily_record(current_user.id, day, started=started, completed=completed))
+    replayed = batch.replayed_keys()
+    if replayed:
+        replayed = db.execute(replayed_sessions_statement(current_user.id, replayed)).all()
+    results = batch.finish(_session_to_out, replayed)
+    db.commit()
+    return results
 
 
 @router.patch("/sessions/{session_id}/complete", response_model=BreakSessionOut)
 def complete_break_session(
     session_id: str,
     payload: BreakSessionCompleteIn,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> BreakSessionOut:
-    session = db.get(BreakSession, UUID(session_id))
-    if not session or session.user_id != current_user.id:
+    # Row lock so two concurrent completes of the same session count it only once.
+    session = db.scalar(session_for_update(current_user.id, UUID(session_id)))
+    if not session:
         raise HTTPException(status_code=404, detail="Sesion no encontrada")
 
+    newly_completed = not session.completed
     session.completed = True
     session.completed_at = _parse_iso(payload.completedAt)
     session.duration_actual_seconds = payload.durationActualSeconds
+    db.flush()
+    if newly_completed:
+        db.execute(increment_daily_record(current_user.id, session.date, completed=1))
+    result = _session_to_out(session)
     db.commit()
-    db.refresh(session)
-    recompute_daily_record(db, current_user.id, session.date)
-    return _session_to_out(session)
+    return result
 
 
 @router.get("/daily-records", response_model=list[DailyRecordOut])
 def get_daily_records(
+    request: Request,
+    response: Response,
     from_: str = Query(alias="from"),
     to: str = Query(),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
 ) -> list[DailyRecordOut]:
     start = date.fromisoformat(from_)
     end = date.fromisoformat(to)
-    records = db.scalars(
-        select(DailyRecord)
-        .where(DailyRecord.user_id == current_user.id, DailyRecord.date >= start, DailyRecord.date <= end)
-        .order_by(DailyRecord.date.asc())
-    ).all()
+    version = db.execute(daily_records_version(current_user.id, start, end)).one()
+    etag = make_etag("daily-records", current_user.id, start, end, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if settings.history_sql_json:
+        body = db.scalar(daily_records_json(current_user.id, start, end))
+        return json_body_response(body, etag)
+
+    set_etag(response, etag)
+    records = to_rows(DailyRecordRow, db.execute(daily_records_between(current_user.id, start, end)))
     return [_daily_to_out(item) for item in records]
 
 
@@ -149,28 +292,60 @@ def get_daily_records(
 def update_expected_sessions(
     record_date: str,
     payload: ExpectedSessionsIn,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> DailyRecordOut:
     day = date.fromisoformat(record_date)
-    record = db.get(DailyRecord, {"user_id": current_user.id, "date": day})
-    if not record:
-        record = DailyRecord(
-            user_id=current_user.id,
-            date=day,
-            sessions_expected=payload.sessionsExpected,
-            sessions_started=0,
-            sessions_completed=0,
-            compliance_percent=0,
-        )
-        db.add(record)
+    record = db.execute(set_expected_sessions(current_user.id, day, payload.sessionsExpected)).one()
+    result = _daily_to_out(record)
+    db.commit()
+    return result
+
+
+@router.get("/stats", response_model=ComplianceStatsOut)
+def get_compliance_stats(
+    days: int | None = Query(default=None, ge=1, le=settings.history_stats_max_days),
+    today: str | None = Query(default=None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> ComplianceStatsOut:
+    if days is not None:
+        # The window ends on the client's day (the one its sessions are recorded under), not ours.
+        end = date.fromisoformat(today) if today else date.today()
+        row = db.execute(compliance_stats_statement(current_user.id, end - timedelta(days=days - 1), end)).one()
+        return stats_to_out(row)
+
+    state = db.get(UserComplianceStats, current_user.id)
+    if state is None:
+        return ComplianceStatsOut(totalDays=0, averageCompliance=0, currentStreak=0, bestStreak=0)
+    if state.stale:
+        # Lock before recomputing so the window query sees every change committed ahead of us.
+        state = db.get(UserComplianceStats, current_user.id, with_for_update=True, populate_existing=True)
+        if state.stale:
+            apply_recomputed(state, db.execute(compliance_stats_statement(current_user.id)).one())
+        result = stats_to_out(state)
         db.commit()
-        db.refresh(record)
-        return _daily_to_out(record)
+        return result
+    return stats_to_out(state)
 
-    record.sessions_expected = payload.sessionsExpected
-    expected = max(0, record.sessions_expected)
-    record.compliance_percent = round((record.sessions_completed / expected) * 100) if expected > 0 else 0
-    db.commit()
-    db.refresh(record)
-    return _daily_to_out(record)
+
+@router.get("/rollups", response_model=list[RollupOut])
+def get_rollups(
+    request: Request,
+    response: Response,
+    granularity: Granularity = Query(default="month"),
+    from_: str = Query(alias="from"),
+    to: str = Query(),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+) -> list[RollupOut]:
+    start = date.fromisoformat(from_)
+    end = date.fromisoformat(to)
+    version = db.execute(rollups_version(granularity, current_user.id, start, end)).one()
+    etag = make_etag("rollups", granularity, current_user.id, start, end, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    records = to_rows(RollupRow, db.execute(rollups_between(granularity, current_user.id, start, end)))
+    return [_rollup_to_out(item) for item in records]
@@ -1,11 +1,15 @@
 from datetime import datetime
+from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.deps import get_current_user
-from app.models import User, UserSettings
+from app.core.etag import etag_matches, make_etag, not_modified, set_etag
+from app.deps import CurrentUser, get_current_user, get_read_db
+from app.models import UserSettings
+from app.read_models import SettingsRow, columns
 from app.schemas import SettingsIn, SettingsOut
 
 router = APIRouter(prefix="/settings", tags=["settings"])
@@ -15,7 +19,7 @@ def _parse_iso(value: str) -> datetime:
     return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
-def _to_schema(model: UserSettings) -> SettingsOut:
+def _to_schema(model: UserSettings | SettingsRow) -> SettingsOut:
     return SettingsOut(
         workIntervalMinutes=model.work_interval_minutes,
         breakDurationMinutes=model.break_duration_minutes,
@@ -31,21 +35,44 @@ def _to_schema(model: UserSettings) -> SettingsOut:
     )
 
 
+def settings_etag(model: UserSettings | SettingsRow) -> str:
+    return make_etag("settings", model.user_id, model.updated_at.isoformat())
+
+
+def settings_row(user_id: UUID):
+    return select(*columns(SettingsRow, UserSettings)).where(UserSettings.user_id == user_id)
+
+
 @router.get("/me", response_model=SettingsOut)
-def get_my_settings(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> SettingsOut:
-    user_settings = db.get(UserSettings, current_user.id)
-    if not user_settings:
+def get_my_settings(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
+) -> SettingsOut:
+    row = db.execute(settings_row(current_user.id)).first()
+    if row is None and db is not primary:
+        # A row created moments ago may not have reached the replica yet; never create it there.
+        row = primary.execute(settings_row(current_user.id)).first()
+    if row:
+        user_settings = SettingsRow(*row)
+    else:
         user_settings = UserSettings(user_id=current_user.id)
-        db.add(user_settings)
-        db.commit()
-        db.refresh(user_settings)
+        primary.add(user_settings)
+        primary.commit()
+        primary.refresh(user_settings)
+    etag = settings_etag(user_settings)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return _to_schema(user_settings)
 
 
 @router.put("/me", response_model=SettingsOut)
 def update_my_settings(
     payload: SettingsIn,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> SettingsOut:
     user_settings = db.get(UserSettings, current_user.id)
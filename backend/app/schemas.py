@@ -88,6 +88,23 @@ class BreakSessionOut(BaseModel):
     durationActualSeconds: int
 
 
+class BreakSessionBatchItemIn(BaseModel):
+    clientId: str = Field(min_length=1, max_length=64)
+    date: str
+    startedAt: str
+    exerciseIds: list[str]
+    durationPlannedSeconds: int
+    completedAt: str | None = None
+    durationActualSeconds: int = 0
+
+
+class BreakSessionBatchResultOut(BaseModel):
+    clientId: str
+    ok: bool
+    session: BreakSessionOut | None = None
+    error: str | None = None
+
+
 class DailyRecordOut(BaseModel):
     date: str
     sessionsExpected: int
@@ -96,5 +113,21 @@ class DailyRecordOut(BaseModel):
     compliancePercent: int
 
 
+class ComplianceStatsOut(BaseModel):
+    totalDays: int
+    averageCompliance: int
+    currentStreak: int
+    bestStreak: int
+
+
+class RollupOut(BaseModel):
+    periodStart: str
+    daysRecorded: int
+    sessionsExpected: int
+    sessionsStarted: int
+    sessionsCompleted: int
+    compliancePercent: int
+
+
 class ExpectedSessionsIn(BaseModel):
     sessionsExpected: int = Field(ge=0)
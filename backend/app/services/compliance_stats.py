@@ -0,0 +1,74 @@
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import case, func, select
+
+from app.models import DailyRecord, UserComplianceStats
+from app.schemas import ComplianceStatsOut
+
+# Keep in sync with the daily_records_compliance_stats() trigger.
+STREAK_THRESHOLD_PERCENT = 75
+
+
+def compliance_stats_statement(user_id: UUID, start: date | None = None, end: date | None = None):
+    """Totals and streaks over a user's daily_records, computed with window functions.
+
+    A streak is a run of consecutive records (days without a record are skipped) at or above the
+    threshold. Each record gets the length of the run ending on it: records are grouped by the
+    running count of misses, so within a group the row number minus the leading miss is the run.
+    """
+    filters = [DailyRecord.user_id == user_id]
+    if start is not None:
+        filters.append(DailyRecord.date >= start)
+    if end is not None:
+        filters.append(DailyRecord.date <= end)
+
+    missed = DailyRecord.compliance_percent < STREAK_THRESHOLD_PERCENT
+    grouped = (
+        select(
+            DailyRecord.date,
+            DailyRecord.compliance_percent,
+            func.count().filter(missed).over(order_by=DailyRecord.date).label("run_group"),
+        )
+        .where(*filters)
+        .subquery()
+    )
+    runs = select(
+        grouped.c.date,
+        grouped.c.compliance_percent,
+        (
+            func.row_number().over(partition_by=grouped.c.run_group, order_by=grouped.c.date)
+            - case((grouped.c.run_group > 0, 1), else_=0)
+        ).label("run_length"),
+        func.row_number().over(order_by=grouped.c.date.desc()).label("recency"),
+    ).subquery()
+    return select(
+        func.count().label("total_days"),
+        func.coalesce(func.sum(runs.c.compliance_percent), 0).label("compliance_sum"),
+        func.coalesce(func.max(runs.c.run_length).filter(runs.c.recency == 1), 0).label("current_streak"),
+        func.coalesce(func.max(runs.c.run_length).filter(runs.c.recency == 2), 0).label("previous_streak"),
+        func.coalesce(func.max(runs.c.run_length), 0).label("best_streak"),
+        func.max(runs.c.date).label("last_record_date"),
+    )
+
+
+def apply_recomputed(state: UserComplianceStats, row) -> UserComplianceStats:
+    state.total_days = row.total_days
+    state.compliance_sum = row.compliance_sum
+    state.current_streak = row.current_streak
+    state.previous_streak = row.previous_streak
+    state.best_streak = row.best_streak
+    state.last_record_date = row.last_record_date
+    state.stale = False
+    return state
+
+
+def stats_to_out(row) -> ComplianceStatsOut:
+    # Integer half-up rounding, like Math.round() in the old client-side computation.
+    average = (2 * row.compliance_sum + row.total_days) // (2 * row.total_days) if row.total_days else 0
+    return ComplianceStatsOut(
+        totalDays=row.total_days,
+        averageCompliance=average,
+        currentStreak=row.current_streak,
+        bestStreak=row.best_streak,
+    )
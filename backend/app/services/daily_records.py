@@ -0,0 +1,125 @@
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import Double, Integer, and_, case, cast, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import BreakSession, DailyRecord
+
+DEFAULT_SESSIONS_EXPECTED = 4
+
+
+def compliance_percent(completed, expected):
+    # The SQL twin of round((completed / expected) * 100) in Python: float8 arithmetic and
+    # round(float8), which rounds half to even like Python (1 of 8 -> 12); round(numeric) would
+    # round half away from zero.
+    return case(
+        (expected > 0, cast(func.round(cast(completed, Double) / cast(expected, Double) * 100), Integer)),
+        else_=0,
+    )
+
+
+# on_conflict_do_update() skips the ORM onupdate, so every upsert below bumps updated_at itself.
+def increment_daily_record(user_id: UUID, day: date, started: int = 0, completed: int = 0):
+    """Atomically add started/completed sessions to a day, creating the record if needed."""
+    stmt = insert(DailyRecord).values(
+        user_id=user_id,
+        date=day,
+        sessions_expected=DEFAULT_SESSIONS_EXPECTED,
+        sessions_started=started,
+        sessions_completed=completed,
+        compliance_percent=compliance_percent(literal(completed), literal(DEFAULT_SESSIONS_EXPECTED)),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyRecord.user_id, DailyRecord.date],
+        set_={
+            "sessions_started": DailyRecord.sessions_started + started,
+            "sessions_completed": DailyRecord.sessions_completed + completed,
+            "compliance_percent": compliance_percent(
+                DailyRecord.sessions_completed + completed, DailyRecord.sessions_expected
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def set_expected_sessions(user_id: UUID, day: date, expected: int):
+    stmt = insert(DailyRecord).values(
+        user_id=user_id,
+        date=day,
+        sessions_expected=expected,
+        sessions_started=0,
+        sessions_completed=0,
+        compliance_percent=0,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyRecord.user_id, DailyRecord.date],
+        set_={
+            "sessions_expected": stmt.excluded.sessions_expected,
+            "compliance_percent": compliance_percent(DailyRecord.sessions_completed, stmt.excluded.sessions_expected),
+            "updated_at": func.now(),
+        },
+    ).returning(
+        DailyRecord.date,
+        DailyRecord.sessions_expected,
+        DailyRecord.sessions_started,
+        DailyRecord.sessions_completed,
+        DailyRecord.compliance_percent,
+    )
+
+
+def recompute_daily_records(user_id: UUID | None = None, start: date | None = None, end: date | None = None):
+    """Full recompute from break_sessions, for repairs and backfills.
+
+    Returns two statements: the upsert of days with sessions, and the reset of days left without any.
+    """
+    session_filters = []
+    record_filters = []
+    if user_id is not None:
+        session_filters.append(BreakSession.user_id == user_id)
+        record_filters.append(DailyRecord.user_id == user_id)
+    if start is not None:
+        session_filters.append(BreakSession.date >= start)
+        record_filters.append(DailyRecord.date >= start)
+    if end is not None:
+        session_filters.append(BreakSession.date <= end)
+        record_filters.append(DailyRecord.date <= end)
+
+    counts = (
+        select(
+            BreakSession.user_id,
+            BreakSession.date,
+            literal(DEFAULT_SESSIONS_EXPECTED).label("sessions_expected"),
+            func.count().label("sessions_started"),
+            func.count().filter(BreakSession.completed).label("sessions_completed"),
+            compliance_percent(
+                func.count().filter(BreakSession.completed), literal(DEFAULT_SESSIONS_EXPECTED)
+            ).label("compliance_percent"),
+        )
+        .where(*session_filters)
+        .group_by(BreakSession.user_id, BreakSession.date)
+    )
+    stmt = insert(DailyRecord).from_select(
+        ["user_id", "date", "sessions_expected", "sessions_started", "sessions_completed", "compliance_percent"],
+        counts,
+    )
+    upsert = stmt.on_conflict_do_update(
+        index_elements=[DailyRecord.user_id, DailyRecord.date],
+        set_={
+            "sessions_started": stmt.excluded.sessions_started,
+            "sessions_completed": stmt.excluded.sessions_completed,
+            "compliance_percent": compliance_percent(stmt.excluded.sessions_completed, DailyRecord.sessions_expected),
+            "updated_at": func.now(),
+        },
+    )
+    has_sessions = (
+        select(BreakSession.id)
+        .where(and_(BreakSession.user_id == DailyRecord.user_id, BreakSession.date == DailyRecord.date))
+        .exists()
+    )
+    orphan_reset = (
+        update(DailyRecord)
+        .where(*record_filters, ~has_sessions)
+        .values(sessions_started=0, sessions_completed=0, compliance_percent=0, updated_at=func.now())
+    )
+    return upsert, orphan_reset
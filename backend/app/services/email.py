@@ -1,6 +1,8 @@
 import base64
 import smtplib
+import time
 from email.message import EmailMessage
+from functools import lru_cache
 from pathlib import Path
 import logging
 
@@ -11,6 +13,9 @@ logger = logging.getLogger(__name__)
 _ASSETS_DIR = Path(__file__).parent.parent / "assets"
 
 
+RESET_LINK_PLACEHOLDER = "__RESET_LINK__"
+
+
 def _logo_src() -> str:
     logo_path = _ASSETS_DIR / "logo.png"
     if logo_path.exists():
@@ -19,8 +24,21 @@ def _logo_src() -> str:
     return "https://pausas.gira360.com/icons/icon-512x512.png"
 
 
+@lru_cache(maxsize=1)
+def _reset_html_template() -> str:
+    # Rendered once (the logo is inlined as base64); each email only substitutes its link.
+    return _render_reset_html(_logo_src(), RESET_LINK_PLACEHOLDER)
+
+
 def _build_reset_html(reset_link: str) -> str:
-    logo = _logo_src()
+    return _reset_html_template().replace(RESET_LINK_PLACEHOLDER, reset_link)
+
+
+def warm_templates() -> None:
+    _reset_html_template()
+
+
+def _render_reset_html(logo: str, reset_link: str) -> str:
     return f"""<!DOCTYPE html>
 <html lang="es">
 <head>
@@ -120,12 +138,11 @@ def _build_reset_html(reset_link: str) -> str:
 </html>"""
 
 
-def send_reset_email(to_email: str, token: str) -> None:
-    reset_link = f"{settings.frontend_reset_url}?token={token}"
-    if not settings.smtp_host or not settings.smtp_user or not settings.smtp_password:
-        logger.warning("SMTP no configurado. Link de reset para %s: %s", to_email, reset_link)
-        return
+def reset_link(token: str) -> str:
+    return f"{settings.frontend_reset_url}?token={token}"
 
+
+def build_reset_message(to_email: str, link: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = "Restablecer contrasena - Pausas Activas"
     msg["From"] = settings.smtp_from
@@ -134,14 +151,66 @@ def send_reset_email(to_email: str, token: str) -> None:
     # Plain-text fallback
     msg.set_content(
         "Recibimos una solicitud para restablecer tu contrasena.\n"
-        f"Usa este enlace (valido 15 minutos): {reset_link}\n\n"
+        f"Usa este enlace (valido 15 minutos): {link}\n\n"
         "Si no solicitaste este cambio, ignora este mensaje."
     )
 
     # HTML version
-    msg.add_alternative(_build_reset_html(reset_link), subtype="html")
-
-    with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as smtp:
-        smtp.starttls()
-        smtp.login(settings.smtp_user, settings.smtp_password)
-        smtp.send_message(msg)
+    msg.add_alternative(_build_reset_html(link), subtype="html")
+    return msg
+
+
+def smtp_configured() -> bool:
+    return bool(settings.smtp_host)
+
+
+class SMTPConnection:
+    """One authenticated SMTP session reused across sends.
+
+    Reconnects lazily: after the server drops us, after an error, or once the session sat idle
+    for longer than SMTP_IDLE_SECONDS (most servers close idle sessions on their own).
+    """
+
+    def __init__(self):
+        self._smtp: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def send(self, msg: EmailMessage) -> None:
+        smtp = self._connection()
+        try:
+            smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # A stale session fails on the first command; retry once on a fresh one.
+            self.close()
+            smtp = self._connection()
+            smtp.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def close_if_idle(self) -> None:
+        if self._smtp is not None and time.monotonic() - self._last_used > settings.smtp_idle_seconds:
+            self.close()
+
+    def _connection(self) -> smtplib.SMTP:
+        self.close_if_idle()
+        if self._smtp is None:
+            smtp = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds)
+            try:
+                if settings.smtp_starttls:
+                    smtp.starttls()
+                if settings.smtp_user and settings.smtp_password:
+                    smtp.login(settings.smtp_user, settings.smtp_password)
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self._last_used = time.monotonic()
+        return self._smtp
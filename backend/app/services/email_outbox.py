@@ -0,0 +1,236 @@
+import logging
+import random
+import secrets
+import smtplib
+import threading
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.security import hash_token
+from app.models import EmailOutbox, PasswordResetToken
+from app.services.email import SMTPConnection, build_reset_message, reset_link, smtp_configured
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentDeliveryError(Exception):
+    pass
+
+
+def unissued_token_hash() -> str:
+    """token_hash for a reset token whose email is still queued: the hash of a discarded random
+    token, so nothing matches it until the worker issues the real one."""
+    return hash_token(secrets.token_urlsafe(32))
+
+
+def password_reset_email(to_email: str, reset_token_id: UUID) -> EmailOutbox:
+    """Outbox row for a reset email; add it to the session that stores the reset token.
+
+    Only the token row's id is queued. The raw token is minted when the email is sent, so it never
+    reaches the database, a backup or the logs.
+    """
+    return EmailOutbox(template="password_reset", to_email=to_email, payload={"reset_token_id": str(reset_token_id)})
+
+
+def issue_reset_token_statement(reset_token_id: UUID, raw_token: str):
+    """Point a still-valid reset token at raw_token; no row means it expired or was used."""
+    return (
+        update(PasswordResetToken)
+        .where(
+            PasswordResetToken.id == reset_token_id,
+            PasswordResetToken.used_at.is_(None),
+            PasswordResetToken.expires_at > func.now(),
+        )
+        .values(token_hash=hash_token(raw_token))
+        .returning(PasswordResetToken.expires_at)
+    )
+
+
+def _password_reset_message(conn: Connection, to_email: str, payload: dict):
+    raw_token = secrets.token_urlsafe(32)
+    expires_at = conn.scalar(issue_reset_token_statement(UUID(payload["reset_token_id"]), raw_token))
+    if expires_at is None:
+        return None, None
+    # A retry mints a new token, so only the latest email's link works.
+    return build_reset_message(to_email, reset_link(raw_token)), expires_at
+
+
+# template -> (conn, to_email, payload) -> (EmailMessage, valid_until), or (None, None) when the
+# email is no longer worth sending.
+TEMPLATES = {
+    "password_reset": _password_reset_message,
+}
+
+
+def claim_statement(batch_size: int, lease_seconds: int):
+    """Take up to batch_size due emails and push them lease_seconds ahead.
+
+    The lease is committed before sending, so no transaction stays open during SMTP round trips;
+    if the worker dies mid-batch the rows come due again once the lease runs out.
+    """
+    due = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.failed_at.is_(None), EmailOutbox.next_attempt_at <= func.now())
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            attempts=EmailOutbox.attempts + 1,
+            next_attempt_at=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(EmailOutbox.id, EmailOutbox.template, EmailOutbox.to_email, EmailOutbox.payload, EmailOutbox.attempts)
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    # Exponential backoff with jitter so a mail server outage does not end in a thundering herd.
+    base = settings.email_outbox_retry_base_seconds * 2 ** (attempts - 1)
+    return timedelta(seconds=min(base, settings.email_outbox_retry_max_seconds) * random.uniform(0.8, 1.2))
+
+
+def _is_permanent(exc: Exception) -> bool:
+    if isinstance(exc, (PermanentDeliveryError, smtplib.SMTPRecipientsRefused)):
+        return True
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+class EmailDeliveryWorker:
+    """Drains email_outbox over one persistent SMTP session.
+
+    Safe to run in several processes at once: claims use FOR UPDATE SKIP LOCKED.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.smtp = SMTPConnection()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.expired = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.smtp_timeout_seconds + 5)
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.deliver_batch()
+            except Exception:
+                logger.exception("Fallo el envio de correos pendientes, reintentando")
+                self.smtp.close()
+                claimed = 0
+            # A full batch means there is probably more waiting.
+            if claimed < settings.email_outbox_batch_size:
+                self.smtp.close_if_idle()
+                self._stop.wait(settings.email_outbox_poll_seconds)
+        self.smtp.close()
+
+    def deliver_batch(self) -> int:
+        prepared: list[tuple] = []
+        expired: list[UUID] = []
+        failures: list[tuple] = []
+        # Messages are rendered in the claim transaction (a reset email issues its token there), so
+        # it commits before any SMTP round trip.
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                claim_statement(settings.email_outbox_batch_size, settings.email_outbox_lease_seconds)
+            ).all()
+            for row in rows:
+                try:
+                    msg, valid_until = self._render(conn, row)
+                except PermanentDeliveryError as exc:
+                    failures.append((row, exc, None))
+                    continue
+                if msg is None:
+                    expired.append(row.id)
+                else:
+                    prepared.append((row, msg, valid_until))
+        if not rows:
+            return 0
+
+        sent: list[UUID] = []
+        for row, msg, valid_until in prepared:
+            try:
+                self._send(row, msg)
+                sent.append(row.id)
+            except Exception as exc:
+                failures.append((row, exc, valid_until))
+
+        with self.engine.begin() as conn:
+            if sent or expired:
+                conn.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(sent + expired)))
+            for row, exc, valid_until in failures:
+                conn.execute(self._failure_statement(row, exc, valid_until))
+        self.sent += len(sent)
+        self.expired += len(expired)
+        return len(rows)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.email_outbox_worker_enabled,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "expired": self.expired,
+        }
+
+    def _render(self, conn: Connection, row):
+        render = TEMPLATES.get(row.template)
+        if render is None:
+            raise PermanentDeliveryError(f"Plantilla desconocida: {row.template}")
+        try:
+            return render(conn, row.to_email, row.payload)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise PermanentDeliveryError(f"Payload invalido para {row.template}: {exc!r}") from exc
+
+    def _send(self, row, msg: EmailMessage) -> None:
+        if not smtp_configured():
+            # Local development only: the link is printed instead of mailed.
+            logger.warning(
+                "SMTP no configurado. Correo %s para %s:\n%s",
+                row.template,
+                row.to_email,
+                msg.get_body(("plain",)).get_content(),
+            )
+            return
+        self.smtp.send(msg)
+
+    def _failure_statement(self, row, exc: Exception, valid_until: datetime | None):
+        error = f"{type(exc).__name__}: {exc}"[:1000]
+        values = {"last_error": error}
+        delay = retry_delay(row.attempts)
+        if _is_permanent(exc) or row.attempts >= settings.email_outbox_max_attempts:
+            self.failed += 1
+            values["failed_at"] = func.now()
+            logger.error("Correo %s para %s descartado tras %s intentos: %s", row.id, row.to_email, row.attempts, error)
+        elif valid_until is not None and datetime.now(timezone.utc) + delay >= valid_until:
+            # The link would be dead by the next attempt; nothing left worth delivering.
+            self.expired += 1
+            logger.warning("Correo %s para %s descartado, su enlace vence antes del reintento: %s", row.id, row.to_email, error)
+            return delete(EmailOutbox).where(EmailOutbox.id == row.id)
+        else:
+            self.retried += 1
+            values["next_attempt_at"] = func.now() + delay
+            logger.warning("Correo %s para %s fallo (intento %s): %s", row.id, row.to_email, row.attempts, error)
+        return update(EmailOutbox).where(EmailOutbox.id == row.id).values(**values)
+
+
+email_worker = EmailDeliveryWorker(engine)
@@ -0,0 +1,107 @@
+from datetime import date
+from uuid import UUID
+
+from sqlalchemy import Text, case, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.models import BreakSession, DailyRecord
+
+# Response bodies rendered by Postgres, byte for byte what FastAPI's JSONResponse produces for
+# list[BreakSessionOut] / list[DailyRecordOut]. json_build_object()/json_agg() would be simpler but
+# put spaces around ":" and after ","; each object is concatenated by hand instead, and to_json()
+# is only used where a value needs JSON string escaping. tests/test_history_json.py compares both
+# paths.
+
+
+def _iso_date(column):
+    return func.to_char(column, "YYYY-MM-DD")
+
+
+def _iso_timestamp(column):
+    # Same as datetime.isoformat() in the session time zone: microseconds only when non-zero.
+    return func.concat(
+        func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS'),
+        case((func.date_trunc("second", column) != column, func.to_char(column, ".US")), else_=""),
+        func.to_char(column, "TZH:TZM"),
+    )
+
+
+def _bool(column):
+    return case((column, "true"), else_="false")
+
+
+def _array_body(items, position, where=None):
+    joined = func.string_agg(items, aggregate_order_by(literal(","), position))
+    if where is not None:
+        joined = joined.filter(where)
+    return func.concat("[", func.coalesce(joined, ""), "]")
+
+
+def session_json_item():
+    return func.concat(
+        '{"id":"',
+        BreakSession.id,
+        '","date":"',
+        _iso_date(BreakSession.date),
+        '","startedAt":"',
+        _iso_timestamp(BreakSession.started_at),
+        '","completedAt":',
+        # concat() skips NULLs, so a missing timestamp has to be spelled out.
+        case(
+            (BreakSession.completed_at.is_(None), "null"),
+            else_=func.concat('"', _iso_timestamp(BreakSession.completed_at), '"'),
+        ),
+        ',"completed":',
+        _bool(BreakSession.completed),
+        ',"exerciseIds":',
+        cast(func.to_json(BreakSession.exercise_ids), Text),
+        ',"durationPlannedSeconds":',
+        BreakSession.duration_planned_seconds,
+        ',"durationActualSeconds":',
+        BreakSession.duration_actual_seconds,
+        "}",
+    )
+
+
+def daily_record_json_item():
+    return func.concat(
+        '{"date":"',
+        _iso_date(DailyRecord.date),
+        '","sessionsExpected":',
+        DailyRecord.sessions_expected,
+        ',"sessionsStarted":',
+        DailyRecord.sessions_started,
+        ',"sessionsCompleted":',
+        DailyRecord.sessions_completed,
+        ',"compliancePercent":',
+        DailyRecord.compliance_percent,
+        "}",
+    )
+
+
+def sessions_json(page, limit: int):
+    """One row: the JSON array of the first `limit` sessions of `page` plus the keyset cursor.
+
+    `page` is sessions_between(...) limited to limit + 1 rows; `rows` > limit means there is a next
+    page starting after (started_at, id).
+    """
+    ordered = page.with_only_columns(
+        session_json_item().label("item"),
+        BreakSession.started_at,
+        BreakSession.id,
+        func.row_number().over(order_by=(BreakSession.started_at, BreakSession.id)).label("position"),
+    ).subquery()
+    in_page = ordered.c.position <= limit
+    last = ordered.c.position == limit
+    return select(
+        _array_body(ordered.c.item, ordered.c.position, in_page).label("body"),
+        func.count().label("rows"),
+        func.max(ordered.c.started_at).filter(last).label("started_at"),
+        func.max(cast(ordered.c.id, Text)).filter(last).label("id"),
+    )
+
+
+def daily_records_json(user_id: UUID, start: date, end: date):
+    return select(
+        _array_body(daily_record_json_item(), DailyRecord.date).label("body"),
+    ).where(DailyRecord.user_id == user_id, DailyRecord.date >= start, DailyRecord.date <= end)
@@ -0,0 +1,68 @@
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARENT_TABLE = "break_sessions"
+DEFAULT_PARTITION = "break_sessions_default"
+
+_BOUNDS = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def list_partitions(conn: Connection) -> dict[str, tuple[date, date] | None]:
+    """Attached partitions of break_sessions with their [from, to) bounds; None for DEFAULT."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    partitions = {}
+    for name, bound in rows:
+        match = _BOUNDS.search(bound)
+        partitions[name] = (date.fromisoformat(match[1]), date.fromisoformat(match[2])) if match else None
+    return partitions
+
+
+def create_month_partition(conn: Connection, month: date) -> int:
+    """Create and attach one monthly partition, moving any rows DEFAULT already holds for it.
+
+    CREATE TABLE ... PARTITION OF would lock the parent exclusively; ATTACH PARTITION only takes
+    SHARE UPDATE EXCLUSIVE, so reads and inserts keep flowing. Returns the rows moved from DEFAULT.
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    ).rowcount
+    conn.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    )
+    return moved
+
+
+def detach_partition(conn: Connection, name: str) -> None:
+    # Plain DETACH (CONCURRENTLY is not allowed next to a DEFAULT partition); the caller sets a
+    # lock_timeout so a long-running reader makes this fail fast instead of queueing every insert.
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
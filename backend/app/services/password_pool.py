@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_and_update_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("password pool saturated")
+        self.retry_after = retry_after
+
+
+@dataclass
+class OpStats:
+    count: int = 0
+    errors: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    run_seconds_total: float = 0.0
+    run_seconds_max: float = 0.0
+
+    def record(self, wait: float, run: float) -> None:
+        self.count += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.run_seconds_total += run
+        self.run_seconds_max = max(self.run_seconds_max, run)
+
+
+def _timed(fn, *args):
+    # Runs inside the worker process; CLOCK_MONOTONIC is shared across processes on Linux.
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic() - started
+
+
+class PasswordPool:
+    """Argon2 work on a dedicated process pool with a hard cap on pending jobs.
+
+    With workers=0 the work runs inline (scripts, local debugging) but the cap still applies.
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after_seconds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after_seconds = retry_after_seconds
+        self.pending = 0
+        self.rejected = 0
+        self.stats = {"hash": OpStats(), "verify": OpStats()}
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy(self.retry_after_seconds)
+            self.pending += 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _finish(self, op: str, submitted: float, future: Future) -> None:
+        with self._lock:
+            # The slot is released first so nothing below can leak it.
+            self.pending -= 1
+            if future.cancelled():
+                # A queued job whose caller went away (e.g. the client disconnected).
+                return
+            exc = future.exception()
+            if exc is None:
+                _, started, run = future.result()
+                wait = max(0.0, started - submitted)
+                self.stats[op].record(wait, run)
+                metrics.registry.observe(metrics.ARGON2_DURATION, (op,), run)
+                metrics.registry.observe(metrics.ARGON2_QUEUE_WAIT, (op,), wait)
+                return
+            self.stats[op].errors += 1
+            if isinstance(exc, BrokenProcessPool):
+                logger.error("Password pool roto, se recreara en la siguiente solicitud")
+                self._executor = None
+
+    def _submit(self, op: str, fn, *args) -> Future:
+        self._admit()
+        submitted = time.monotonic()
+        if self.workers <= 0:
+            future: Future = Future()
+            try:
+                future.set_result(_timed(fn, *args))
+            except Exception as exc:
+                future.set_exception(exc)
+        else:
+            try:
+                future = self._get_executor().submit(_timed, fn, *args)
+            except Exception:
+                with self._lock:
+                    self.pending -= 1
+                raise
+        future.add_done_callback(lambda done: self._finish(op, submitted, done))
+        return future
+
+    def hash(self, password: str) -> str:
+        return self._submit("hash", get_password_hash, password).result()[0]
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit("verify", verify_password, plain_password, hashed_password).result()[0]
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return self._submit("verify", verify_and_update_password, plain_password, hashed_password).result()[0]
+
+    async def ahash(self, password: str) -> str:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.hash, password)
+        return (await asyncio.wrap_future(self._submit("hash", get_password_hash, password)))[0]
+
+    async def averify(self, plain_password: str, hashed_password: str) -> bool:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.verify, plain_password, hashed_password)
+        future = self._submit("verify", verify_password, plain_password, hashed_password)
+        return (await asyncio.wrap_future(future))[0]
+
+    async def averify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        if self.workers <= 0:
+            return await run_in_threadpool(self.verify_and_update, plain_password, hashed_password)
+        future = self._submit("verify", verify_and_update_password, plain_password, hashed_password)
+        return (await asyncio.wrap_future(future))[0]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "ops": {
+                    op: {
+                        "count": stats.count,
+                        "errors": stats.errors,
+                        "wait_ms_avg": round(stats.wait_seconds_total / stats.count * 1000, 2) if stats.count else 0.0,
+                        "wait_ms_max": round(stats.wait_seconds_max * 1000, 2),
+                        "run_ms_avg": round(stats.run_seconds_total / stats.count * 1000, 2) if stats.count else 0.0,
+                        "run_ms_max": round(stats.run_seconds_max * 1000, 2),
+                    }
+                    for op, stats in self.stats.items()
+                },
+            }
+
+    def metric_samples(self):
+        yield metrics.PASSWORD_POOL_PENDING, (), self.pending
+        yield metrics.PASSWORD_POOL_REJECTIONS, (), self.rejected
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordPool(
+    workers=settings.password_pool_workers,
+    max_pending=settings.password_pool_max_pending,
+    retry_after_seconds=settings.password_pool_retry_after_seconds,
+)
+metrics.registry.add_collector(password_pool.metric_samples)
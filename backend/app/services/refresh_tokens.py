@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import func, insert, literal, select, update
+
+from app.models import RefreshToken, User
+
+
+def rotate_refresh_token(token_hash: str, user_id: UUID, new_token_hash: str, expires_at: datetime):
+    """Revoke the presented token and insert its successor in one statement, returning the User.
+
+    The UPDATE only matches a live token, so two concurrent refreshes of the same token cannot
+    both succeed: the second waits for the first's row lock and then matches nothing. No row
+    comes back when the token is unknown, revoked or expired, or the user is inactive.
+    """
+    rotated = (
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > func.now(),
+        )
+        .values(revoked_at=func.now())
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .cte("rotated")
+    )
+    successor = (
+        select(
+            literal(uuid.uuid4()),
+            rotated.c.user_id,
+            rotated.c.family_id,
+            literal(new_token_hash),
+            literal(expires_at),
+            func.now(),
+        )
+        .join(User, User.id == rotated.c.user_id)
+        .where(User.is_active)
+    )
+    inserted = (
+        insert(RefreshToken)
+        .from_select(["id", "user_id", "family_id", "token_hash", "expires_at", "created_at"], successor)
+        .returning(RefreshToken.user_id)
+        .cte("inserted")
+    )
+    return select(User).join(inserted, User.id == inserted.c.user_id)
+
+
+def failed_rotation_statement(token_hash: str):
+    # Only runs when rotate_refresh_token() returned nothing, to tell reuse apart from the rest.
+    return (
+        select(RefreshToken.family_id, RefreshToken.revoked_at, RefreshToken.expires_at, User.is_active)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == token_hash)
+    )
+
+
+def is_token_reuse(row, grace_seconds: int) -> bool:
+    """A rotated token presented again after the grace period, i.e. a copy in someone else's hands.
+
+    Inside the grace period it is most likely a second tab that lost the rotation race.
+    """
+    now = datetime.now(timezone.utc)
+    return (
+        row.revoked_at is not None
+        and row.expires_at > now
+        and row.revoked_at < now - timedelta(seconds=grace_seconds)
+    )
+
+
+def revoke_family(family_id: UUID):
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
@@ -0,0 +1,78 @@
+from datetime import date
+from typing import Literal
+from uuid import UUID
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+
+from app.core.etag import range_version
+from app.models import DailyRecord, MonthlyRecord, WeeklyRecord, YearlyRecord
+from app.read_models import RollupRow, columns
+from app.services.daily_records import compliance_percent
+
+Granularity = Literal["week", "month", "year"]
+
+ROLLUP_MODELS = {"week": WeeklyRecord, "month": MonthlyRecord, "year": YearlyRecord}
+
+
+def period_start(granularity: Granularity, day: date) -> date:
+    """Python twin of date_trunc(): ISO week (Monday), first of month, first of year."""
+    if granularity == "week":
+        return date.fromordinal(day.toordinal() - day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def rollups_between(granularity: Granularity, user_id: UUID, start: date, end: date):
+    model = ROLLUP_MODELS[granularity]
+    return (
+        select(*columns(RollupRow, model))
+        .where(model.user_id == user_id, model.period_start >= period_start(granularity, start), model.period_start <= end)
+        .order_by(model.period_start.asc())
+    )
+
+
+def rollups_version(granularity: Granularity, user_id: UUID, start: date, end: date):
+    model = ROLLUP_MODELS[granularity]
+    return select(*range_version()).where(
+        model.user_id == user_id, model.period_start >= period_start(granularity, start), model.period_start <= end
+    )
+
+
+def rebuild_rollups(granularity: Granularity, user_id: UUID | None = None):
+    """Delete and re-aggregate one rollup table from daily_records, for repairs.
+
+    Run both statements in one transaction with daily_records locked against writes, otherwise the
+    trigger can apply a delta between the delete and the insert.
+    """
+    model = ROLLUP_MODELS[granularity]
+    period = cast(func.date_trunc(granularity, DailyRecord.date), Date)
+    sums = (
+        select(
+            DailyRecord.user_id,
+            period,
+            func.count(),
+            func.sum(DailyRecord.sessions_expected),
+            func.sum(DailyRecord.sessions_started),
+            func.sum(DailyRecord.sessions_completed),
+            compliance_percent(func.sum(DailyRecord.sessions_completed), func.sum(DailyRecord.sessions_expected)),
+        )
+        .group_by(DailyRecord.user_id, period)
+    )
+    clear = delete(model)
+    if user_id is not None:
+        sums = sums.where(DailyRecord.user_id == user_id)
+        clear = clear.where(model.user_id == user_id)
+    fill = insert(model).from_select(
+        [
+            "user_id",
+            "period_start",
+            "days_recorded",
+            "sessions_expected",
+            "sessions_started",
+            "sessions_completed",
+            "compliance_percent",
+        ],
+        sums,
+    )
+    return clear, fill
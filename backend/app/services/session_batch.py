@@ -0,0 +1,183 @@
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import BreakSession
+from app.read_models import SessionRow, columns
+from app.schemas import BreakSessionBatchItemIn, BreakSessionBatchResultOut
+
+COPY_COLUMNS = (
+    "id",
+    "user_id",
+    "date",
+    "started_at",
+    "completed_at",
+    "completed",
+    "exercise_ids",
+    "duration_planned_seconds",
+    "duration_actual_seconds",
+    "client_id",
+)
+COPY_TYPES = ("uuid", "uuid", "date", "timestamptz", "timestamptz", "bool", "text[]", "int4", "int4", "text")
+CLIENT_KEY = ("user_id", "date", "client_id")
+# A replayed item may carry the completion of a session stored uncompleted by an earlier sync
+# ("start offline, complete later, sync again"): that completion is applied, anything else in a
+# replay is ignored. Rows come back for inserts and for those completions, not for plain replays.
+COMPLETE_ON_CONFLICT = (
+    "completed = true, completed_at = excluded.completed_at, "
+    "duration_actual_seconds = excluded.duration_actual_seconds, updated_at = excluded.updated_at"
+)
+COMPLETE_ON_CONFLICT_WHERE = "excluded.completed AND NOT break_sessions.completed"
+# COPY cannot resolve conflicts, so large batches go through a staging table and the same
+# upsert as small ones.
+STAGING_SQL = "CREATE TEMP TABLE break_sessions_batch (LIKE break_sessions INCLUDING DEFAULTS) ON COMMIT DROP"
+COPY_SQL = f"COPY break_sessions_batch ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+MERGE_SQL = (
+    f"INSERT INTO break_sessions ({', '.join(COPY_COLUMNS)}) "
+    f"SELECT {', '.join(COPY_COLUMNS)} FROM break_sessions_batch "
+    f"ON CONFLICT ({', '.join(CLIENT_KEY)}) DO UPDATE SET {COMPLETE_ON_CONFLICT} "
+    f"WHERE {COMPLETE_ON_CONFLICT_WHERE} RETURNING id, date, client_id"
+)
+
+
+def insert_statement():
+    """Multi-row upsert for small batches; returns (id, date, client_id) of the rows inserted or
+    completed by a replay."""
+    # On the table, not the ORM entity: ORM bulk inserts leave None values out and start a new
+    # statement whenever the set of keys changes, so mixed started/completed items went one by one.
+    table = BreakSession.__table__
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=CLIENT_KEY,
+        set_={
+            "completed": True,
+            "completed_at": statement.excluded.completed_at,
+            "duration_actual_seconds": statement.excluded.duration_actual_seconds,
+            "updated_at": statement.excluded.updated_at,
+        },
+        where=statement.excluded.completed & ~table.c.completed,
+    ).returning(table.c.id, table.c.date, table.c.client_id)
+
+
+def replayed_sessions_statement(user_id: UUID, keys: list[tuple[date, str]]):
+    return select(*columns(SessionRow, BreakSession), BreakSession.client_id).where(
+        BreakSession.user_id == user_id,
+        tuple_(BreakSession.date, BreakSession.client_id).in_(keys),
+    )
+
+
+@dataclass
+class SessionBatch:
+    """Validated rows of a batch plus the per-item results, in request order.
+
+    Items whose clientId is already stored for that day (a retried offline sync) are not inserted
+    again, only their completion is applied to a stored uncompleted session; their result carries
+    the stored session. An item repeated within the batch becomes one row, completed if any of its
+    copies is.
+    """
+
+    rows: list[dict] = field(default_factory=list)
+    results: list[BreakSessionBatchResultOut] = field(default_factory=list)
+    inserted: set[UUID] = field(default_factory=set)
+    # (date, client_id) of stored sessions this batch completed.
+    completed: set[tuple[date, str]] = field(default_factory=set)
+    # (result index, row index) for every valid item.
+    _row_results: list[tuple[int, int]] = field(default_factory=list)
+
+    @classmethod
+    def build(
+        cls, user_id: UUID, items: list[BreakSessionBatchItemIn], parse_iso: Callable[[str], datetime]
+    ) -> "SessionBatch":
+        batch = cls()
+        by_key: dict[tuple[date, str], int] = {}
+        for item in items:
+            try:
+                completed_at = parse_iso(item.completedAt) if item.completedAt else None
+                row = {
+                    "id": uuid.uuid4(),
+                    "user_id": user_id,
+                    "date": date.fromisoformat(item.date),
+                    "started_at": parse_iso(item.startedAt),
+                    "completed_at": completed_at,
+                    "completed": completed_at is not None,
+                    "exercise_ids": item.exerciseIds,
+                    "duration_planned_seconds": item.durationPlannedSeconds,
+                    "duration_actual_seconds": item.durationActualSeconds if completed_at else 0,
+                    "client_id": item.clientId,
+                }
+            except ValueError:
+                batch.results.append(BreakSessionBatchResultOut(clientId=item.clientId, ok=False, error="Fecha invalida"))
+                continue
+            key = (row["date"], row["client_id"])
+            if key not in by_key:
+                by_key[key] = len(batch.rows)
+                batch.rows.append(row)
+            elif row["completed"] and not batch.rows[by_key[key]]["completed"]:
+                batch.rows[by_key[key]] = {**row, "id": batch.rows[by_key[key]]["id"]}
+            batch._row_results.append((len(batch.results), by_key[key]))
+            batch.results.append(BreakSessionBatchResultOut(clientId=item.clientId, ok=True))
+        return batch
+
+    def record(self, returned) -> None:
+        """returned: (id, date, client_id) rows of insert_statement() or MERGE_SQL."""
+        ids = {row["id"] for row in self.rows}
+        for session_id, day, client_id in returned:
+            if session_id in ids:
+                self.inserted.add(session_id)
+            else:
+                self.completed.add((day, client_id))
+
+    def replayed_keys(self) -> list[tuple[date, str]]:
+        """(date, client_id) of the rows the insert skipped."""
+        return [(row["date"], row["client_id"]) for row in self.rows if row["id"] not in self.inserted]
+
+    def daily_deltas(self) -> dict[date, tuple[int, int]]:
+        deltas: dict[date, list[int]] = defaultdict(lambda: [0, 0])
+        for row in self.rows:
+            if row["id"] in self.inserted:
+                deltas[row["date"]][0] += 1
+                deltas[row["date"]][1] += int(row["completed"])
+            elif (row["date"], row["client_id"]) in self.completed:
+                deltas[row["date"]][1] += 1
+        return {day: (started, completed) for day, (started, completed) in deltas.items()}
+
+    def finish(self, to_out, replayed=()) -> list[BreakSessionBatchResultOut]:
+        """replayed: rows of replayed_sessions_statement for replayed_keys()."""
+        stored = {(row.date, row.client_id): SessionRow(*row[:-1]) for row in replayed}
+        for index, row_index in self._row_results:
+            row = self.rows[row_index]
+            if row["id"] in self.inserted:
+                session = BreakSession(**row)
+            else:
+                session = stored[(row["date"], row["client_id"])]
+            self.results[index].session = to_out(session)
+        return self.results
+
+    def copy_records(self):
+        return (tuple(row[column] for column in COPY_COLUMNS) for row in self.rows)
+
+
+def copy_sessions(cursor, batch: SessionBatch) -> None:
+    cursor.execute(STAGING_SQL)
+    with cursor.copy(COPY_SQL) as copy:
+        copy.set_types(COPY_TYPES)
+        for record in batch.copy_records():
+            copy.write_row(record)
+    cursor.execute(MERGE_SQL)
+    batch.record(cursor.fetchall())
+
+
+async def copy_sessions_async(cursor, batch: SessionBatch) -> None:
+    await cursor.execute(STAGING_SQL)
+    async with cursor.copy(COPY_SQL) as copy:
+        copy.set_types(COPY_TYPES)
+        for record in batch.copy_records():
+            await copy.write_row(record)
+    await cursor.execute(MERGE_SQL)
+    batch.record(await cursor.fetchall())
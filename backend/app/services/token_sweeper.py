@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import direct_engine
+
+logger = logging.getLogger(__name__)
+
+# Rows nobody can use anymore. Revoked refresh tokens are kept for a grace period so a replayed
+# token is still recognised as revoked instead of just unknown; emails the outbox gave up on are
+# kept EMAIL_OUTBOX_FAILED_RETENTION_HOURS for debugging (sent ones are deleted right away).
+SWEEPS = {
+    "refresh_tokens": "expires_at < :now OR revoked_at < :revoked_before",
+    "password_reset_tokens": "expires_at < :now OR used_at < :revoked_before",
+    "email_outbox": "failed_at < :failed_before",
+}
+LOCK_KEY = "token_sweeper"
+
+
+def _batch_statement(table: str, condition: str):
+    # SKIP LOCKED leaves rows a concurrent refresh/logout is revoking for the next run.
+    return text(
+        f"DELETE FROM {table} WHERE ctid IN ("
+        f"SELECT ctid FROM {table} WHERE {condition} LIMIT :limit FOR UPDATE SKIP LOCKED)"
+    )
+
+
+def sweep_tokens(
+    engine: Engine,
+    batch_size: int,
+    pause_seconds: float,
+    revoked_grace: timedelta,
+    failed_email_retention: timedelta,
+    max_batches: int | None = None,
+    stop: threading.Event | None = None,
+) -> dict[str, int] | None:
+    """Delete dead tokens in short transactions of at most batch_size rows each.
+
+    Pausing between batches keeps WAL and replication lag flat. Returns the rows deleted per
+    table, or None when another worker holds the sweep lock.
+    """
+    now = datetime.now(timezone.utc)
+    params = {
+        "now": now,
+        "revoked_before": now - revoked_grace,
+        "failed_before": now - failed_email_retention,
+        "limit": batch_size,
+    }
+    deleted = {table: 0 for table in SWEEPS}
+    batches = 0
+    with engine.connect() as conn:
+        if not conn.scalar(text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": LOCK_KEY}):
+            conn.rollback()
+            return None
+        conn.commit()
+        try:
+            for table, condition in SWEEPS.items():
+                stmt = _batch_statement(table, condition)
+                while max_batches is None or batches < max_batches:
+                    count = conn.execute(stmt, params).rowcount
+                    conn.commit()
+                    batches += 1
+                    deleted[table] += count
+                    if count < batch_size:
+                        break
+                    if stop is None:
+                        time.sleep(pause_seconds)
+                    elif stop.wait(pause_seconds):
+                        return deleted
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": LOCK_KEY})
+            conn.commit()
+    return deleted
+
+
+class TokenSweeper:
+    """Runs sweep_tokens() every interval on a daemon thread; one worker sweeps at a time."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.runs = 0
+        self.last_run: dict | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="token-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run_once(self) -> dict[str, int] | None:
+        started = time.monotonic()
+        deleted = sweep_tokens(
+            self.engine,
+            settings.token_sweeper_batch_size,
+            settings.token_sweeper_pause_seconds,
+            timedelta(hours=settings.token_sweeper_revoked_grace_hours),
+            timedelta(hours=settings.email_outbox_failed_retention_hours),
+            stop=self._stop,
+        )
+        if deleted is not None:
+            self.runs += 1
+            self.last_run = {
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "seconds": round(time.monotonic() - started, 3),
+                "deleted": deleted,
+            }
+            logger.info("Tokens eliminados: %s", deleted)
+        return deleted
+
+    def snapshot(self) -> dict:
+        return {"enabled": settings.token_sweeper_enabled, "runs": self.runs, "last_run": self.last_run}
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.token_sweeper_interval_seconds):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Fallo la limpieza de tokens, se reintenta en el siguiente intervalo")
+
+
+token_sweeper = TokenSweeper(direct_engine)
@@ -0,0 +1,27 @@
+from uuid import UUID
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core import auth_cache
+from app.models import RefreshToken, User
+
+
+def deactivate_user(db: Session, user_id: UUID) -> bool:
+    """Deactivate the user and revoke their refresh tokens; False when already inactive or unknown.
+
+    Commits: the NOTIFY goes out with the commit, and every worker's auth cache then drops the
+    user's state and token payloads.
+    """
+    deactivated = db.execute(
+        update(User).where(User.id == user_id, User.is_active).values(is_active=False, updated_at=func.now())
+    ).rowcount
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
+    db.execute(auth_cache.invalidation_statement(user_id))
+    db.commit()
+    auth_cache.invalidate_user(user_id)
+    return deactivated > 0
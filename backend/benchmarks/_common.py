@@ -0,0 +1,18 @@
+import uuid
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def register_user(client: httpx.AsyncClient, prefix: str = "bench") -> str:
+    email = f"{prefix}-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/auth/register", json={"email": email, "password": "Bench1234!"})
+    response.raise_for_status()
+    return response.json()["access_token"]
@@ -0,0 +1,83 @@
+"""Throughput / p99 benchmark for the sync vs async database modes.
+
+Start the API once per mode and run this script against it:
+
+    DB_ASYNC_MODE=false uvicorn app.main:app --workers 1
+    python benchmarks/bench_db_modes.py --label sync
+
+    DB_ASYNC_MODE=true uvicorn app.main:app --workers 1
+    python benchmarks/bench_db_modes.py --label async
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date
+
+import httpx
+from _common import percentile, register_user
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark authenticated read endpoints.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--label", default="run", help="Name printed with the results (e.g. sync/async)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run (default: 20)")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+async def _worker(client: httpx.AsyncClient, token: str, deadline: float, latencies: list[float], errors: list[int]) -> None:
+    today = date.today().isoformat()
+    headers = {"Authorization": f"Bearer {token}"}
+    requests = (
+        ("/settings/me", None),
+        ("/history/sessions", {"from": today, "to": today}),
+    )
+    i = 0
+    while time.perf_counter() < deadline:
+        path, params = requests[i % len(requests)]
+        i += 1
+        started = time.perf_counter()
+        response = await client.get(path, params=params, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await register_user(client)
+        latencies: list[float] = []
+        errors: list[int] = []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(_worker(client, token, deadline, latencies, errors) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "label": args.label,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
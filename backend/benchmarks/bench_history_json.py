@@ -0,0 +1,139 @@
+"""Pydantic vs SQL-rendered JSON (HISTORY_SQL_JSON) for 10k-row history responses.
+
+Runs the API in-process against DATABASE_URL with a temporary user (deleted afterwards) and times
+GET /history/sessions and GET /history/daily-records on both paths:
+
+    python benchmarks/bench_history_json.py --rows 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# One page has to hold every row; Query(le=...) reads this at import time.
+os.environ.setdefault("HISTORY_PAGE_MAX_SIZE", "100000")
+
+from _common import percentile  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import BreakSession, DailyRecord, User, UserSettings  # noqa: E402
+
+SESSIONS_PER_DAY = 4
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark SQL-rendered vs Pydantic history responses.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per response (default: 10000)")
+    parser.add_argument("--samples", type=int, default=30, help="Timed requests per endpoint and path")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+def _seed(user_id: uuid.UUID, rows: int) -> tuple[date, date, date]:
+    today = date.today()
+    session_days = -(-rows // SESSIONS_PER_DAY)
+    sessions = []
+    for i in range(rows):
+        day = today - timedelta(days=i // SESSIONS_PER_DAY)
+        started_at = datetime(day.year, day.month, day.day, 8 + 2 * (i % SESSIONS_PER_DAY), 0, 1, i % 1000, tzinfo=timezone.utc)
+        sessions.append(
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "date": day,
+                "started_at": started_at,
+                "completed_at": started_at + timedelta(minutes=10) if i % 2 else None,
+                "completed": bool(i % 2),
+                "exercise_ids": ["visual-20-20-20", "neck-stretch"],
+                "duration_planned_seconds": 600,
+                "duration_actual_seconds": 590 if i % 2 else 0,
+            }
+        )
+    records = [
+        {
+            "user_id": user_id,
+            "date": today - timedelta(days=offset),
+            "sessions_expected": 4,
+            "sessions_started": 4,
+            "sessions_completed": offset % 5,
+            "compliance_percent": (offset % 5) * 25,
+        }
+        for offset in range(rows)
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(BreakSession), sessions)
+        db.execute(insert(DailyRecord), records)
+        db.commit()
+    return today - timedelta(days=session_days - 1), today - timedelta(days=rows - 1), today
+
+
+def _time(client: TestClient, path: str, params: dict, headers: dict, samples: int) -> dict:
+    client.get(path, params=params, headers=headers)  # warm-up
+    timings = []
+    size = 0
+    for _ in range(samples):
+        started = time.perf_counter()
+        response = client.get(path, params=params, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "bytes": size,
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    user_id = uuid.uuid4()
+    with SessionLocal() as db:
+        db.add(User(id=user_id, email=f"bench-json-{user_id.hex[:12]}@example.com", password_hash="x"))
+        db.add(UserSettings(user_id=user_id))
+        db.commit()
+
+    report = {"rows": args.rows, "db_async_mode": settings.db_async_mode}
+    try:
+        sessions_from, records_from, today = _seed(user_id, args.rows)
+        headers = {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+        endpoints = {
+            "sessions": ("/history/sessions", {"from": sessions_from.isoformat(), "to": today.isoformat(), "limit": args.rows}),
+            "daily-records": ("/history/daily-records", {"from": records_from.isoformat(), "to": today.isoformat()}),
+        }
+        original = settings.history_sql_json
+        with TestClient(app) as client:
+            try:
+                for label, sql_json in (("pydantic", False), ("sql_json", True)):
+                    settings.history_sql_json = sql_json
+                    report[label] = {
+                        name: _time(client, path, params, headers, args.samples)
+                        for name, (path, params) in endpoints.items()
+                    }
+            finally:
+                settings.history_sql_json = original
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(User).where(User.id == user_id))
+            db.commit()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
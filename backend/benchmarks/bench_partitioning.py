@@ -0,0 +1,171 @@
+"""Plain vs monthly-partitioned break_sessions on a synthetic dataset (default 50M rows).
+
+Builds both layouts side by side in the bench_plain / bench_part schemas of DATABASE_URL, times the
+history queries and a VACUUM of the hot month, then drops the schemas (unless --keep).
+
+    python benchmarks/bench_partitioning.py --rows 50000000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _common import percentile  # noqa: E402
+
+from app.core.database import engine  # noqa: E402
+from app.services.partitions import add_months, month_start  # noqa: E402
+
+SESSIONS_PER_DAY = 4
+COLUMNS = """
+    id uuid NOT NULL,
+    user_id uuid NOT NULL,
+    date date NOT NULL,
+    started_at timestamptz NOT NULL,
+    completed_at timestamptz,
+    completed boolean NOT NULL,
+    exercise_ids varchar[] NOT NULL,
+    duration_planned_seconds integer NOT NULL,
+    duration_actual_seconds integer NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+"""
+QUERIES = {
+    "sessions today": (
+        "SELECT * FROM {schema}.break_sessions WHERE user_id = :user_id AND date >= :today AND date <= :today "
+        "ORDER BY started_at, id"
+    ),
+    "sessions 30 days": (
+        "SELECT * FROM {schema}.break_sessions WHERE user_id = :user_id AND date >= :month_ago AND date <= :today "
+        "ORDER BY started_at, id LIMIT 501"
+    ),
+    "etag version 30 days": (
+        "SELECT count(*), max(updated_at) FROM {schema}.break_sessions "
+        "WHERE user_id = :user_id AND date >= :month_ago AND date <= :today"
+    ),
+    "session by id": "SELECT * FROM {schema}.break_sessions WHERE id = :session_id AND user_id = :user_id FOR UPDATE",
+}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark plain vs partitioned break_sessions.")
+    parser.add_argument("--rows", type=int, default=50_000_000, help="Synthetic sessions (default: 50M)")
+    parser.add_argument("--months", type=int, default=24, help="Months of history (default: 24)")
+    parser.add_argument("--samples", type=int, default=300, help="Timed executions per query and layout")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schemas afterwards")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+def _create(conn, months: list[date]) -> None:
+    conn.execute(text("DROP SCHEMA IF EXISTS bench_plain CASCADE"))
+    conn.execute(text("DROP SCHEMA IF EXISTS bench_part CASCADE"))
+    conn.execute(text("CREATE SCHEMA bench_plain"))
+    conn.execute(text("CREATE SCHEMA bench_part"))
+    conn.execute(text(f"CREATE TABLE bench_plain.break_sessions ({COLUMNS}, PRIMARY KEY (id))"))
+    conn.execute(text(f"CREATE TABLE bench_part.break_sessions ({COLUMNS}, PRIMARY KEY (id, date)) PARTITION BY RANGE (date)"))
+    conn.execute(text("CREATE TABLE bench_part.break_sessions_default PARTITION OF bench_part.break_sessions DEFAULT"))
+    for month in months:
+        conn.execute(
+            text(
+                f"CREATE TABLE bench_part.break_sessions_y{month.year}m{month.month:02d} "
+                f"PARTITION OF bench_part.break_sessions FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+        )
+
+
+def _seed(conn, users: int, first_day: date, days: int) -> None:
+    conn.execute(
+        text(
+            "INSERT INTO bench_plain.break_sessions (id, user_id, date, started_at, completed_at, completed, "
+            "exercise_ids, duration_planned_seconds, duration_actual_seconds) "
+            "SELECT gen_random_uuid(), u.id, d.day, d.day + make_interval(hours => 8 + s * 2), NULL, s % 2 = 0, "
+            "ARRAY['visual-20-20-20'], 600, 0 "
+            "FROM (SELECT md5(g::text)::uuid AS id FROM generate_series(1, :users) g) u "
+            "CROSS JOIN (SELECT :first_day + g AS day FROM generate_series(0, :days - 1) g) d "
+            "CROSS JOIN generate_series(1, :per_day) s"
+        ),
+        {"users": users, "first_day": first_day, "days": days, "per_day": SESSIONS_PER_DAY},
+    )
+    conn.execute(text("INSERT INTO bench_part.break_sessions SELECT * FROM bench_plain.break_sessions"))
+    for schema in ("bench_plain", "bench_part"):
+        conn.execute(text(f"CREATE INDEX ON {schema}.break_sessions (user_id, date, started_at)"))
+        conn.execute(text(f"ANALYZE {schema}.break_sessions"))
+
+
+def _time_queries(conn, schema: str, users: int, today: date, samples: int, rng: random.Random) -> dict:
+    results = {}
+    for name, sql in QUERIES.items():
+        stmt = text(sql.format(schema=schema))
+        timings = []
+        for _ in range(samples):
+            user_id = conn.scalar(text("SELECT md5(CAST(:g AS text))::uuid"), {"g": rng.randint(1, users)})
+            params = {"user_id": user_id, "today": today, "month_ago": today - timedelta(days=30)}
+            if name == "session by id":
+                params["session_id"] = conn.scalar(
+                    text(f"SELECT id FROM {schema}.break_sessions WHERE user_id = :user_id AND date = :today LIMIT 1"),
+                    params,
+                )
+            started = time.perf_counter()
+            conn.execute(stmt, params).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+        }
+    return results
+
+
+def _hot_month(conn, schema: str, month: date) -> dict:
+    table = f"{schema}.break_sessions"
+    if schema == "bench_part":
+        table = f"bench_part.break_sessions_y{month.year}m{month.month:02d}"
+    # What daily maintenance has to touch: the whole heap vs just the current month.
+    size = conn.scalar(text("SELECT pg_total_relation_size(CAST(:table AS regclass))"), {"table": table})
+    started = time.perf_counter()
+    conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+    return {"table": table, "total_mb": round(size / 1024 / 1024, 1), "vacuum_s": round(time.perf_counter() - started, 2)}
+
+
+def main() -> None:
+    args = _parse_args()
+    today = date.today()
+    first_month = add_months(month_start(today), -(args.months - 1))
+    days = (today - first_month).days + 1
+    users = max(1, args.rows // (days * SESSIONS_PER_DAY))
+    months = [add_months(first_month, offset) for offset in range(args.months + 1)]
+    rng = random.Random(42)
+
+    report = {"rows": users * days * SESSIONS_PER_DAY, "users": users, "days": days, "partitions": len(months)}
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        _create(conn, months)
+        started = time.perf_counter()
+        _seed(conn, users, first_month, days)
+        report["seed_s"] = round(time.perf_counter() - started, 1)
+        try:
+            for schema in ("bench_plain", "bench_part"):
+                report[schema] = {
+                    "queries": _time_queries(conn, schema, users, today, args.samples, rng),
+                    "hot_month": _hot_month(conn, schema, month_start(today)),
+                }
+        finally:
+            if not args.keep:
+                conn.execute(text("DROP SCHEMA bench_plain CASCADE"))
+                conn.execute(text("DROP SCHEMA bench_part CASCADE"))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
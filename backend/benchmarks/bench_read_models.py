@@ -0,0 +1,179 @@
+"""ORM entities vs column-projected __slots__ read models (app.read_models) on the history read paths.
+
+Seeds a temporary user (deleted afterwards) in DATABASE_URL and reports time per 1k rows and
+retained memory per row for break_sessions and daily_records:
+
+    python benchmarks/bench_read_models.py --rows 10000
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _common import percentile  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.models import BreakSession, DailyRecord, User, UserSettings  # noqa: E402
+from app.read_models import DailyRecordRow, SessionRow, to_rows  # noqa: E402
+from app.routers.history import _daily_to_out, _session_to_out, daily_records_between, sessions_between  # noqa: E402
+
+SESSIONS_PER_DAY = 4
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ORM entities vs projected read models.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows loaded per query (default: 10000)")
+    parser.add_argument("--samples", type=int, default=20, help="Timed loads per table and path")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+def _seed(user_id: uuid.UUID, rows: int) -> tuple[date, date]:
+    today = date.today()
+    sessions = []
+    for i in range(rows):
+        day = today - timedelta(days=i // SESSIONS_PER_DAY)
+        started_at = datetime(day.year, day.month, day.day, 8 + 2 * (i % SESSIONS_PER_DAY), tzinfo=timezone.utc)
+        sessions.append(
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "date": day,
+                "started_at": started_at,
+                "completed_at": started_at + timedelta(minutes=10) if i % 2 else None,
+                "completed": bool(i % 2),
+                "exercise_ids": ["visual-20-20-20", "neck-stretch"],
+                "duration_planned_seconds": 600,
+                "duration_actual_seconds": 590 if i % 2 else 0,
+            }
+        )
+    records = [
+        {
+            "user_id": user_id,
+            "date": today - timedelta(days=offset),
+            "sessions_expected": 4,
+            "sessions_started": 4,
+            "sessions_completed": offset % 5,
+            "compliance_percent": (offset % 5) * 25,
+        }
+        for offset in range(rows)
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(BreakSession), sessions)
+        db.execute(insert(DailyRecord), records)
+        db.commit()
+    return today - timedelta(days=rows - 1), today
+
+
+def _loaders(user_id: uuid.UUID, start: date, end: date) -> dict:
+    # Same filters and order as the endpoints; only what gets materialized differs.
+    def orm_sessions(db):
+        stmt = select(BreakSession).where(
+            BreakSession.user_id == user_id, BreakSession.date >= start, BreakSession.date <= end
+        ).order_by(BreakSession.started_at.asc(), BreakSession.id.asc())
+        return db.scalars(stmt).all()
+
+    def orm_daily_records(db):
+        stmt = select(DailyRecord).where(
+            DailyRecord.user_id == user_id, DailyRecord.date >= start, DailyRecord.date <= end
+        ).order_by(DailyRecord.date.asc())
+        return db.scalars(stmt).all()
+
+    return {
+        "sessions": (
+            _session_to_out,
+            {
+                "orm": orm_sessions,
+                "read_model": lambda db: to_rows(SessionRow, db.execute(sessions_between(user_id, start, end))),
+            },
+        ),
+        "daily_records": (
+            _daily_to_out,
+            {
+                "orm": orm_daily_records,
+                "read_model": lambda db: to_rows(DailyRecordRow, db.execute(daily_records_between(user_id, start, end))),
+            },
+        ),
+    }
+
+
+def _time(load, to_out, samples: int) -> dict:
+    load_ms, total_ms = [], []
+    rows = 0
+    for _ in range(samples + 1):
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            items = load(db)
+            loaded = time.perf_counter()
+            [to_out(item) for item in items]
+            finished = time.perf_counter()
+        rows = len(items)
+        load_ms.append((loaded - started) * 1000)
+        total_ms.append((finished - started) * 1000)
+    # First run is warm-up (statement cache, mapper configuration).
+    load_ms, total_ms = load_ms[1:], total_ms[1:]
+    per_1k = 1000 / max(rows, 1)
+    return {
+        "rows": rows,
+        "load_ms_per_1k_p50": round(statistics.median(load_ms) * per_1k, 2),
+        "load_ms_per_1k_p95": round(percentile(load_ms, 95) * per_1k, 2),
+        "load_and_serialize_ms_per_1k_p50": round(statistics.median(total_ms) * per_1k, 2),
+    }
+
+
+def _memory(load) -> float:
+    # Bytes still allocated after the load with the results and their session alive, i.e. what a
+    # request holds while it builds the response (ORM: instances, states and the identity map).
+    with SessionLocal() as db:
+        load(db)  # warm-up outside the measurement
+        db.expunge_all()
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        items = load(db)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return round(retained / max(len(items), 1), 1)
+
+
+def main() -> None:
+    args = _parse_args()
+    user_id = uuid.uuid4()
+    with SessionLocal() as db:
+        db.add(User(id=user_id, email=f"bench-rows-{user_id.hex[:12]}@example.com", password_hash="x"))
+        db.add(UserSettings(user_id=user_id))
+        db.commit()
+
+    report: dict = {}
+    try:
+        start, end = _seed(user_id, args.rows)
+        for table, (to_out, paths) in _loaders(user_id, start, end).items():
+            report[table] = {}
+            for path, load in paths.items():
+                result = _time(load, to_out, args.samples)
+                result["bytes_per_row"] = _memory(load)
+                report[table][path] = result
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(User).where(User.id == user_id))
+            db.commit()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
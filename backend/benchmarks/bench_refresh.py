@@ -0,0 +1,81 @@
+"""Latency of POST /auth/refresh with token rotation.
+
+Each worker registers its own user and keeps rotating its refresh cookie, so requests never race
+on the same token family. Disable the /auth/ rate limit for the run:
+
+    RATE_LIMIT_ROUTES='{}' uvicorn app.main:app --workers 1
+    python benchmarks/bench_refresh.py --label after
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+from _common import percentile
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark refresh token rotation.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--label", default="run", help="Name printed with the results (e.g. before/after)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run (default: 20)")
+    parser.add_argument("--cookie-name", default="pausas_refresh_token", help="REFRESH_COOKIE_NAME of the API")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+async def _worker(
+    client: httpx.AsyncClient, cookie_name: str, deadline: float, latencies: list[float], errors: list[int]
+) -> None:
+    email = f"bench-refresh-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/auth/register", json={"email": email, "password": "Bench1234!"})
+    response.raise_for_status()
+    # Sent by hand: the cookie is Secure and the benchmark usually talks plain HTTP.
+    token = response.cookies[cookie_name]
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/auth/refresh", headers={"Cookie": f"{cookie_name}={token}"})
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+            return
+        token = response.cookies[cookie_name]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        latencies: list[float] = []
+        errors: list[int] = []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(_worker(client, args.cookie_name, deadline, latencies, errors) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    return {
+        "label": args.label,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
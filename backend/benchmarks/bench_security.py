@@ -0,0 +1,106 @@
+"""Micro-benchmarks for app.core.security: argon2 hash/verify/rehash, JWT encode/decode, hash_token.
+
+Runs in-process with the ARGON2_* parameters from the environment, so it shows what a
+calibration (scripts/calibrate_argon2.py) buys:
+
+    python benchmarks/bench_security.py
+    ARGON2_TIME_COST=2 ARGON2_MEMORY_COST=47104 ARGON2_PARALLELISM=1 python benchmarks/bench_security.py
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from _common import percentile  # noqa: E402
+from passlib.hash import argon2  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import (  # noqa: E402
+    create_access_token,
+    create_refresh_token,
+    decode_access_token,
+    decode_refresh_token,
+    get_password_hash,
+    hash_token,
+    verify_and_update_password,
+    verify_password,
+)
+
+PASSWORD = "Bench1234!"
+SUBJECT = "6f1c1b1e-3b7a-4f43-9a39-5d0c2f1d7e10"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark password hashing, JWT and token hashing.")
+    parser.add_argument("--argon2-iterations", type=int, default=30, help="Timed calls per argon2 op (default: 30)")
+    parser.add_argument("--iterations", type=int, default=20_000, help="Timed calls per fast op (default: 20000)")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+def _time(fn, iterations: int) -> dict:
+    fn()  # warm-up
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    total = sum(timings)
+    return {
+        "iterations": iterations,
+        "ops_per_s": round(iterations / total, 1),
+        "mean_us": round(total / iterations * 1e6, 2),
+        "p50_us": round(percentile(timings, 50) * 1e6, 2),
+        "p99_us": round(percentile(timings, 99) * 1e6, 2),
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    hashed = get_password_hash(PASSWORD)
+    # A hash made with other parameters, so verify_and_update takes the rehash path every time.
+    outdated = argon2.using(
+        time_cost=settings.argon2_time_cost + 1, memory_cost=settings.argon2_memory_cost, parallelism=1
+    ).hash(PASSWORD)
+    access_token = create_access_token(SUBJECT)
+    refresh_token, _ = create_refresh_token(SUBJECT)
+
+    slow = {
+        "argon2_hash": lambda: get_password_hash(PASSWORD),
+        "argon2_verify": lambda: verify_password(PASSWORD, hashed),
+        "argon2_verify_and_update_current": lambda: verify_and_update_password(PASSWORD, hashed),
+        "argon2_verify_and_update_rehash": lambda: verify_and_update_password(PASSWORD, outdated),
+    }
+    fast = {
+        "jwt_encode_access": lambda: create_access_token(SUBJECT),
+        "jwt_decode_access": lambda: decode_access_token(access_token),
+        "jwt_encode_refresh": lambda: create_refresh_token(SUBJECT),
+        "jwt_decode_refresh": lambda: decode_refresh_token(refresh_token),
+        "hash_token": lambda: hash_token(refresh_token),
+    }
+    results = {
+        "argon2": {
+            "time_cost": settings.argon2_time_cost,
+            "memory_cost": settings.argon2_memory_cost,
+            "parallelism": settings.argon2_parallelism,
+        },
+        "ops": {},
+    }
+    for name, fn in slow.items():
+        results["ops"][name] = _time(fn, args.argon2_iterations)
+    for name, fn in fast.items():
+        results["ops"][name] = _time(fn, args.iterations)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Replay an offline day of pauses: one request per create/complete vs POST /history/sessions:batch.
+
+    uvicorn app.main:app
+    python benchmarks/bench_session_batch.py --sessions 500
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+from _common import register_user
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare individual vs batched session ingestion.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+def _sessions(count: int) -> list[dict]:
+    start = datetime.combine(date.today() - timedelta(days=30), datetime.min.time(), tzinfo=timezone.utc)
+    items = []
+    for i in range(count):
+        started_at = start + timedelta(minutes=37 * i)
+        items.append(
+            {
+                "clientId": str(i),
+                "date": started_at.date().isoformat(),
+                "startedAt": started_at.isoformat(),
+                "exerciseIds": ["visual-20-20-20"],
+                "durationPlannedSeconds": 600,
+                "completedAt": (started_at + timedelta(minutes=10)).isoformat(),
+                "durationActualSeconds": 600,
+            }
+        )
+    return items
+
+
+async def _individual(client: httpx.AsyncClient, headers: dict, items: list[dict]) -> float:
+    started = time.perf_counter()
+    for item in items:
+        created = await client.post(
+            "/history/sessions",
+            headers=headers,
+            json={key: item[key] for key in ("date", "startedAt", "exerciseIds", "durationPlannedSeconds")},
+        )
+        created.raise_for_status()
+        completed = await client.patch(
+            f"/history/sessions/{created.json()['id']}/complete",
+            headers=headers,
+            json={"completedAt": item["completedAt"], "durationActualSeconds": item["durationActualSeconds"]},
+        )
+        completed.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def _batched(client: httpx.AsyncClient, headers: dict, items: list[dict]) -> float:
+    started = time.perf_counter()
+    response = await client.post("/history/sessions:batch", headers=headers, json=items)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> dict:
+    items = _sessions(args.sessions)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300) as client:
+        individual_headers = {"Authorization": f"Bearer {await register_user(client)}"}
+        batch_headers = {"Authorization": f"Bearer {await register_user(client)}"}
+        individual = await _individual(client, individual_headers, items)
+        batched = await _batched(client, batch_headers, items)
+    return {
+        "sessions": args.sessions,
+        "individual_seconds": round(individual, 3),
+        "individual_requests": 2 * args.sessions,
+        "batch_seconds": round(batched, 3),
+        "speedup": round(individual / batched, 1) if batched else None,
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Cost of the SQL instrumentation cursor hooks (SQL_INSTRUMENTATION_ENABLED) per statement.
+
+Times `SELECT 1` on two single-connection engines against DATABASE_URL, one with the
+app.core.sql_stats hooks and one without, alternating rounds so both see the same load:
+
+    python benchmarks/bench_sql_hooks.py --statements 3000 --rounds 21
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.core import sql_stats  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import connect_args  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the SQL instrumentation hooks per statement.")
+    parser.add_argument("--statements", type=int, default=3000, help="Timed statements per round (default: 3000)")
+    parser.add_argument("--rounds", type=int, default=21, help="Rounds per engine, alternated (default: 21)")
+    parser.add_argument("--output", help="Optional JSON file to write the results to")
+    return parser.parse_args()
+
+
+def _round(engine, statements: int) -> float:
+    """Microseconds per statement; inside count_queries() as during a request."""
+    stmt = text("SELECT 1")
+    with engine.connect() as conn, sql_stats.count_queries():
+        for _ in range(200):
+            conn.execute(stmt)
+        started = time.perf_counter()
+        for _ in range(statements):
+            conn.execute(stmt)
+        return (time.perf_counter() - started) / statements * 1e6
+
+
+def main() -> None:
+    args = _parse_args()
+    plain = create_engine(settings.database_url, pool_size=1, connect_args=connect_args())
+    hooked = create_engine(settings.database_url, pool_size=1, connect_args=connect_args())
+    sql_stats.instrument(hooked)
+
+    samples = {"plain": [], "hooked": []}
+    for _ in range(args.rounds):
+        samples["plain"].append(_round(plain, args.statements))
+        samples["hooked"].append(_round(hooked, args.statements))
+    report = {
+        "statements": args.statements,
+        "rounds": args.rounds,
+        "plain_us": round(statistics.median(samples["plain"]), 1),
+        "hooked_us": round(statistics.median(samples["hooked"]), 1),
+        # Paired by round: both engines ran back to back under the same background load.
+        "overhead_us": round(statistics.median(h - p for h, p in zip(samples["hooked"], samples["plain"])), 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""Load test that replays a compressed PWA workday against a running API.
+
+Every virtual user follows the client's real schedule, on a simulated clock that runs --speed
+times faster than wall time:
+
+- logs in during the shift-start wave (the first --login-wave-minutes)
+- on every app focus (Poisson, --focus-per-hour) reads GET /settings/me and today's
+  GET /history/sessions, revalidating with If-None-Match like the browser does
+- POSTs /auth/refresh every --refresh-minutes
+- starts a break every work_interval_minutes and completes it break_duration_minutes later
+
+Users, their settings and their schedules come from --seed, so two runs send the same traffic.
+While it runs the script scrapes /metrics (METRICS_ENABLED=true, with --metrics-secret or
+$METRICS_SECRET) for pool and threadpool saturation. Results are saved as JSON; compare two runs
+with compare_workday.py:
+
+    RATE_LIMIT_ROUTES='{}' uvicorn app.main:app --workers 1
+    python benchmarks/bench_workday.py --label before --output before.json
+    python benchmarks/bench_workday.py --label after --output after.json
+    python benchmarks/compare_workday.py before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.cookies import SimpleCookie
+
+import httpx
+from _common import percentile
+
+PASSWORD = "Bench1234!"
+REFRESH_COOKIE = "pausas_refresh_token"
+EXERCISES = ["neck-rolls", "shoulder-shrugs", "visual-20-20-20", "wrist-stretch"]
+METRIC_LINE = re.compile(r'^(\w+)(?:\{([^}]*)\})? (\S+)$')
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a compressed PWA workday against the API.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--label", default="run", help="Name stored with the results (e.g. the commit)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--hours", type=float, default=8.0, help="Simulated workday length (default: 8)")
+    parser.add_argument(
+        "--speed", type=float, default=480.0, help="Simulated seconds per real second (default: 480, 8h in 60s)"
+    )
+    parser.add_argument("--login-wave-minutes", type=float, default=15.0)
+    parser.add_argument("--refresh-minutes", type=float, default=15.0)
+    parser.add_argument("--focus-per-hour", type=float, default=4.0)
+    parser.add_argument(
+        "--work-intervals", default="45,60,90,120", help="work_interval_minutes values assigned to users"
+    )
+    parser.add_argument("--break-minutes", default="5,10", help="break_duration_minutes values assigned to users")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--setup-concurrency", type=int, default=8, help="Parallel registrations during setup")
+    parser.add_argument("--scrape-interval", type=float, default=0.5, help="Seconds between /metrics scrapes")
+    parser.add_argument(
+        "--metrics-secret", default=os.environ.get("METRICS_SECRET"), help="METRICS_SECRET of the API for /metrics"
+    )
+    parser.add_argument("--output", help="JSON file to write the results to")
+    return parser.parse_args()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        # Real seconds each event started behind its schedule; large values mean the API (or this
+        # client) could not keep up with --speed and the results describe a lighter load.
+        self.lag: list[float] = []
+
+    async def request(
+        self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[route].append(time.perf_counter() - started)
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(self.latencies):
+            samples = self.latencies[route]
+            routes[route] = {
+                "requests": len(samples),
+                "errors": self.errors[route],
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+        return routes
+
+
+class User:
+    def __init__(self, index: int, seed: int, email: str, work_interval: int, break_minutes: int):
+        self.rng = random.Random(seed * 1_000_003 + index)
+        self.email = email
+        self.work_interval = work_interval
+        self.break_minutes = break_minutes
+        self.token = ""
+        self.refresh_cookie = ""
+        self.sessions_etag: str | None = None
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def take_auth(self, response: httpx.Response | None) -> None:
+        if response is None or response.status_code != 200:
+            return
+        self.token = response.json()["access_token"]
+        # Read Set-Cookie by hand: the cookie is Secure and the client jar is shared by all users.
+        cookie = SimpleCookie()
+        for header in response.headers.get_list("set-cookie"):
+            cookie.load(header)
+        if REFRESH_COOKIE in cookie:
+            self.refresh_cookie = cookie[REFRESH_COOKIE].value
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _setup_user(client: httpx.AsyncClient, index: int, args: argparse.Namespace, run_id: str) -> User:
+    choices = random.Random(args.seed * 7919 + index)
+    user = User(
+        index,
+        args.seed,
+        f"workday-{run_id}-{index}@example.com",
+        choices.choice([int(value) for value in args.work_intervals.split(",")]),
+        choices.choice([int(value) for value in args.break_minutes.split(",")]),
+    )
+    response = await client.post("/auth/register", json={"email": user.email, "password": PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    current = (await client.get("/settings/me", headers=headers)).json()
+    current.update(workIntervalMinutes=user.work_interval, breakDurationMinutes=user.break_minutes)
+    (await client.put("/settings/me", json=current, headers=headers)).raise_for_status()
+    return user
+
+
+async def _focus(client: httpx.AsyncClient, recorder: Recorder, user: User) -> None:
+    await recorder.request(client, "GET /settings/me", "GET", "/settings/me", headers=user.headers)
+    today = datetime.now(timezone.utc).date().isoformat()
+    headers = dict(user.headers)
+    if user.sessions_etag:
+        headers["If-None-Match"] = user.sessions_etag
+    response = await recorder.request(
+        client,
+        "GET /history/sessions",
+        "GET",
+        "/history/sessions",
+        params={"from": today, "to": today},
+        headers=headers,
+    )
+    if response is not None and response.status_code == 200:
+        user.sessions_etag = response.headers.get("etag")
+
+
+async def _workday(
+    client: httpx.AsyncClient, recorder: Recorder, user: User, args: argparse.Namespace, t0: float
+) -> None:
+    day = args.hours * 3600
+    loop = asyncio.get_running_loop()
+
+    def sim_now() -> float:
+        return (loop.time() - t0) * args.speed
+
+    async def sleep_until(sim_at: float) -> None:
+        delay = (sim_at - sim_now()) / args.speed
+        recorder.lag.append(max(0.0, -delay))
+        await asyncio.sleep(max(0.0, delay))
+
+    login_at = user.rng.uniform(0, args.login_wave_minutes * 60)
+    await sleep_until(login_at)
+    user.take_auth(
+        await recorder.request(
+            client, "POST /auth/login", "POST", "/auth/login", json={"email": user.email, "password": PASSWORD}
+        )
+    )
+    if not user.token:
+        return
+    await _focus(client, recorder, user)
+
+    focus_rate = args.focus_per_hour / 3600
+    next_refresh = login_at + args.refresh_minutes * 60
+    next_focus = login_at + (user.rng.expovariate(focus_rate) if focus_rate > 0 else day)
+    next_break = login_at + user.work_interval * 60
+    open_break: tuple[str, float] | None = None  # (session id, completes at)
+
+    while True:
+        next_complete = open_break[1] if open_break else day
+        event_at = min(next_refresh, next_focus, next_break, next_complete)
+        if event_at >= day:
+            return
+        await sleep_until(event_at)
+
+        if event_at == next_complete:
+            session_id = open_break[0]
+            open_break = None
+            await recorder.request(
+                client,
+                "PATCH /history/sessions/{id}/complete",
+                "PATCH",
+                f"/history/sessions/{session_id}/complete",
+                json={
+                    "completedAt": datetime.now(timezone.utc).isoformat(),
+                    "durationActualSeconds": user.break_minutes * 60,
+                },
+                headers=user.headers,
+            )
+            next_break = event_at + user.work_interval * 60
+        elif event_at == next_break:
+            now = datetime.now(timezone.utc)
+            response = await recorder.request(
+                client,
+                "POST /history/sessions",
+                "POST",
+                "/history/sessions",
+                json={
+                    "date": now.date().isoformat(),
+                    "startedAt": now.isoformat(),
+                    "exerciseIds": user.rng.sample(EXERCISES, 2),
+                    "durationPlannedSeconds": user.break_minutes * 60,
+                },
+                headers=user.headers,
+            )
+            next_break = day
+            if response is not None and response.status_code == 200:
+                open_break = (response.json()["id"], event_at + user.break_minutes * 60)
+            else:
+                next_break = event_at + user.work_interval * 60
+        elif event_at == next_refresh:
+            user.take_auth(
+                await recorder.request(
+                    client,
+                    "POST /auth/refresh",
+                    "POST",
+                    "/auth/refresh",
+                    headers={"Cookie": f"{REFRESH_COOKIE}={user.refresh_cookie}"},
+                )
+            )
+            next_refresh = event_at + args.refresh_minutes * 60
+        else:
+            await _focus(client, recorder, user)
+            next_focus = event_at + user.rng.expovariate(focus_rate)
+
+
+def _parse_metrics(text: str) -> dict[tuple[str, str], float]:
+    values = {}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            values[(match.group(1), match.group(2) or "")] = float(match.group(3))
+    return values
+
+
+class PoolWatcher:
+    """Samples the pool and threadpool gauges from /metrics; diffs the pool wait histogram."""
+
+    def __init__(self, client: httpx.AsyncClient, interval: float, secret: str | None):
+        self.client = client
+        self.interval = interval
+        self.headers = {"Authorization": f"Bearer {secret}"} if secret else {}
+        self.samples: list[dict[tuple[str, str], float]] = []
+        self.available = True
+
+    async def scrape(self) -> dict[tuple[str, str], float] | None:
+        try:
+            response = await self.client.get("/metrics", headers=self.headers)
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            self.available = False
+            return None
+        return _parse_metrics(response.text)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while self.available and not stop.is_set():
+            values = await self.scrape()
+            if values is not None:
+                self.samples.append(values)
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self, first: dict | None, last: dict | None) -> dict | None:
+        if not self.available or not self.samples or first is None or last is None:
+            return None
+        result = {"samples": len(self.samples)}
+        busy = [values.get(("pausas_threadpool_busy_threads", ""), 0.0) for values in self.samples]
+        result["threadpool"] = {"limit": last.get(("pausas_threadpool_max_threads", "")), "busy_max": max(busy)}
+        for engine in ("sync", "async"):
+            label = f'engine="{engine}"'
+            checked_out = [values.get(("pausas_db_pool_checked_out", label), 0.0) for values in self.samples]
+            size = last.get(("pausas_db_pool_size", label))
+            waits = last.get(("pausas_db_pool_wait_seconds_count", label), 0.0) - first.get(
+                ("pausas_db_pool_wait_seconds_count", label), 0.0
+            )
+            if size is None or (waits == 0 and max(checked_out) == 0):
+                continue
+            wait_sum = last.get(("pausas_db_pool_wait_seconds_sum", label), 0.0) - first.get(
+                ("pausas_db_pool_wait_seconds_sum", label), 0.0
+            )
+            result[engine] = {
+                "pool_size": size,
+                "checked_out_max": max(checked_out),
+                "overflow_max": max(values.get(("pausas_db_pool_overflow", label), 0.0) for values in self.samples),
+                # Share of scrapes where every pooled connection was in use.
+                "saturated_fraction": round(sum(value >= size for value in checked_out) / len(checked_out), 3),
+                "checkouts": int(waits),
+                "wait_mean_ms": round(wait_sum / waits * 1000, 3) if waits else 0.0,
+                "wait_p99_le_ms": _histogram_p99(first, last, "pausas_db_pool_wait_seconds", label),
+            }
+        return result
+
+
+def _histogram_p99(first: dict, last: dict, name: str, label: str) -> float | None:
+    """Upper bound of the bucket holding the 99th percentile of the observations between scrapes."""
+    buckets = []
+    for (metric, labels), value in last.items():
+        if metric == f"{name}_bucket" and labels.startswith(label):
+            bound = re.search(r'le="([^"]+)"', labels).group(1)
+            buckets.append((float(bound), value - first.get((metric, labels), 0.0)))
+    buckets.sort()
+    if not buckets or buckets[-1][1] == 0:
+        return None
+    target = buckets[-1][1] * 0.99
+    for bound, count in buckets:
+        if count >= target:
+            return None if bound == float("inf") else round(bound * 1000, 3)
+    return None
+
+
+async def run(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.users + 1, max_keepalive_connections=args.users + 1)
+    run_id = f"{args.seed}-{int(time.time())}"
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        semaphore = asyncio.Semaphore(args.setup_concurrency)
+
+        async def setup(index: int) -> User:
+            async with semaphore:
+                return await _setup_user(client, index, args, run_id)
+
+        setup_started = time.perf_counter()
+        users = await asyncio.gather(*(setup(index) for index in range(args.users)))
+        print(f"setup: {args.users} users in {time.perf_counter() - setup_started:.1f}s")
+
+        recorder = Recorder()
+        watcher = PoolWatcher(client, args.scrape_interval, args.metrics_secret)
+        first = await watcher.scrape()
+        stop = asyncio.Event()
+        watch_task = asyncio.create_task(watcher.run(stop))
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        t0 = asyncio.get_running_loop().time()
+        await asyncio.gather(*(_workday(client, recorder, user, args, t0) for user in users))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await watch_task
+        last = await watcher.scrape()
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "label": args.label,
+        "commit": _git_commit(),
+        "startedAt": started_at.isoformat(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("base_url", "label", "output", "metrics_secret")
+        },
+        "simulatedDay": str(timedelta(seconds=round(args.hours * 3600))),
+        "elapsedSeconds": round(elapsed, 1),
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "rps": round(total / elapsed, 1),
+        "scheduleLagP95Seconds": round(percentile(recorder.lag, 95), 3),
+        "routes": recorder.summary(elapsed),
+        "pool": watcher.summary(first, last),
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare two bench_workday.py result files, route by route.
+
+Exits with code 1 when a route's p95 (or the overall throughput) got worse than --max-regression,
+so it can gate a CI job that benchmarks the base branch and the change:
+
+    python benchmarks/compare_workday.py before.json after.json --max-regression 0.2
+"""
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "rps")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare two bench_workday.py result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.2, help="Allowed relative p95/rps regression (default: 0.2)"
+    )
+    parser.add_argument(
+        "--min-requests", type=int, default=50, help="Routes with fewer samples are shown but not judged"
+    )
+    return parser.parse_args()
+
+
+def _change(old: float, new: float) -> float | None:
+    return (new - old) / old if old else None
+
+
+def _format(change: float | None) -> str:
+    return "    n/a" if change is None else f"{change * 100:+6.1f}%"
+
+
+def main() -> None:
+    args = _parse_args()
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(args.candidate, encoding="utf-8") as fh:
+        candidate = json.load(fh)
+
+    if baseline["config"] != candidate["config"]:
+        differing = sorted(key for key in baseline["config"] if baseline["config"][key] != candidate["config"].get(key))
+        print(f"warning: the runs used different settings: {', '.join(differing)}")
+
+    regressions = []
+    print(f"{'route':42} {'metric':7} {baseline['label']:>10} {candidate['label']:>10}  change")
+    for route in sorted(set(baseline["routes"]) | set(candidate["routes"])):
+        old, new = baseline["routes"].get(route), candidate["routes"].get(route)
+        if old is None or new is None:
+            print(f"{route:42} only in {'candidate' if old is None else 'baseline'}")
+            continue
+        for metric in METRICS:
+            change = _change(old[metric], new[metric])
+            print(f"{route:42} {metric:7} {old[metric]:10} {new[metric]:10}  {_format(change)}")
+        judged = min(old["requests"], new["requests"]) >= args.min_requests
+        p95_change = _change(old["p95_ms"], new["p95_ms"])
+        if judged and p95_change is not None and p95_change > args.max_regression:
+            regressions.append(f"{route} p95 {_format(p95_change).strip()}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"{route} errors {old['errors']} -> {new['errors']}")
+
+    rps_change = _change(baseline["rps"], candidate["rps"])
+    print(f"{'total':42} {'rps':7} {baseline['rps']:10} {candidate['rps']:10}  {_format(rps_change)}")
+    if rps_change is not None and -rps_change > args.max_regression:
+        regressions.append(f"total rps {_format(rps_change).strip()}")
+
+    for engine in ("sync", "async"):
+        old = (baseline.get("pool") or {}).get(engine)
+        new = (candidate.get("pool") or {}).get(engine)
+        if old and new:
+            print(
+                f"pool {engine}: checked out max {old['checked_out_max']} -> {new['checked_out_max']}, "
+                f"saturated {old['saturated_fraction']} -> {new['saturated_fraction']}, "
+                f"wait mean {old['wait_mean_ms']} -> {new['wait_mean_ms']} ms"
+            )
+
+    if regressions:
+        raise SystemExit("Regressions:\n  " + "\n  ".join(regressions))
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
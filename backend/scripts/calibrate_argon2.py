@@ -0,0 +1,144 @@
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from passlib.hash import argon2
+
+# Allow running as: python scripts/calibrate_argon2.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.config import settings
+
+PASSWORD = "Calibrate1234!"
+# OWASP's floor for argon2id is 19 MiB with time_cost=2.
+MIN_MEMORY_KIB = 19 * 1024
+MIN_TIME_COST = 2
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Pick the strongest argon2 parameters whose verify stays under a latency target on this host "
+            "and write them as ARGON2_* to an env file. Existing hashes are upgraded on their next login."
+        )
+    )
+    parser.add_argument("--target-ms", type=float, default=150.0, help="Verify latency target (default: 150)")
+    parser.add_argument("--percentile", type=int, default=99, help="Percentile held to the target (default: 99)")
+    parser.add_argument("--samples", type=int, default=15, help="Verifies per candidate and process (default: 15)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Processes verifying at once; use PASSWORD_POOL_WORKERS to calibrate for a busy pool (default: 1)",
+    )
+    parser.add_argument(
+        "--parallelism", type=int, default=settings.argon2_parallelism, help="Argon2 lanes (default: ARGON2_PARALLELISM)"
+    )
+    parser.add_argument("--max-memory-mib", type=int, default=256, help="Upper bound for memory_cost (default: 256)")
+    parser.add_argument("--max-time-cost", type=int, default=10)
+    parser.add_argument("--env-file", default=".env", help="File to update (default: .env)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the parameters without writing them")
+    return parser.parse_args()
+
+
+def _verify_timings(time_cost: int, memory_kib: int, parallelism: int, samples: int) -> list[float]:
+    handler = argon2.using(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+    hashed = handler.hash(PASSWORD)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.verify(PASSWORD, hashed)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+class Calibrator:
+    def __init__(self, args: argparse.Namespace, executor: ProcessPoolExecutor | None):
+        self.args = args
+        self.executor = executor
+
+    def measure(self, time_cost: int, memory_kib: int) -> float:
+        """Verify latency at the chosen percentile, in ms."""
+        job = (time_cost, memory_kib, self.args.parallelism, self.args.samples)
+        if self.executor is None:
+            timings = _verify_timings(*job)
+        else:
+            futures = [self.executor.submit(_verify_timings, *job) for _ in range(self.args.concurrency)]
+            timings = [timing for future in futures for timing in future.result()]
+        latency = statistics.quantiles(timings, n=100)[self.args.percentile - 1] * 1000
+        print(f"t={time_cost} m={memory_kib // 1024}MiB p={self.args.parallelism}: p{self.args.percentile}={latency:.1f}ms")
+        return latency
+
+    def fits(self, time_cost: int, memory_kib: int) -> bool:
+        return self.measure(time_cost, memory_kib) <= self.args.target_ms
+
+    def run(self) -> tuple[int, int]:
+        # Memory first (it is what makes GPU/ASIC attacks expensive), then spend what is left of the
+        # budget on passes.
+        if not self.fits(MIN_TIME_COST, MIN_MEMORY_KIB):
+            print(f"warning: even the OWASP floor is over {self.args.target_ms}ms here; using it anyway")
+            return MIN_TIME_COST, MIN_MEMORY_KIB
+
+        low, high = MIN_MEMORY_KIB, self.args.max_memory_mib * 1024
+        while low * 2 <= high and self.fits(MIN_TIME_COST, low * 2):
+            low *= 2
+        high = min(low * 2, high + 1024)
+        # Binary search in whole MiB between the last fitting and first failing size.
+        while high - low > 1024:
+            middle = (low + high) // 2 // 1024 * 1024
+            if self.fits(MIN_TIME_COST, middle):
+                low = middle
+            else:
+                high = middle
+
+        time_cost = MIN_TIME_COST
+        while time_cost < self.args.max_time_cost and self.fits(time_cost + 1, low):
+            time_cost += 1
+        return time_cost, low
+
+
+def _write_env(path: Path, values: dict[str, str]) -> None:
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    pending = dict(values)
+    for index, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in pending:
+            lines[index] = f"{key}={pending.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in pending.items())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main() -> None:
+    args = _parse_args()
+    if args.samples * args.concurrency < 2:
+        raise SystemExit("Se necesitan al menos 2 muestras")
+
+    print(
+        f"current: t={settings.argon2_time_cost} m={settings.argon2_memory_cost // 1024}MiB "
+        f"p={settings.argon2_parallelism}"
+    )
+    if args.concurrency > 1:
+        with ProcessPoolExecutor(max_workers=args.concurrency) as executor:
+            time_cost, memory_kib = Calibrator(args, executor).run()
+    else:
+        time_cost, memory_kib = Calibrator(args, None).run()
+
+    values = {
+        "ARGON2_TIME_COST": str(time_cost),
+        "ARGON2_MEMORY_COST": str(memory_kib),
+        "ARGON2_PARALLELISM": str(args.parallelism),
+    }
+    print("chosen: " + " ".join(f"{key}={value}" for key, value in values.items()))
+    if args.dry_run:
+        return
+    _write_env(Path(args.env_file), values)
+    print(f"Updated {args.env_file}; restart the API to apply")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import uuid
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+# Allow running as: python scripts/check_query_counts.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.sql_stats import query_count
+from app.main import app
+from app.models import User
+from tests.query_budgets import BUDGETS, calls
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Call every endpoint once with a temporary user and fail if one runs more SQL statements "
+            "than its budget (catches N+1 regressions in CI)."
+        )
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    _parse_args()
+    if not settings.sql_instrumentation_enabled:
+        raise SystemExit("SQL_INSTRUMENTATION_ENABLED=false: no hay Server-Timing que revisar")
+
+    email = f"query-budget-{uuid.uuid4().hex[:12]}@example.com"
+    failures = 0
+    try:
+        with TestClient(app) as client:
+            for endpoint, response in calls(client, email, "Budget1234!"):
+                if response.status_code >= 400:
+                    failures += 1
+                    print(f"[fail] {endpoint}: status {response.status_code} {response.text[:200]}")
+                    continue
+                count, budget = query_count(response), BUDGETS[endpoint]
+                failures += count > budget
+                print(f"[{'fail' if count > budget else 'ok'}] {endpoint}: queries={count} max={budget}")
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(User).where(User.email == email))
+            db.commit()
+
+    if failures:
+        raise SystemExit(f"{failures} endpoint(s) over budget")
+    print("All endpoints within their query budget")
+
+
+if __name__ == "__main__":
+    main()
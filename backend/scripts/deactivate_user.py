@@ -0,0 +1,40 @@
+import argparse
+import sys
+from pathlib import Path
+
+from sqlalchemy import select
+
+# Allow running as: python scripts/deactivate_user.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.database import SessionLocal
+from app.models import User
+from app.services.users import deactivate_user
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Deactivate a user and revoke their refresh tokens, notifying every API worker so their auth "
+            "caches stop accepting the user."
+        )
+    )
+    parser.add_argument("email")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == args.email.lower()))
+        if user_id is None:
+            raise SystemExit("Usuario no encontrado")
+        if not deactivate_user(db, user_id):
+            raise SystemExit("El usuario ya estaba desactivado")
+    print(f"User {user_id} deactivated")
+
+
+if __name__ == "__main__":
+    main()
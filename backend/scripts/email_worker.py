@@ -0,0 +1,47 @@
+import argparse
+import logging
+import signal
+import sys
+from pathlib import Path
+
+# Allow running as: python scripts/email_worker.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.config import settings
+from app.services.email import warm_templates
+from app.services.email_outbox import email_worker
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Deliver queued emails from email_outbox (run with EMAIL_OUTBOX_WORKER_ENABLED=false in the API)."
+    )
+    parser.add_argument("--once", action="store_true", help="Send what is due now and exit")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    warm_templates()
+
+    if args.once:
+        while email_worker.deliver_batch() == settings.email_outbox_batch_size:
+            pass
+        email_worker.smtp.close()
+        print("Email outbox drained")
+        for key, value in email_worker.snapshot().items():
+            print(f"{key}={value}")
+        return
+
+    signal.signal(signal.SIGTERM, lambda *_: email_worker.stop())
+    try:
+        email_worker.run()
+    except KeyboardInterrupt:
+        email_worker.smtp.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Allow running as: python scripts/manage_partitions.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.database import engine
+from app.services.partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    create_month_partition,
+    detach_partition,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Pre-create monthly break_sessions partitions and detach old ones. "
+            "Safe to run repeatedly (e.g. daily from cron)."
+        )
+    )
+    parser.add_argument("--ahead", type=int, default=3, help="Months to create ahead of the current one (default: 3)")
+    parser.add_argument(
+        "--retain-months",
+        type=int,
+        help="Detach partitions that end before this many months ago (default: keep everything)",
+    )
+    parser.add_argument("--lock-timeout", default="5s", help="lock_timeout for each DDL step (default: 5s)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    current = month_start(date.today())
+
+    with engine.connect() as conn:
+        partitions = list_partitions(conn)
+    existing = {bounds[0] for bounds in partitions.values() if bounds}
+
+    wanted = [add_months(current, offset) for offset in range(args.ahead + 1)]
+    to_create = [month for month in wanted if month not in existing]
+    to_detach = []
+    if args.retain_months is not None:
+        cutoff = add_months(current, -args.retain_months)
+        to_detach = sorted(name for name, bounds in partitions.items() if bounds and bounds[1] <= cutoff)
+
+    created = moved = 0
+    for month in to_create:
+        if args.dry_run:
+            print(f"would create {partition_name(month)}")
+            continue
+        # One short transaction per partition, so a lock timeout only skips that step.
+        with engine.begin() as conn:
+            conn.execute(text("SELECT set_config('lock_timeout', :value, true)"), {"value": args.lock_timeout})
+            moved += create_month_partition(conn, month)
+        created += 1
+
+    for name in to_detach:
+        if args.dry_run:
+            print(f"would detach {name}")
+            continue
+        with engine.begin() as conn:
+            conn.execute(text("SELECT set_config('lock_timeout', :value, true)"), {"value": args.lock_timeout})
+            detach_partition(conn, name)
+
+    with engine.connect() as conn:
+        in_default = conn.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}"))
+
+    print("Partitions maintained")
+    print(f"partitions_created={created}")
+    print(f"rows_moved_from_default={moved}")
+    print(f"partitions_detached={0 if args.dry_run else len(to_detach)}")
+    print(f"rows_in_default={in_default}")
+    if to_detach and not args.dry_run:
+        # Detached tables keep their data; archive or DROP them once they are no longer needed.
+        print("detached_tables=" + ",".join(to_detach))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Allow running as: python scripts/profile_token.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.config import settings
+from app.core.security import create_profile_token
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Print a short-lived X-Profile-Token (signed with PROFILING_SECRET) to profile requests."
+    )
+    parser.add_argument("--minutes", type=int, default=15, help="Token lifetime in minutes (default: 15)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    if not settings.profiling_secret:
+        raise SystemExit("PROFILING_SECRET no configurado")
+    print(create_profile_token(args.minutes))
+
+
+if __name__ == "__main__":
+    main()
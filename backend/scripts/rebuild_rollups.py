@@ -0,0 +1,54 @@
+import argparse
+import sys
+from pathlib import Path
+
+from sqlalchemy import select, text
+
+# Allow running as: python scripts/rebuild_rollups.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.database import SessionLocal
+from app.models import User
+from app.services.rollups import ROLLUP_MODELS, rebuild_rollups
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rebuild weekly/monthly/yearly rollups from daily_records (repairs and backfills)."
+    )
+    parser.add_argument("--email", help="Only rebuild this user (default: all users)")
+    parser.add_argument(
+        "--granularity",
+        choices=sorted(ROLLUP_MODELS),
+        action="append",
+        help="Rollup to rebuild, repeatable (default: all)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+
+    with SessionLocal() as db:
+        user_id = None
+        if args.email:
+            user_id = db.scalar(select(User.id).where(User.email == args.email.lower().strip()))
+            if user_id is None:
+                raise SystemExit(f"Usuario no encontrado: {args.email}")
+
+        # Block daily_records writers (and their rollup trigger) until the rebuild commits.
+        db.execute(text("LOCK TABLE daily_records IN SHARE MODE"))
+        print("Rollups rebuilt")
+        for granularity in args.granularity or ["week", "month", "year"]:
+            clear, fill = rebuild_rollups(granularity, user_id)
+            db.execute(clear)
+            # SQLAlchemy does not keep rowcount for INSERT unless asked to.
+            rows = db.execute(fill, execution_options={"preserve_rowcount": True}).rowcount
+            print(f"{granularity}_rows={rows}")
+        db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import select
+
+# Allow running as: python scripts/recompute_daily_records.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.database import SessionLocal
+from app.models import User
+from app.services.daily_records import recompute_daily_records
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rebuild daily_records counters from break_sessions (repairs and backfills)."
+    )
+    parser.add_argument("--email", help="Only recompute this user (default: all users)")
+    parser.add_argument("--from", dest="from_", type=date.fromisoformat, help="First day, YYYY-MM-DD")
+    parser.add_argument("--to", type=date.fromisoformat, help="Last day, YYYY-MM-DD")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+
+    with SessionLocal() as db:
+        user_id = None
+        if args.email:
+            user_id = db.scalar(select(User.id).where(User.email == args.email.lower().strip()))
+            if user_id is None:
+                raise SystemExit(f"Usuario no encontrado: {args.email}")
+
+        upsert, orphan_reset = recompute_daily_records(user_id, args.from_, args.to)
+        # SQLAlchemy does not keep rowcount for INSERT unless asked to.
+        upserted = db.execute(upsert, execution_options={"preserve_rowcount": True}).rowcount
+        reset = db.execute(orphan_reset).rowcount
+        db.commit()
+
+        print("Daily records recomputed")
+        print(f"days_upserted={upserted}")
+        print(f"days_reset={reset}")
+
+
+if __name__ == "__main__":
+    main()
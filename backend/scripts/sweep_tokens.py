@@ -0,0 +1,66 @@
+import argparse
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+# Allow running as: python scripts/sweep_tokens.py
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.core.config import settings
+from app.core.database import direct_engine
+from app.services.token_sweeper import sweep_tokens
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Delete expired and revoked refresh/password reset tokens, and emails the outbox gave up on, "
+            "in small batches."
+        )
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.token_sweeper_batch_size, help="Rows per DELETE")
+    parser.add_argument(
+        "--pause", type=float, default=settings.token_sweeper_pause_seconds, help="Seconds to sleep between batches"
+    )
+    parser.add_argument(
+        "--revoked-grace-hours",
+        type=int,
+        default=settings.token_sweeper_revoked_grace_hours,
+        help="Keep revoked/used tokens this long before deleting them",
+    )
+    parser.add_argument(
+        "--failed-email-retention-hours",
+        type=int,
+        default=settings.email_outbox_failed_retention_hours,
+        help="Keep failed outbox emails this long before deleting them",
+    )
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches (default: until done)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+
+    started = time.monotonic()
+    deleted = sweep_tokens(
+        direct_engine,
+        args.batch_size,
+        args.pause,
+        timedelta(hours=args.revoked_grace_hours),
+        timedelta(hours=args.failed_email_retention_hours),
+        max_batches=args.max_batches,
+    )
+    if deleted is None:
+        raise SystemExit("Otro proceso esta limpiando tokens, intenta mas tarde")
+
+    print("Tokens swept")
+    for table, count in deleted.items():
+        print(f"{table}_deleted={count}")
+    print(f"seconds={time.monotonic() - started:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Per-endpoint SQL statement budgets, shared by tests/test_query_budgets.py and
+scripts/check_query_counts.py.
+"""
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+# Maximum statements per request (from Server-Timing). The auth dependency's user lookup is
+# usually served by the auth cache; budgets assume a cold cache so they hold either way.
+BUDGETS = {
+    "POST /auth/register": 4,
+    "POST /auth/login": 2,
+    "POST /auth/refresh": 2,
+    "GET /auth/me": 2,
+    "GET /settings/me": 2,
+    "PUT /settings/me": 4,
+    "POST /history/sessions": 3,
+    "POST /history/sessions:batch": 4,
+    "PATCH /history/sessions/{id}/complete": 3,
+    "GET /history/sessions": 3,
+    "GET /history/daily-records": 3,
+    "PUT /history/daily-records/{date}/expected": 2,
+    "GET /history/stats": 2,
+    "GET /history/rollups": 3,
+}
+
+
+def calls(client: TestClient, email: str, password: str):
+    """Yield (endpoint, response) in an order where each call has the data it needs."""
+    today = date.today()
+    session = {
+        "date": today.isoformat(),
+        "startedAt": f"{today.isoformat()}T09:00:00+00:00",
+        "exerciseIds": ["visual-20-20-20"],
+        "durationPlannedSeconds": 600,
+    }
+    response = client.post("/auth/register", json={"email": email, "password": password})
+    yield "POST /auth/register", response
+    response = client.post("/auth/login", json={"email": email, "password": password})
+    yield "POST /auth/login", response
+    response = client.post("/auth/refresh")
+    yield "POST /auth/refresh", response
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    yield "GET /auth/me", client.get("/auth/me", headers=headers)
+    yield "GET /settings/me", client.get("/settings/me", headers=headers)
+    settings_body = client.get("/settings/me", headers=headers).json()
+    yield "PUT /settings/me", client.put("/settings/me", json={**settings_body, "theme": "light"}, headers=headers)
+
+    response = client.post("/history/sessions", json=session, headers=headers)
+    yield "POST /history/sessions", response
+    session_id = response.json()["id"]
+    batch = [
+        {**session, "clientId": str(i), "startedAt": f"{today.isoformat()}T1{i}:00:00+00:00"} for i in range(5)
+    ]
+    yield "POST /history/sessions:batch", client.post("/history/sessions:batch", json=batch, headers=headers)
+    yield "PATCH /history/sessions/{id}/complete", client.patch(
+        f"/history/sessions/{session_id}/complete",
+        json={"completedAt": f"{today.isoformat()}T09:10:00+00:00", "durationActualSeconds": 600},
+        headers=headers,
+    )
+    week = {"from": (today - timedelta(days=7)).isoformat(), "to": today.isoformat()}
+    yield "GET /history/sessions", client.get("/history/sessions", params=week, headers=headers)
+    yield "GET /history/daily-records", client.get("/history/daily-records", params=week, headers=headers)
+    yield "PUT /history/daily-records/{date}/expected", client.put(
+        f"/history/daily-records/{today.isoformat()}/expected", json={"sessionsExpected": 6}, headers=headers
+    )
+    yield "GET /history/stats", client.get("/history/stats", headers=headers)
+    yield "GET /history/rollups", client.get(
+        "/history/rollups", params={"granularity": "week", **week}, headers=headers
+    )
@@ -0,0 +1,37 @@
+import time
+import uuid
+
+from sqlalchemy import select
+
+from app.core import auth_cache
+from app.core.database import SessionLocal
+from app.models import User
+from app.services.users import deactivate_user
+
+
+def test_invalidating_a_user_drops_their_token_payloads():
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    exp = time.time() + 60
+    auth_cache.set_token_payload("mine-1", {"sub": str(user_id), "type": "access", "exp": exp})
+    auth_cache.set_token_payload("mine-2", {"sub": str(user_id), "type": "access", "exp": exp})
+    auth_cache.set_token_payload("other", {"sub": str(other_id), "type": "access", "exp": exp})
+    auth_cache.user_cache.set(user_id, (True, True))
+
+    auth_cache.invalidate_user(user_id)
+
+    assert auth_cache.get_token_payload("mine-1") is None
+    assert auth_cache.get_token_payload("mine-2") is None
+    assert auth_cache.user_cache.get(user_id) is None
+    assert auth_cache.get_token_payload("other")["sub"] == str(other_id)
+
+
+def test_deactivated_user_is_rejected_despite_the_warm_cache(client, user, auth_headers):
+    assert client.get("/settings/me", headers=auth_headers).status_code == 200
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == user))
+        assert deactivate_user(db, user_id)
+        assert not deactivate_user(db, user_id)
+
+    assert auth_cache.get_token_payload(auth_headers["Authorization"].removeprefix("Bearer ")) is None
+    assert client.get("/settings/me", headers=auth_headers).status_code == 401
+    assert client.post("/auth/refresh").status_code == 401
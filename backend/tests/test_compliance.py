@@ -0,0 +1,24 @@
+DAY = "2026-02-03"
+
+
+def test_compliance_rounds_half_to_even_like_the_original_python(client, auth_headers):
+    client.put(f"/history/daily-records/{DAY}/expected", json={"sessionsExpected": 8}, headers=auth_headers)
+    item = {
+        "clientId": "half",
+        "date": DAY,
+        "startedAt": f"{DAY}T09:00:00+00:00",
+        "completedAt": f"{DAY}T09:10:00+00:00",
+        "exerciseIds": ["visual-20-20-20"],
+        "durationPlannedSeconds": 600,
+        "durationActualSeconds": 600,
+    }
+    client.post("/history/sessions:batch", json=[item], headers=auth_headers)
+
+    # 1 of 8 is 12.5%: round() in Python gave 12, round(numeric) in SQL would give 13.
+    [record] = client.get("/history/daily-records", params={"from": DAY, "to": DAY}, headers=auth_headers).json()
+    assert (record["sessionsCompleted"], record["sessionsExpected"]) == (1, 8)
+    assert record["compliancePercent"] == round((1 / 8) * 100) == 12
+    [week] = client.get(
+        "/history/rollups", params={"granularity": "week", "from": DAY, "to": DAY}, headers=auth_headers
+    ).json()
+    assert week["compliancePercent"] == 12
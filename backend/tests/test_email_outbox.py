@@ -0,0 +1,153 @@
+import re
+import socket
+from datetime import datetime, timedelta, timezone
+from email import message_from_bytes, policy
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models import EmailOutbox, PasswordResetToken, User
+from app.services.email_outbox import EmailDeliveryWorker
+from app.services.token_sweeper import sweep_tokens
+
+
+class SMTPSink:
+    """aiosmtpd handler that keeps what it receives, or answers every DATA with `reply`."""
+
+    def __init__(self):
+        self.messages = []
+        self.reply = "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reply.startswith("250"):
+            self.messages.append(message_from_bytes(envelope.content, policy=policy.default))
+        return self.reply
+
+    def to(self, email: str) -> list:
+        return [msg for msg in self.messages if msg["To"] == email]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    sink = SMTPSink()
+    controller = Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", port)
+    monkeypatch.setattr(settings, "smtp_starttls", False)
+    monkeypatch.setattr(settings, "smtp_user", None)
+    yield sink
+    controller.stop()
+
+
+@pytest.fixture
+def worker():
+    worker = EmailDeliveryWorker(engine)
+    yield worker
+    worker.smtp.close()
+
+
+def _outbox_rows(email: str) -> list[EmailOutbox]:
+    with SessionLocal() as db:
+        return list(db.scalars(select(EmailOutbox).where(EmailOutbox.to_email == email)))
+
+
+def _reset_token(email: str) -> PasswordResetToken:
+    with SessionLocal() as db:
+        return db.scalar(select(PasswordResetToken).join(User).where(User.email == email))
+
+
+def _set_expiry(email: str, expires_at: datetime) -> None:
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == email))
+        db.execute(update(PasswordResetToken).where(PasswordResetToken.user_id == user_id).values(expires_at=expires_at))
+        db.commit()
+
+
+def test_reset_email_is_sent_with_a_token_that_is_never_stored(client, user, smtp, worker):
+    assert client.post("/auth/forgot-password", json={"email": user}).status_code == 200
+
+    [row] = _outbox_rows(user)
+    assert row.payload == {"reset_token_id": str(_reset_token(user).id)}
+    stored_hash = _reset_token(user).token_hash
+
+    worker.deliver_batch()
+
+    [msg] = smtp.to(user)
+    token = re.search(r"\?token=([\w-]+)", msg.get_body(("plain",)).get_content()).group(1)
+    assert _outbox_rows(user) == []
+    assert _reset_token(user).token_hash != stored_hash
+    response = client.post("/auth/reset-password", json={"token": token, "new_password": "Changed1234!"})
+    assert response.status_code == 200, response.text
+
+
+def test_unsent_reset_token_cannot_be_used(client, user):
+    client.post("/auth/forgot-password", json={"email": user})
+
+    # Before delivery the stored hash belongs to no token anyone has.
+    response = client.post("/auth/reset-password", json={"token": "", "new_password": "Changed1234!"})
+    assert response.status_code == 400
+
+
+def test_email_for_an_expired_token_is_dropped(client, user, smtp, worker):
+    client.post("/auth/forgot-password", json={"email": user})
+    _set_expiry(user, datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    worker.deliver_batch()
+
+    assert smtp.to(user) == []
+    assert _outbox_rows(user) == []
+    assert worker.expired == 1
+
+
+def test_temporary_failure_is_retried_while_the_link_is_valid(client, user, smtp, worker):
+    client.post("/auth/forgot-password", json={"email": user})
+    smtp.reply = "451 Try again later"
+
+    worker.deliver_batch()
+
+    [row] = _outbox_rows(user)
+    assert row.attempts == 1 and row.failed_at is None
+    assert row.next_attempt_at > datetime.now(timezone.utc) + timedelta(seconds=20)
+    assert worker.retried == 1
+
+
+def test_temporary_failure_is_not_retried_past_the_link_expiry(client, user, smtp, worker):
+    client.post("/auth/forgot-password", json={"email": user})
+    # The first retry comes ~EMAIL_OUTBOX_RETRY_BASE_SECONDS later, after this token expires.
+    _set_expiry(user, datetime.now(timezone.utc) + timedelta(seconds=5))
+    smtp.reply = "451 Try again later"
+
+    worker.deliver_batch()
+
+    assert _outbox_rows(user) == []
+    assert worker.expired == 1
+
+
+def test_sweeper_purges_failed_emails_after_retention(user):
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        for failed_hours_ago in (1, settings.email_outbox_failed_retention_hours + 1):
+            db.add(
+                EmailOutbox(
+                    template="password_reset",
+                    to_email=user,
+                    payload={},
+                    failed_at=now - timedelta(hours=failed_hours_ago),
+                )
+            )
+        db.commit()
+
+    deleted = sweep_tokens(
+        engine, 1000, 0, timedelta(hours=24), timedelta(hours=settings.email_outbox_failed_retention_hours)
+    )
+
+    assert deleted is not None and deleted["email_outbox"] >= 1
+    [kept] = _outbox_rows(user)
+    assert kept.failed_at > now - timedelta(hours=2)
@@ -0,0 +1,43 @@
+from datetime import date
+
+from sqlalchemy import select, text
+
+from app.core.database import SessionLocal, engine
+from app.models import User
+from app.services.daily_records import increment_daily_record
+
+DAYS = (date(2026, 1, 5), date(2026, 1, 6))
+RANGE = {"from": DAYS[0].isoformat(), "to": DAYS[1].isoformat()}
+
+
+def _user_id(email: str):
+    with SessionLocal() as db:
+        return db.scalar(select(User.id).where(User.email == email))
+
+
+def test_daily_records_etag_changes_when_an_older_transaction_commits_last(client, user, auth_headers):
+    user_id = _user_id(user)
+    with engine.begin() as conn:
+        for day in DAYS:
+            conn.execute(increment_daily_record(user_id, day, started=1))
+
+    with engine.connect() as older:
+        # Starts first (now() is fixed here), commits after the newer transaction below.
+        older.execute(text("SELECT now()"))
+        with engine.begin() as newer:
+            newer.execute(increment_daily_record(user_id, DAYS[1], started=1))
+        first = client.get("/history/daily-records", params=RANGE, headers=auth_headers)
+        older.execute(increment_daily_record(user_id, DAYS[0], started=1))
+        older.commit()
+
+    headers = {**auth_headers, "If-None-Match": first.headers["etag"]}
+    response = client.get("/history/daily-records", params=RANGE, headers=headers)
+    assert response.status_code == 200
+    assert [record["sessionsStarted"] for record in response.json()] == [2, 2]
+
+
+def test_unchanged_range_is_not_modified(client, auth_headers):
+    first = client.get("/history/daily-records", params=RANGE, headers=auth_headers)
+
+    headers = {**auth_headers, "If-None-Match": first.headers["etag"]}
+    assert client.get("/history/daily-records", params=RANGE, headers=headers).status_code == 304
@@ -0,0 +1,119 @@
+"""HISTORY_SQL_JSON=true must answer byte for byte what the Pydantic path does (body and headers).
+
+The timestamps render in the connection's TimeZone on both paths; to check another zone run e.g.
+`PGTZ=America/Bogota pytest tests/test_history_json.py`.
+"""
+import json
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import BreakSession, DailyRecord, User
+
+# Values that stress JSON escaping and timestamp formatting.
+EXERCISE_IDS = [
+    [],
+    ["visual-20-20-20"],
+    ['comillas "dobles"', "barra \\ invertida", "tab\tnueva\nlinea"],
+    ["control \x01\x1f", "ñandú", "emoji \U0001f9d8", "</script>"],
+]
+HEADERS = ("content-type", "etag", "cache-control", "x-next-cursor")
+START = date(2026, 3, 2)
+DAYS = 20
+SESSIONS = 60
+RANGE = {"from": START.isoformat(), "to": (START + timedelta(days=DAYS - 1)).isoformat()}
+EMPTY = {"from": "1990-01-01", "to": "1990-01-31"}
+
+
+@pytest.fixture
+def seeded(user) -> list[str]:
+    """SESSIONS sessions and a daily record every other day; returns the session ids in page order."""
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == user))
+    rng = random.Random(7)
+    rows = []
+    for i in range(SESSIONS):
+        day = START + timedelta(days=rng.randrange(DAYS))
+        # Whole seconds for some rows: isoformat() omits the fraction entirely then.
+        micro = 0 if i % 3 == 0 else rng.randrange(1, 1_000_000)
+        started_at = datetime(day.year, day.month, day.day, 8, tzinfo=timezone.utc) + timedelta(
+            seconds=rng.randrange(36_000), microseconds=micro
+        )
+        if i % 10 == 9:
+            # Same started_at as the previous row: the cursor has to break the tie by id.
+            day, started_at = rows[-1]["date"], rows[-1]["started_at"]
+        completed = i % 4 != 0
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "date": day,
+                "started_at": started_at,
+                "completed_at": started_at + timedelta(seconds=rng.randrange(900)) if completed else None,
+                "completed": completed,
+                "exercise_ids": EXERCISE_IDS[i % len(EXERCISE_IDS)],
+                "duration_planned_seconds": 600,
+                "duration_actual_seconds": rng.randrange(900) if completed else 0,
+            }
+        )
+    records = [
+        {
+            "user_id": user_id,
+            "date": START + timedelta(days=offset),
+            "sessions_expected": 4,
+            "sessions_started": offset % 7,
+            "sessions_completed": offset % 5,
+            "compliance_percent": (offset % 5) * 25,
+        }
+        for offset in range(0, DAYS, 2)
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(BreakSession), rows)
+        db.execute(insert(DailyRecord), records)
+        db.commit()
+    return [str(row["id"]) for row in sorted(rows, key=lambda row: (row["started_at"], row["id"]))]
+
+
+def _get(client, headers: dict, path: str, params: dict) -> tuple:
+    response = client.get(path, params=params, headers=headers)
+    return response.status_code, response.content, {h: response.headers.get(h) for h in HEADERS}
+
+
+def _walk_sessions(client, headers: dict, params: dict) -> list[tuple]:
+    pages = [_get(client, headers, "/history/sessions", params)]
+    while pages[-1][0] == 200 and pages[-1][2]["x-next-cursor"]:
+        pages.append(_get(client, headers, "/history/sessions", {**params, "cursor": pages[-1][2]["x-next-cursor"]}))
+    return pages
+
+
+def _both_paths(monkeypatch, fetch) -> tuple:
+    monkeypatch.setattr(settings, "history_sql_json", False)
+    expected = fetch()
+    monkeypatch.setattr(settings, "history_sql_json", True)
+    return expected, fetch()
+
+
+# Exactly one page, one row left for the second page, pages that divide the range exactly (no
+# trailing empty page) and an uneven split.
+@pytest.mark.parametrize("limit, pages", [(SESSIONS, 1), (SESSIONS - 1, 2), (SESSIONS // 3, 3), (7, 9)])
+def test_session_pages_match(monkeypatch, client, auth_headers, seeded, limit, pages):
+    params = {**RANGE, "limit": limit}
+    expected, actual = _both_paths(monkeypatch, lambda: _walk_sessions(client, auth_headers, params))
+
+    assert actual == expected
+    assert len(actual) == pages
+    assert [session["id"] for _, body, _ in actual for session in json.loads(body)] == seeded
+
+
+@pytest.mark.parametrize("path", ["/history/sessions", "/history/daily-records"])
+@pytest.mark.parametrize("params", [RANGE, EMPTY], ids=["range", "empty"])
+def test_single_responses_match(monkeypatch, client, auth_headers, seeded, path, params):
+    expected, actual = _both_paths(monkeypatch, lambda: _get(client, auth_headers, path, params))
+
+    assert actual == expected
+    assert actual[0] == 200
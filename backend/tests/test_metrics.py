@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import subprocess
+import threading
+
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+
+INTERNAL_PATHS = [
+    "/metrics",
+    "/health/password-pool",
+    "/health/auth-cache",
+    "/health/token-sweeper",
+    "/health/email-outbox",
+]
+
+
+@pytest.mark.parametrize("path", INTERNAL_PATHS)
+def test_internal_endpoints_need_the_metrics_secret(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get(path, headers={"Authorization": f"Bearer {settings.metrics_secret}"})
+    assert response.status_code == 200
+
+
+def test_health_check_is_public(client):
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def _snapshot(pid: int, requests: float) -> dict:
+    return {
+        "pid": pid,
+        "counters": [[metrics.HTTP_REQUESTS.name, ["GET", "/x", "200"], requests]],
+        "gauges": [[metrics.HTTP_IN_FLIGHT.name, [], 3]],
+        "histograms": [],
+    }
+
+
+def _requests_total(text: str) -> float:
+    prefix = metrics.HTTP_REQUESTS.name + '{method="GET",route="/x",status="200"} '
+    return sum(float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_exporter_folds_exited_workers_into_retired(tmp_path):
+    exited = subprocess.Popen(["true"])
+    exited.wait()
+    (tmp_path / f"{exited.pid}.json").write_text(json.dumps(_snapshot(exited.pid, 5)))
+    # Left by an earlier process that had this worker's pid.
+    (tmp_path / f"{os.getpid()}.json").write_text(json.dumps(_snapshot(os.getpid(), 7)))
+    exporter = metrics.MetricsExporter(str(tmp_path), 60)
+    with exporter._locked():
+        exporter._retire(stale_pid=os.getpid())
+
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == ["retired.json"]
+    retired = json.loads((tmp_path / "retired.json").read_text())
+    assert retired["gauges"] == []
+    own = exporter.write()
+    text = metrics.render(exporter.collect())
+    assert _requests_total(text) == 12 + _requests_total(metrics.render([own]))
+
+
+def test_scrape_runs_off_the_event_loop(tmp_path):
+    exporter = metrics.MetricsExporter(str(tmp_path), 60)
+    threads = []
+    collect = exporter.collect
+
+    def recording_collect():
+        threads.append(threading.current_thread().name)
+        return collect()
+
+    exporter.collect = recording_collect
+    text = asyncio.run(exporter.scrape())
+
+    assert metrics.HTTP_IN_FLIGHT.name in text
+    assert threads == [threads[0]] and threads[0].startswith("metrics-scrape")
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from app.core import profiling
+from app.core.config import settings
+
+
+async def _slow_app(scope, receive, send):
+    await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_sampled_request_writes_its_profile_off_the_event_loop(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    writers = []
+    write_profile = profiling._write_profile
+
+    def recording_write_profile(*args):
+        writers.append(threading.get_ident())
+        write_profile(*args)
+
+    monkeypatch.setattr(profiling, "_write_profile", recording_write_profile)
+    scope = {"type": "http", "method": "GET", "path": "/history/stats", "headers": []}
+
+    async def request():
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            pass
+
+        await profiling.ProfilingMiddleware(_slow_app)(scope, receive, send)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(request())
+
+    [profile] = profiling.list_profiles()
+    assert "_GET_history_stats_" in profile.name
+    assert writers and writers[0] != loop_thread
@@ -0,0 +1,48 @@
+import copy
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.sql_stats import count_queries, query_count
+from app.main import app
+from app.models import User
+from tests.query_budgets import BUDGETS, calls
+
+pytestmark = pytest.mark.skipif(
+    not settings.sql_instrumentation_enabled, reason="SQL_INSTRUMENTATION_ENABLED=false: sin Server-Timing"
+)
+
+
+@pytest.fixture(scope="module")
+def responses(database) -> dict:
+    email = f"query-budget-{uuid.uuid4().hex[:12]}@example.com"
+    try:
+        yield dict(calls(TestClient(app), email, "Budget1234!"))
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(User).where(User.email == email))
+            db.commit()
+
+
+@pytest.mark.parametrize("endpoint", list(BUDGETS))
+def test_endpoint_stays_within_its_query_budget(responses, endpoint):
+    response = responses[endpoint]
+    assert response.status_code < 400, response.text
+    assert query_count(response) <= BUDGETS[endpoint]
+
+
+def test_failed_statement_leaves_nothing_behind_on_the_connection(database):
+    with engine.connect() as conn, count_queries() as stats:
+        info = copy.deepcopy(dict(conn.info))
+        with pytest.raises(DBAPIError):
+            conn.execute(text("SELECT 1 / 0"))
+        conn.rollback()
+        conn.execute(text("SELECT 1"))
+        assert conn.info == info
+
+    assert stats.statements == 1
@@ -0,0 +1,187 @@
+"""EXPLAIN every router query over synthetic history seeded in a rolled-back transaction: each must be
+planned with an index, and date-bounded break_sessions queries must only touch the partitions of
+their months.
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select, text, update
+
+from app.core.database import engine
+from app.deps import _user_state_statement
+from app.models import PasswordResetToken, RefreshToken, User
+from app.routers.history import (
+    daily_records_between,
+    daily_records_version,
+    session_for_update,
+    sessions_between,
+    sessions_version,
+)
+from app.services.history_json import daily_records_json, sessions_json
+from app.services.partitions import PARENT_TABLE, add_months, month_start
+from app.services.rollups import rollups_between
+
+SEED_SQL = (
+    """
+    INSERT INTO users (id, email, password_hash, is_active, email_verified, created_at, updated_at)
+    SELECT gen_random_uuid(), 'plan-check-' || g || '@example.com', 'x', true, false, now(), now()
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO break_sessions (id, user_id, date, started_at, completed_at, completed, exercise_ids,
+                                duration_planned_seconds, duration_actual_seconds)
+    SELECT gen_random_uuid(), u.id, d::date, d + make_interval(hours => 8 + s), NULL, s % 2 = 0,
+           ARRAY['visual-20-20-20'], 600, 0
+    FROM users u
+    CROSS JOIN generate_series(current_date - :days, current_date, interval '1 day') AS d
+    CROSS JOIN generate_series(1, 4) AS s
+    WHERE u.email LIKE 'plan-check-%'
+    """,
+    """
+    INSERT INTO daily_records (user_id, date, sessions_expected, sessions_started, sessions_completed, compliance_percent)
+    SELECT u.id, d::date, 4, 4, 2, 50
+    FROM users u
+    CROSS JOIN generate_series(current_date - :days, current_date, interval '1 day') AS d
+    WHERE u.email LIKE 'plan-check-%'
+    """,
+    """
+    INSERT INTO refresh_tokens (id, family_id, user_id, token_hash, expires_at, revoked_at, created_at)
+    SELECT gen_random_uuid(), gen_random_uuid(), u.id, md5(u.id::text || g) || md5(g::text || u.id::text), now() + interval '14 days',
+           CASE WHEN g > 1 THEN now() END, now()
+    FROM users u CROSS JOIN generate_series(1, 20) AS g
+    WHERE u.email LIKE 'plan-check-%'
+    """,
+    """
+    INSERT INTO password_reset_tokens (id, user_id, token_hash, expires_at, used_at, created_at)
+    SELECT gen_random_uuid(), u.id, md5(u.id::text || g) || md5(g::text || u.id::text), now() + interval '30 minutes',
+           CASE WHEN g > 1 THEN now() END, now()
+    FROM users u CROSS JOIN generate_series(1, 3) AS g
+    WHERE u.email LIKE 'plan-check-%'
+    """,
+)
+
+# Empty or nearly empty partitions (future months, old test data) are legitimately seq-scanned.
+SMALL_PARTITION_ROWS = 1000
+
+CHECKED_TABLES = {
+    "users",
+    "break_sessions",
+    "daily_records",
+    "monthly_records",
+    "refresh_tokens",
+    "password_reset_tokens",
+}
+
+
+def _router_queries(user_id, session_id, token_hash: str) -> dict:
+    today = date.today()
+    return {
+        "login: users by email": select(User).where(User.email == "plan-check-1@example.com"),
+        "get_current_user: user state": _user_state_statement(user_id),
+        "get_sessions: today": sessions_between(user_id, today, today),
+        "get_sessions: 30 days": sessions_between(user_id, today - timedelta(days=30), today),
+        "get_sessions: etag version": sessions_version(user_id, today - timedelta(days=30), today),
+        "get_sessions: sql json": sessions_json(
+            sessions_between(user_id, today - timedelta(days=30), today).limit(101), 100
+        ),
+        "complete_break_session: by id": session_for_update(user_id, session_id),
+        "get_daily_records: 30 days": daily_records_between(user_id, today - timedelta(days=30), today),
+        "get_daily_records: etag version": daily_records_version(user_id, today - timedelta(days=30), today),
+        "get_daily_records: sql json": daily_records_json(user_id, today - timedelta(days=30), today),
+        "get_rollups: 12 months": rollups_between("month", user_id, today - timedelta(days=365), today),
+        "refresh: active token": select(RefreshToken).where(
+            RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.is_(None)
+        ),
+        "logout: token": select(RefreshToken).where(RefreshToken.token_hash == token_hash),
+        "reset_password: unused token": select(PasswordResetToken).where(
+            PasswordResetToken.token_hash == token_hash, PasswordResetToken.used_at.is_(None)
+        ),
+        "reset_password: revoke user tokens": update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=text("now()")),
+    }
+
+
+def _pruned_ranges() -> dict[str, tuple[date, date]]:
+    today = date.today()
+    return {
+        "get_sessions: today": (today, today),
+        "get_sessions: 30 days": (today - timedelta(days=30), today),
+        "get_sessions: etag version": (today - timedelta(days=30), today),
+        "get_sessions: sql json": (today - timedelta(days=30), today),
+    }
+
+
+def _months_between(start: date, end: date) -> int:
+    months, month = 0, month_start(start)
+    while month <= end:
+        months, month = months + 1, add_months(month, 1)
+    return months
+
+
+def _table(relation: str | None) -> str | None:
+    # Partitions (break_sessions_y2026m10, break_sessions_default) count as their parent.
+    if relation and relation.startswith(PARENT_TABLE + "_"):
+        return PARENT_TABLE
+    return relation
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+USERS = 2000
+DAYS = 30
+
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    """(connection, partition row estimates, ids) over the seeded data; rolled back at the end."""
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            for statement in SEED_SQL:
+                conn.execute(text(statement), {"users": USERS, "days": DAYS})
+            for table in sorted(CHECKED_TABLES):
+                conn.execute(text(f"ANALYZE {table}"))
+
+            partition_rows = dict(
+                conn.execute(
+                    text(
+                        "SELECT c.relname, c.reltuples FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                        "WHERE i.inhparent = CAST(:parent AS regclass)"
+                    ),
+                    {"parent": PARENT_TABLE},
+                ).all()
+            )
+            user_id = conn.scalar(text("SELECT id FROM users WHERE email = 'plan-check-1@example.com'"))
+            session_id = conn.scalar(text("SELECT id FROM break_sessions WHERE user_id = :user_id LIMIT 1"), {"user_id": user_id})
+            token_hash = conn.scalar(
+                text("SELECT token_hash FROM refresh_tokens WHERE user_id = :user_id AND revoked_at IS NULL"),
+                {"user_id": user_id},
+            )
+            yield conn, partition_rows, _router_queries(user_id, session_id, token_hash)
+        finally:
+            trans.rollback()
+
+
+@pytest.mark.parametrize("name", list(_router_queries(None, None, None)))
+def test_router_query_is_planned_with_an_index(seeded, name):
+    conn, partition_rows, queries = seeded
+    compiled = queries[name].compile(dialect=conn.dialect)
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar_one()
+    nodes = list(_walk(plan[0]["Plan"]))
+
+    seq_scans = [
+        n["Relation Name"]
+        for n in nodes
+        if n["Node Type"] == "Seq Scan"
+        and _table(n.get("Relation Name")) in CHECKED_TABLES
+        and partition_rows.get(n["Relation Name"], SMALL_PARTITION_ROWS) >= SMALL_PARTITION_ROWS
+    ]
+    assert not seq_scans
+    if name in _pruned_ranges():
+        partitions = {n["Relation Name"] for n in nodes if _table(n.get("Relation Name")) == PARENT_TABLE}
+        assert len(partitions) <= _months_between(*_pruned_ranges()[name])
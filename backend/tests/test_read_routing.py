@@ -0,0 +1,109 @@
+"""Read routing against a lagging stand-in replica: DATABASE_REPLICA_URL points at the same database
+with search_path set to a schema holding a snapshot of the user's rows, so anything written after
+the snapshot is visible on the primary and missing on the "replica".
+"""
+import time
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, make_url, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import deps
+from app.core import read_routing
+from app.core.config import settings
+from app.core.database import SessionLocal, connect_args, engine
+from app.main import app
+from app.models import User
+
+SCHEMA = "replica_stand_in"
+# Tables the routed GETs read; the rest resolve to public through the search_path.
+TABLES = ("user_settings", "break_sessions", "daily_records")
+WINDOW_SECONDS = 1
+DAY = date(2026, 4, 6)
+SESSION = {
+    "date": DAY.isoformat(),
+    "startedAt": f"{DAY.isoformat()}T09:00:00+00:00",
+    "exerciseIds": ["visual-20-20-20"],
+    "durationPlannedSeconds": 600,
+}
+
+
+@pytest.fixture
+def routed(monkeypatch, user, auth_headers):
+    """A client behind ReadYourWritesMiddleware, with reads routed to the stand-in replica."""
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == user))
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        for table in TABLES:
+            conn.execute(text(f"CREATE TABLE {SCHEMA}.{table} (LIKE public.{table} INCLUDING DEFAULTS)"))
+            conn.execute(
+                text(f"INSERT INTO {SCHEMA}.{table} SELECT * FROM public.{table} WHERE user_id = :user_id"),
+                {"user_id": user_id},
+            )
+
+    replica_url = make_url(settings.database_url).update_query_dict({"options": f"-c search_path={SCHEMA},public"})
+    monkeypatch.setattr(settings, "database_replica_url", replica_url.render_as_string(hide_password=False))
+    replica = create_engine(replica_url, poolclass=NullPool, connect_args=connect_args())
+    async_replica = create_async_engine(replica_url, poolclass=NullPool, connect_args=connect_args())
+    monkeypatch.setattr(deps, "ReplicaSessionLocal", sessionmaker(bind=replica))
+    monkeypatch.setattr(deps, "AsyncReplicaSessionLocal", async_sessionmaker(bind=async_replica, expire_on_commit=False))
+    # The middleware builds its cookie from these; TestClient only sends plain-http cookies.
+    monkeypatch.setattr(settings, "db_replica_read_your_writes_seconds", WINDOW_SECONDS)
+    monkeypatch.setattr(settings, "cookie_secure", False)
+    monkeypatch.setattr(read_routing.recent_writes, "ttl_seconds", WINDOW_SECONDS)
+    read_routing.recent_writes.clear()
+    try:
+        yield TestClient(read_routing.ReadYourWritesMiddleware(app), headers=auth_headers)
+    finally:
+        read_routing.recent_writes.clear()
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+def _sessions(client: TestClient) -> list[str]:
+    response = client.get("/history/sessions", params={"from": DAY.isoformat(), "to": DAY.isoformat()})
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()]
+
+
+def _write(client: TestClient) -> str:
+    response = client.post("/history/sessions", json=SESSION)
+    assert response.status_code == 200, response.text
+    assert read_routing.RECENT_WRITE_COOKIE in response.headers["set-cookie"]
+    return response.json()["id"]
+
+
+def test_reads_go_to_the_replica(routed, client, auth_headers):
+    # Written without the middleware: nothing marks the user as a recent writer.
+    assert client.post("/history/sessions", json=SESSION, headers=auth_headers).status_code == 200
+
+    assert _sessions(routed) == []
+    assert routed.get("/settings/me").status_code == 200
+
+
+def test_worker_tracker_keeps_the_next_read_on_the_primary(routed):
+    session_id = _write(routed)
+    routed.cookies.clear()
+
+    assert _sessions(routed) == [session_id]
+
+
+def test_cookie_keeps_the_next_read_on_the_primary(routed):
+    session_id = _write(routed)
+    # As if the next request landed on another worker: only the cookie remembers the write.
+    read_routing.recent_writes.clear()
+
+    assert _sessions(routed) == [session_id]
+
+
+def test_reads_go_back_to_the_replica_after_the_window(routed):
+    _write(routed)
+    time.sleep(WINDOW_SECONDS + 0.2)
+
+    assert _sessions(routed) == []
@@ -0,0 +1,59 @@
+"""DB_ASYNC_MODE swaps app/routers/{auth,settings,history}.py for their app/routers/aio/ copies; both
+must expose the same API: paths, methods, parameters, request bodies, status codes and response models.
+"""
+import pytest
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.routing import APIRoute
+
+from app.routers import aio, auth, history, settings
+
+
+def _params(params) -> list[tuple]:
+    return sorted(
+        (
+            param.name,
+            param.alias,
+            repr(param.field_info.annotation),
+            param.required,
+            repr(param.default),
+            repr(param.field_info.metadata),
+        )
+        for param in params
+    )
+
+
+def _signature(route: APIRoute) -> dict:
+    flat = get_flat_dependant(route.dependant, skip_repeats=True)
+    return {
+        "name": route.name,
+        "status_code": route.status_code,
+        "response_model": route.response_model,
+        "response_class": route.response_class,
+        "path": _params(flat.path_params),
+        "query": _params(flat.query_params),
+        "header": _params(flat.header_params),
+        "cookie": _params(flat.cookie_params),
+        "body": _params(flat.body_params),
+    }
+
+
+def _routes(router) -> dict:
+    return {
+        (route.path, method): _signature(route)
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+
+@pytest.mark.parametrize(
+    "sync_router, async_router",
+    [(auth.router, aio.auth.router), (settings.router, aio.settings.router), (history.router, aio.history.router)],
+    ids=["auth", "settings", "history"],
+)
+def test_async_routers_expose_the_same_api(sync_router, async_router):
+    expected, actual = _routes(sync_router), _routes(async_router)
+
+    assert sorted(actual) == sorted(expected)
+    for key, signature in expected.items():
+        assert actual[key] == signature, key
@@ -0,0 +1,83 @@
+import pytest
+
+from app.core.config import settings
+
+DAY = "2026-01-07"
+
+
+def _item(client_id: str, completed: bool = False) -> dict:
+    item = {
+        "clientId": client_id,
+        "date": DAY,
+        "startedAt": f"{DAY}T09:00:00+00:00",
+        "exerciseIds": ["visual-20-20-20"],
+        "durationPlannedSeconds": 600,
+    }
+    if completed:
+        item.update(completedAt=f"{DAY}T09:10:00+00:00", durationActualSeconds=540)
+    return item
+
+
+@pytest.fixture(params=["insert", "copy"])
+def batch_path(request, monkeypatch):
+    if request.param == "copy":
+        monkeypatch.setattr(settings, "history_batch_copy_threshold", 1)
+    return request.param
+
+
+def _sync(client, headers, items) -> list[dict]:
+    response = client.post("/history/sessions:batch", json=items, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _daily_record(client, headers) -> dict:
+    [record] = client.get("/history/daily-records", params={"from": DAY, "to": DAY}, headers=headers).json()
+    return record
+
+
+def test_replayed_completion_completes_the_stored_session(client, auth_headers, batch_path):
+    [started] = _sync(client, auth_headers, [_item("a")])
+    assert started["session"]["completed"] is False
+
+    [replayed] = _sync(client, auth_headers, [_item("a", completed=True)])
+
+    assert replayed["ok"]
+    assert replayed["session"]["id"] == started["session"]["id"]
+    assert replayed["session"]["completed"] is True
+    assert replayed["session"]["durationActualSeconds"] == 540
+    record = _daily_record(client, auth_headers)
+    assert (record["sessionsStarted"], record["sessionsCompleted"]) == (1, 1)
+
+
+def test_replay_does_not_count_twice_or_undo_a_completion(client, auth_headers, batch_path):
+    first = _sync(client, auth_headers, [_item("a", completed=True), _item("b")])[0]
+
+    replayed = _sync(client, auth_headers, [_item("a"), _item("a", completed=True), _item("b")])
+
+    assert [result["session"]["id"] for result in replayed[:2]] == [first["session"]["id"]] * 2
+    assert all(result["session"]["completed"] for result in replayed[:2])
+    assert replayed[2]["session"]["completed"] is False
+    record = _daily_record(client, auth_headers)
+    assert (record["sessionsStarted"], record["sessionsCompleted"]) == (2, 1)
+
+
+def test_item_repeated_in_one_batch_is_stored_once(client, auth_headers, batch_path):
+    results = _sync(client, auth_headers, [_item("a"), _item("a", completed=True)])
+
+    assert results[0]["session"]["id"] == results[1]["session"]["id"]
+    assert results[1]["session"]["completed"] is True
+    record = _daily_record(client, auth_headers)
+    assert (record["sessionsStarted"], record["sessionsCompleted"]) == (1, 1)
+
+
+def test_replayed_completion_changes_the_sessions_etag(client, auth_headers, batch_path):
+    _sync(client, auth_headers, [_item("a")])
+    listed = client.get("/history/sessions", params={"from": DAY, "to": DAY}, headers=auth_headers)
+
+    _sync(client, auth_headers, [_item("a", completed=True)])
+
+    headers = {**auth_headers, "If-None-Match": listed.headers["etag"]}
+    response = client.get("/history/sessions", params={"from": DAY, "to": DAY}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()[0]["completed"] is True
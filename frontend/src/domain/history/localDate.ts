@@ -0,0 +1,7 @@
+// YYYY-MM-DD of the user's own calendar day. toISOString() gives the UTC day, which is already
+// tomorrow in the evening west of UTC.
+export function localDateStr(date: Date = new Date()): string {
+  const month = String(date.getMonth() + 1).padStart(2, '0')
+  const day = String(date.getDate()).padStart(2, '0')
+  return `${date.getFullYear()}-${month}-${day}`
+}
@@ -1,5 +1,5 @@
 import { apiRequest } from './apiClient'
-import type { BreakSession, DailyRecord } from '@/types/session'
+import type { BreakSession, ComplianceStats, DailyRecord } from '@/types/session'
 import type { SessionCompletePayload, SessionCreatePayload } from '@/services/contracts/history'
 
 export async function createSession(payload: SessionCreatePayload): Promise<BreakSession> {
@@ -32,6 +32,11 @@ export async function getDailyRecords(from: string, to: string): Promise<DailyRe
   return apiRequest<DailyRecord[]>(`/history/daily-records?from=${from}&to=${to}`, { method: 'GET' })
 }
 
+export async function getComplianceStats(days?: number, today?: string): Promise<ComplianceStats> {
+  const query = days ? `?days=${days}&today=${today}` : ''
+  return apiRequest<ComplianceStats>(`/history/stats${query}`, { method: 'GET' })
+}
+
 export async function setExpectedSessions(date: string, expected: number): Promise<void> {
   await apiRequest<void>(`/history/daily-records/${date}/expected`, {
     method: 'PUT',
@@ -1,12 +1,19 @@
 import { computed, ref } from 'vue'
 import { defineStore } from 'pinia'
 import type { BreakSession, ComplianceStats, DailyRecord } from '@/types/session'
-import { completeSessionById, createSession, getDailyRecords, getSessionsByDate } from '@/services/db'
+import {
+  completeSessionById,
+  createSession,
+  getComplianceStats as fetchComplianceStats,
+  getDailyRecords,
+  getSessionsByDate,
+} from '@/services/db'
 import type { AppError } from '@/types/errors'
 import { toAppError } from '@/types/errors'
+import { localDateStr } from '@/domain/history/localDate'
 
 function todayStr(): string {
-  return new Date().toISOString().split('T')[0]!
+  return localDateStr()
 }
 
 export const useHistoryStore = defineStore('history', () => {
@@ -48,7 +55,7 @@ export const useHistoryStore = defineStore('history', () => {
       const today = new Date()
       const weekAgo = new Date(today)
       weekAgo.setDate(weekAgo.getDate() - 6)
-      const from = weekAgo.toISOString().split('T')[0]!
+      const from = localDateStr(weekAgo)
       const to = todayStr()
       weeklyRecords.value = await getDailyRecords(from, to)
       lastError.value = null
@@ -94,36 +101,12 @@ export const useHistoryStore = defineStore('history', () => {
     }
   }
 
-  async function getComplianceStats(days: number = 30): Promise<ComplianceStats> {
+  // Without days the server answers from its trigger-maintained totals; a window costs a recompute.
+  async function getComplianceStats(days?: number): Promise<ComplianceStats> {
     try {
-      const today = new Date()
-      const from = new Date(today)
-      from.setDate(from.getDate() - days + 1)
-      const records = await getDailyRecords(from.toISOString().split('T')[0]!, todayStr())
-
-      const totalDays = records.length
-      const averageCompliance = totalDays > 0
-        ? Math.round(records.reduce((sum, record) => sum + record.compliancePercent, 0) / totalDays)
-        : 0
-
-      let currentStreak = 0
-      let bestStreak = 0
-      let tempStreak = 0
-
-      const sorted = [...records].sort((a, b) => b.date.localeCompare(a.date))
-      for (const record of sorted) {
-        if (record.compliancePercent >= 75) {
-          tempStreak++
-          if (tempStreak > bestStreak) bestStreak = tempStreak
-        } else {
-          if (currentStreak === 0) currentStreak = tempStreak
-          tempStreak = 0
-        }
-      }
-      if (currentStreak === 0) currentStreak = tempStreak
-
+      const stats = await fetchComplianceStats(days, todayStr())
       lastError.value = null
-      return { totalDays, averageCompliance, currentStreak, bestStreak }
+      return stats
     } catch (error) {
       lastError.value = toAppError('history', error, 'No fue posible calcular estadisticas', 'history_stats_failed')
       return { totalDays: 0, averageCompliance: 0, currentStreak: 0, bestStreak: 0 }